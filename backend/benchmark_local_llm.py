@@ -0,0 +1,145 @@
+"""
+Benchmark Local LLM CPU backends
+
+Runs each backend in a fresh process (so peak RSS is measured per backend)
+and compares load time, generation throughput and memory against fp32.
+A priming process first converts and caches the backend's weights (cold
+load); the measured process then loads from that cache (warm load), so its
+peak RSS and load time do not include fp32-sized conversion work.
+
+Usage:
+    python benchmark_local_llm.py
+    python benchmark_local_llm.py --backends fp32 int8 --max-new-tokens 64 --runs 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, Optional
+
+PROMPT = "Giải thích ngắn gọn sự khác nhau giữa học máy có giám sát và không giám sát."
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident memory of this process in MB"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # KB on Linux, bytes on macOS
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 / 1024
+
+
+def run_worker(backend: str, max_new_tokens: int, runs: int, prime: bool = False):
+    """
+    Load one backend, generate greedily and print a JSON result line
+
+    With prime=True the backend is only loaded (converting and caching its
+    weights if needed) and the load time is reported.
+    """
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+    import torch
+    from tools.local_llm import LocalLLM
+
+    llm = LocalLLM(cpu_backend=backend)
+    started = time.perf_counter()
+    llm.load_model()
+    load_seconds = time.perf_counter() - started
+
+    if prime:
+        print(json.dumps({"backend": llm.cpu_backend, "load_s": round(load_seconds, 1)}))
+        return
+
+    text = llm.tokenizer.apply_chat_template(
+        [{"role": "user", "content": PROMPT}], tokenize=False, add_generation_prompt=True
+    )
+    inputs = llm.tokenizer(text, return_tensors="pt").to(llm.model.device)
+    prompt_tokens = inputs["input_ids"].shape[1]
+
+    # Warm-up (first call pays one-off kernel/graph initialization)
+    with torch.inference_mode():
+        llm.model.generate(**inputs, max_new_tokens=8, do_sample=False, pad_token_id=llm.tokenizer.pad_token_id)
+
+    tokens = 0
+    seconds = 0.0
+    for _ in range(runs):
+        started = time.perf_counter()
+        with torch.inference_mode():
+            output = llm.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                min_new_tokens=max_new_tokens,
+                do_sample=False,
+                pad_token_id=llm.tokenizer.pad_token_id
+            )
+        seconds += time.perf_counter() - started
+        tokens += output.shape[1] - prompt_tokens
+
+    print(json.dumps({
+        "backend": llm.cpu_backend,
+        "requested": backend,
+        "load_s": round(load_seconds, 1),
+        "tokens_per_s": round(tokens / seconds, 2),
+        "peak_rss_mb": round(_peak_rss_mb())
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Local LLM CPU backends")
+    parser.add_argument("--backends", nargs="+", default=["fp32", "bf16", "int8", "onnx"])
+    parser.add_argument("--max-new-tokens", type=int, default=128)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--prime", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.max_new_tokens, args.runs, prime=args.prime)
+        return
+
+    def run(backend: str, *extra: str) -> Optional[Dict[str, Any]]:
+        proc = subprocess.run(
+            [sys.executable, __file__, "--worker", backend,
+             "--max-new-tokens", str(args.max_new_tokens), "--runs", str(args.runs), *extra],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+        if proc.returncode != 0 or not lines:
+            print(f"❌ {backend} failed:\n{proc.stderr[-2000:]}")
+            return None
+        return json.loads(lines[-1])
+
+    results = []
+    for backend in args.backends:
+        # Separate process: conversion must not inflate the measured peak RSS
+        print(f"🔄 Preparing {backend} (convert and cache weights)...")
+        primed = run(backend, "--prime")
+        if primed is None:
+            continue
+        print(f"🔄 Benchmarking {backend}...")
+        result = run(backend)
+        if result is None:
+            continue
+        result["cold_load_s"] = primed["load_s"]
+        results.append(result)
+
+    if not results:
+        return
+
+    baseline = next((r for r in results if r["backend"] == "fp32"), None)
+    print(f"\n{'backend':<10}{'cold load s':>13}{'load s':>10}{'tokens/s':>12}{'speedup':>10}"
+          f"{'peak RSS MB':>14}{'RSS vs fp32':>14}")
+    for r in results:
+        label = r["backend"] if r["backend"] == r["requested"] else f"{r['requested']}->{r['backend']}"
+        speedup = f"{r['tokens_per_s'] / baseline['tokens_per_s']:.2f}x" if baseline else "-"
+        memory = f"{r['peak_rss_mb'] / baseline['peak_rss_mb']:.2f}x" if baseline else "-"
+        print(f"{label:<10}{r['cold_load_s']:>13}{r['load_s']:>10}{r['tokens_per_s']:>12}{speedup:>10}"
+              f"{r['peak_rss_mb']:>14}{memory:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,11 +16,116 @@ class Config:
     
     # Search Engine Configuration
     SEARCH_ENGINE = os.getenv("SEARCH_ENGINE", "duckduckgo")  # duckduckgo or serpapi
+    SEARCH_REGION = "vn-vi"  # Vietnam region for better Vietnamese results
+    SEARCH_CACHE_MAX_SIZE = 1000  # Cached (engine, query, max_results, region) entries
+    SEARCH_CACHE_TTL = {  # Seconds to keep results per engine
+        "duckduckgo": 900,
+        "serpapi": 1800  # Paid quota, keep longer
+    }
+    SEARCH_CACHE_EMPTY_TTL = 30  # Seconds to keep empty results (rate limits, network errors)
+    
+    # Smart Chat Search Decision
+    SEARCH_DECISION_USE_LOCAL_LLM = os.getenv("SEARCH_DECISION_USE_LOCAL_LLM", "false").lower() == "true"  # Ask local Qwen before Gemini
+    SEARCH_DECISION_USE_REMOTE = os.getenv("SEARCH_DECISION_USE_REMOTE", "true").lower() == "true"  # Gemini classifier as last resort
+    SEARCH_DECISION_CONFIDENCE = float(os.getenv("SEARCH_DECISION_CONFIDENCE", "0.7"))  # Minimum confidence to skip later stages
+    
+    # Outbound HTTP Configuration (shared by all API tools)
+    HTTP_CONNECT_TIMEOUT = 5  # Seconds to establish a connection
+    HTTP_READ_TIMEOUT = 30  # Default seconds to wait for a response
+    HTTP_MAX_RETRIES = 2  # Retries on connection errors / 429 / 5xx (idempotent methods)
+    HTTP_BACKOFF_FACTOR = 0.5  # Exponential backoff between retries
+    HTTP_POOL_MAXSIZE = 20  # Keep-alive connections per host
+    
+    # Wolfram Alpha Cache Configuration
+    WOLFRAM_CACHE_DIR = "cache/wolfram"  # Parsed results as JSON files
+    WOLFRAM_OUTPUT_ROOT = "output"  # Served at /output; pod images go to output/wolfram
+    WOLFRAM_CACHE_TTL = 30 * 24 * 3600  # Seconds (math results rarely change)
+    WOLFRAM_CACHE_MAX_ENTRIES = 512  # Results kept in memory
+    WOLFRAM_PREFETCH_IMAGES = os.getenv("WOLFRAM_PREFETCH_IMAGES", "true").lower() == "true"
     
     # Data Analysis Configuration
-    MAX_CSV_SIZE_MB = 100
+    MAX_CSV_SIZE_MB = int(os.getenv("MAX_CSV_SIZE_MB", "1000"))
+    CSV_ENGINE = os.getenv("CSV_ENGINE", "auto")  # auto (pyarrow if installed), pyarrow or c (chunked)
+    CSV_CHUNK_ROWS = 200_000  # Rows per chunk for the chunked reader
+    CSV_SAMPLE_ROWS = 50_000  # Rows sampled for dtype inference
+    CSV_CATEGORY_MAX_UNIQUE = 10_000  # String columns with at most this many values...
+    CSV_CATEGORY_MAX_RATIO = 0.5  # ...and unique/non-null ratio become category
+    CSV_CACHE_DIR = "cache/csv"  # Parquet copies of loaded CSVs
+    CSV_CACHE_MAX_MB = 5120
+    AI_CONTEXT_TOKEN_BUDGET = 1500  # Approximate tokens of dataset context per AI analysis prompt
+    DATA_QUERY_MAX_ATTEMPTS = 2  # Generated queries retried with the error message
+    DATA_QUERY_MAX_RESULT_ROWS = 50  # Query result rows sent back to Gemini
+    DATA_QUERY_TIMEOUT = 10  # Seconds a generated query may run
+    DATA_QUERY_MAX_RUNNING = 2  # pandas queries evaluated at once, counting timed-out ones still running
+    DATA_QUERY_MAX_PATTERN_LENGTH = 200  # Characters in a regex passed to str.contains/replace/...
+    DATA_QUERY_MAX_RESULT_CELLS = 1_000_000  # Larger pandas results are rejected (aggregate instead)
+    DATA_QUERY_SQL_ROW_LIMIT = 10_000  # LIMIT applied to every generated SELECT
+    DATA_QUERY_SQL_MEMORY_LIMIT = "1GB"  # DuckDB memory limit per query
+    DATA_QUERY_SQL_THREADS = 2  # DuckDB threads per query
+    PROFILE_EXACT_DISTINCT_MAX_ROWS = 1_000_000  # Larger columns get HyperLogLog distinct counts
     CHART_OUTPUT_DIR = "charts"
-    
+    CHART_PROFILES = {  # Output format and resolution per chart profile
+        "preview": {"format": "png", "dpi": 100},
+        "web": {"format": "webp", "dpi": 150},
+        "svg": {"format": "svg", "dpi": 100},
+        "print": {"format": "png", "dpi": 300}
+    }
+    CHART_DEFAULT_PROFILE = "preview"
+    CHART_DIR_MAX_MB = 500  # Least recently used charts are deleted beyond this
+    CHART_MAX_BARS = 50  # Bars beyond this are aggregated to the most frequent groups
+    CHART_MAX_LINE_POINTS = 5000  # Line charts are LTTB-downsampled above this
+    CHART_SCATTER_BIN_ROWS = 50_000  # Scatter plots switch to hexbin above this
+    CHART_HEXBIN_GRIDSIZE = 80
+    DATASET_MEMORY_BUDGET_MB = int(os.getenv("DATASET_MEMORY_BUDGET_MB", "1024"))  # In-memory DataFrames across sessions
+    DATASET_SPILL_DIR = "cache/datasets"  # LRU datasets spilled to Parquet
+    DATASET_IDLE_TTL = 24 * 3600  # Seconds before an unused session's dataset is dropped
+
+    # Worker Pool Configuration
+    MODEL_POOL_SIZE = int(os.getenv("MODEL_POOL_SIZE", "2"))  # Concurrent model inference jobs
+    IO_POOL_SIZE = int(os.getenv("IO_POOL_SIZE", "16"))  # Concurrent blocking API/network calls
+
+    # Model Residency Configuration
+    MODEL_RAM_BUDGET_MB = int(os.getenv("MODEL_RAM_BUDGET_MB", "8192"))  # Local models kept in RAM (LRU evicted beyond)
+    MODEL_VRAM_BUDGET_MB = int(os.getenv("MODEL_VRAM_BUDGET_MB", "3584"))  # Local models kept on the GPU (4GB card)
+    MODEL_IDLE_TTL = int(os.getenv("MODEL_IDLE_TTL", "900"))  # Seconds an unused model stays loaded (0 = forever)
+
+    # Generated Image Store (Stable Diffusion and Clipdrop)
+    IMAGE_STORE_DIR = "output/images"  # Content-addressed by model, prompt, seed, size and steps
+    IMAGE_STORE_MAX_MB = int(os.getenv("IMAGE_STORE_MAX_MB", "2048"))  # Least recently used images are deleted beyond this
+    IMAGE_STORE_TRIM_GRACE_S = 300  # Images used more recently than this are never trimmed (may still be read)
+
+    # Stable Diffusion Configuration
+    SD_BATCH_SIZE = int(os.getenv("SD_BATCH_SIZE", "4"))  # Slide images per pipeline call
+    SD_FAST_SCHEDULER = True  # DPM-Solver++ instead of the default PNDM scheduler
+    SD_STEPS = 25  # Inference steps for normal images
+    SD_IMAGE_SIZE = 512  # Image size for normal images
+    SD_PREVIEW_MODE = os.getenv("SD_PREVIEW_MODE", "auto")  # auto (CPU only), on or off
+    SD_PREVIEW_STEPS = 12  # Inference steps in preview mode
+    SD_PREVIEW_SIZE = 384  # Image size in preview mode
+
+    # Summarization Configuration
+    SUMMARIZATION_CHUNK_TOKENS = 900  # Tokens per map-step chunk (BART accepts 1024)
+    SUMMARIZATION_CHUNK_OVERLAP = 100  # Tokens shared by consecutive chunks
+    SUMMARIZATION_CHUNK_SUMMARY_TOKENS = 150  # Maximum summary length per chunk
+    SUMMARIZATION_BATCH_SIZE = int(os.getenv("SUMMARIZATION_BATCH_SIZE", "8"))  # Texts per generate call
+    SUMMARIZATION_MAX_LEVELS = 4  # Reduction rounds before the final summary
+    SUMMARIZATION_BATCH_MAX_TEXTS = 500  # Texts accepted by /summarization/batch
+
+    # Local LLM Configuration
+    LOCAL_LLM_CPU_BACKEND = os.getenv("LOCAL_LLM_CPU_BACKEND", "fp32")  # fp32, bf16, int8 or onnx (CPU only)
+    LOCAL_LLM_CACHE_DIR = "cache/local_llm"  # Converted CPU weights (bf16/int8/ONNX)
+    LOCAL_LLM_MAX_BATCH_SIZE = int(os.getenv("LOCAL_LLM_MAX_BATCH_SIZE", "8"))  # Requests per generate call
+    LOCAL_LLM_BATCH_WAIT_MS = 20  # Time to gather concurrent requests into a batch
+    LOCAL_LLM_PREFIX_CACHE_MB = int(os.getenv("LOCAL_LLM_PREFIX_CACHE_MB", "512"))  # KV cache kept for prompt prefixes
+    LOCAL_LLM_PREFIX_MIN_TOKENS = 32  # Shorter prefixes are not cached
+
+    # Video Job Configuration
+    VIDEO_POLL_INITIAL_INTERVAL = 5  # Seconds before the first operation poll
+    VIDEO_POLL_MAX_INTERVAL = 30  # Upper bound for the polling backoff
+    VIDEO_POLL_BACKOFF = 1.5  # Multiplier applied after every unfinished poll
+    VIDEO_JOB_WORKERS = 4  # Threads for starting operations and downloading videos
+    VIDEO_JOB_TTL = 3600  # Seconds to keep finished jobs for status/result queries
+
     @classmethod
     def validate(cls):
         """Validate required configuration"""
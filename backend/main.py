@@ -1,30 +1,39 @@
 """FastAPI Backend for AI Agent"""
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
+import time
 import os
+import json
+import asyncio
+import threading
 import shutil
 from pathlib import Path
 import io
 
-from google import genai
 from google.genai import types
-from tools.web_search import search_web
-from tools.wolfram_tool import wolfram_compute
-from tools.data_analysis import DataAnalysisTool
+from tools.web_search import search_web, get_search_cache_stats
+from tools.search_decision import get_search_decider, peek_search_decider
+from tools.wolfram_tool import wolfram_compute, wolfram_stream_pods, peek_wolfram_cache
+from tools.data_analysis import DataAnalysisTool, get_dataset_registry
 from tools.vision_tools import vision_tools
-from tools.local_llm import get_local_llm, get_gemini_api
+from tools.local_llm import get_local_llm, peek_local_llm, get_gemini_api
 from tools.summarization_tool import get_summarization_tool
 from tools.speech_to_text import get_speech_tool
 from tools.asr_tool import get_asr_tool
 from tools.image_generation import get_image_generation_tool
-from tools.video_generation import get_video_generation_tool
+from tools.video_generation import get_video_generation_tool, get_video_job_manager, peek_video_job_manager
 from tools.translation_tool import get_translation_tool
 from tools.slide_generation_tool import get_slide_generation_tool
 from tools.latex_ocr_tool import get_latex_ocr_tool
+from tools.http_client import peek_http_client
+from tools.gemini_client import get_gemini_client, get_async_gemini_client, get_gemini_client_stats
+from tools.model_manager import peek_model_manager
+from tools.image_store import peek_image_store
+from workers import run_io, run_model, iterate_io, get_worker_stats, shutdown_workers
 from config import Config
 
 # For TTS
@@ -45,10 +54,10 @@ app.add_middleware(
 
 # Initialize Gemini client
 Config.validate()
-client = genai.Client(api_key=Config.GEMINI_API_KEY)
+client = get_gemini_client(Config.GEMINI_API_KEY)
 
-# Global data analysis tool
-data_tool = DataAnalysisTool()
+# Session-scoped datasets for data analysis
+dataset_registry = get_dataset_registry()
 
 # Create directories
 UPLOAD_DIR = Path("uploads")
@@ -69,6 +78,16 @@ app.mount("/output", StaticFiles(directory="output"), name="output")
 app.mount("/slides", StaticFiles(directory="slides"), name="slides")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release worker pool threads and HTTP connections on shutdown"""
+    shutdown_workers()
+    http_client = peek_http_client()
+    if http_client is not None:
+        http_client.close()
+        await http_client.aclose()
+
+
 # Request/Response Models
 class ChatRequest(BaseModel):
     message: str
@@ -89,16 +108,20 @@ class SearchRequest(BaseModel):
 
 class MathRequest(BaseModel):
     query: str
+    pod_filter: Optional[List[str]] = None  # e.g. ["Result", "Plot"]; matches pod titles/ids
+    max_pods: Optional[int] = None  # Return after this many matching pods
 
 
 class DataAnalysisRequest(BaseModel):
-    action: str  # "summary", "info", "analyze_column", "create_chart", "ai_analyze"
+    action: str  # "summary", "info", "analyze_column", "create_chart", "ai_analyze", "ai_query"
     column: Optional[str] = None
     chart_type: Optional[str] = None
     x_col: Optional[str] = None
     y_col: Optional[str] = None
     title: Optional[str] = None
     prompt: Optional[str] = None  # For AI analysis
+    session_id: str = "default"  # Dataset session (see /upload-csv)
+    chart_profile: Optional[str] = None  # "preview" (default), "web", "svg" or "print"
 
 
 class SmartChatRequest(BaseModel):
@@ -112,6 +135,8 @@ class SmartChatResponse(BaseModel):
     status: str
     search_performed: bool
     search_engine: Optional[str] = None
+    decision_source: Optional[str] = None  # "cache", "rules", "local_llm", "remote" (None for images)
+    timings: Optional[Dict[str, float]] = None  # Per-stage timing in milliseconds
 
 
 class TextToSpeechRequest(BaseModel):
@@ -134,6 +159,7 @@ class CreateSlidesRequest(BaseModel):
     use_api: bool = False  # True for Gemini API, False for Local LLM
     api_key: Optional[str] = None  # Gemini API key
     model_name: Optional[str] = "gemini-2.5-flash"  # Gemini model name
+    image_preview: Optional[bool] = None  # Fast low-step images (default: on CPU only)
 
 
 class VisionRequest(BaseModel):
@@ -147,6 +173,14 @@ class SummarizationRequest(BaseModel):
     max_length: int = 130
     min_length: int = 30
     do_sample: bool = False
+    hierarchical: bool = True  # Map-reduce long texts instead of truncating them
+
+
+class SummarizationBatchRequest(BaseModel):
+    texts: List[str]
+    max_length: int = 130
+    min_length: int = 30
+    do_sample: bool = False
 
 
 class SpeechToTextRequest(BaseModel):
@@ -221,13 +255,46 @@ async def health_check():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """
+    Runtime metrics for worker pools, caches and models
+    
+    Only components that already exist are reported (None otherwise), so
+    reading metrics never creates clients, threads or models.
+    """
+    decider = peek_search_decider()
+    http_client = peek_http_client()
+    wolfram_cache = peek_wolfram_cache()
+    video_jobs = peek_video_job_manager()
+    llm = peek_local_llm()
+    model_manager = peek_model_manager()
+    image_store = peek_image_store()
+    return {
+        "workers": get_worker_stats(),
+        "search_cache": get_search_cache_stats(),
+        "search_decision_cache": decider.cache.stats() if decider else None,
+        "http": http_client.stats() if http_client else None,
+        "wolfram_cache": wolfram_cache.stats() if wolfram_cache else None,
+        "video_jobs": video_jobs.stats() if video_jobs else None,
+        "datasets": dataset_registry.stats(),
+        "local_llm": llm.batcher.stats() if llm else None,
+        "local_llm_prefix_cache": llm.prefix_cache.stats() if llm else None,
+        "models": model_manager.stats() if model_manager else None,
+        "image_store": image_store.stats() if image_store else None,
+        "gemini_clients": get_gemini_client_stats(),
+        "status": "success"
+    }
+
+
 @app.post("/chat")
 async def chat(request: ChatRequest):
     """Main chat endpoint that routes to different features"""
     try:
         if request.feature == "search":
             # Web search - trả về kết quả thuần túy không qua Gemini
-            results = search_web(
+            results = await run_io(
+                search_web,
                 request.message,
                 search_engine=request.search_engine,
                 max_results=5
@@ -240,7 +307,7 @@ async def chat(request: ChatRequest):
         
         elif request.feature == "math":
             # Wolfram computation only - no Gemini
-            wolfram_result = wolfram_compute(request.message)
+            wolfram_result = await run_io(wolfram_compute, request.message)
             
             # Format result for text display while keeping full data for frontend
             if isinstance(wolfram_result, dict):
@@ -272,7 +339,8 @@ async def chat(request: ChatRequest):
         
         else:
             # General AI response
-            response = client.models.generate_content(
+            response = await run_io(
+                client.models.generate_content,
                 model="gemini-2.5-flash",
                 contents=request.message
             )
@@ -286,138 +354,91 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/smart-chat", response_model=SmartChatResponse)
-async def smart_chat(request: SmartChatRequest):
-    """
-    Smart chat endpoint that automatically decides when to search for information
-    AI will analyze the query and determine if web search is needed
-    Supports multimodal input with images
-    """
-    try:
-        # Prepare images if any
-        image_parts = []
-        if request.image_filenames:
-            from PIL import Image as PILImage
-            for filename in request.image_filenames:
-                image_path = UPLOAD_DIR / filename
-                if image_path.exists():
-                    # Load image and convert to Gemini format
-                    img = PILImage.open(str(image_path))
-                    image_parts.append(img)
-        
-        # First, ask AI if search is needed (only if no images)
-        need_search = False
-        if not image_parts:
-            decision_prompt = f"""Phân tích câu hỏi sau và quyết định xem có cần tìm kiếm thông tin trên web không.
-
-Câu hỏi: {request.message}
-
-Trả lời CHÍNH XÁC theo format JSON sau (không thêm text nào khác):
-{{"need_search": true/false, "reason": "lý do ngắn gọn"}}
+def _sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Format a Server-Sent Events frame"""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
 
-Cần tìm kiếm (need_search: true) khi:
-- Câu hỏi về tin tức, sự kiện hiện tại, giá cả thị trường
-- Thông tin cập nhật (thời tiết, giá vàng, giá bitcoin, chứng khoán)
-- Sự kiện, tin tức mới, xu hướng
-- Thông tin cụ thể về sản phẩm, địa điểm, người nổi tiếng
 
-KHÔNG cần tìm kiếm (need_search: false) khi:
-- Câu hỏi về kiến thức chung, định nghĩa
-- Tính toán toán học
-- Câu hỏi mang tính triết lý, ý kiến cá nhân
-- Lời khuyên chung không cần dữ liệu cụ thể"""
-
-            decision_response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=decision_prompt
+async def _prepare_smart_chat(request: SmartChatRequest) -> dict:
+    """
+    Run the smart chat pipeline up to the final generation call
+    
+    Returns:
+        Dict with contents/config for the final Gemini call plus search metadata
+    """
+    # Prepare images if any
+    image_parts = []
+    if request.image_filenames:
+        from PIL import Image as PILImage
+        for filename in request.image_filenames:
+            image_path = UPLOAD_DIR / filename
+            if image_path.exists():
+                # Load image and convert to Gemini format
+                img = PILImage.open(str(image_path))
+                image_parts.append(img)
+    
+    # If we have images, handle them with vision capabilities
+    if image_parts:
+        # Create multimodal content with images
+        content_parts = []
+        
+        # Add text message if present
+        if request.message:
+            content_parts.append(request.message)
+        
+        # Add all images
+        content_parts.extend(image_parts)
+        
+        return {
+            "contents": content_parts,
+            "config": None,
+            "search_performed": False,
+            "search_engine": None,
+            "decision_source": None,
+            "timings": {}
+        }
+    
+    # Decide if search is needed: local rules first, remote classifier only when unsure
+    decision = await run_io(get_search_decider(client).decide, request.message)
+    need_search = decision["need_search"]
+    timings = {f"decision.{stage}": ms for stage, ms in decision["timings"].items()}
+    
+    if need_search:
+        # Use the search engine specified by user
+        search_engine = request.search_engine
+        
+        if search_engine == "google":
+            # Use Gemini with Google Search grounding
+            grounding_tool = types.Tool(
+                google_search=types.GoogleSearch()
             )
             
-            # Parse decision
-            import json
-            decision_text = decision_response.text.strip()
-            
-            # Extract JSON from response (handle markdown code blocks)
-            if "```json" in decision_text:
-                decision_text = decision_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in decision_text:
-                decision_text = decision_text.split("```")[1].split("```")[0].strip()
-            
-            try:
-                decision = json.loads(decision_text)
-                need_search = decision.get("need_search", False)
-            except:
-                # Fallback: check for keywords
-                search_keywords = ["tin tức", "hiện tại", "hôm nay", "giá", "cập nhật", "mới nhất", "thời tiết"]
-                need_search = any(keyword in request.message.lower() for keyword in search_keywords)
-        
-        search_performed = False
-        search_engine_used = None
-        
-        # If we have images, handle them with vision capabilities
-        if image_parts:
-            # Create multimodal content with images
-            content_parts = []
-            
-            # Add text message if present
-            if request.message:
-                content_parts.append(request.message)
-            
-            # Add all images
-            content_parts.extend(image_parts)
-            
-            # Generate response with vision
-            final_response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=content_parts
+            config = types.GenerateContentConfig(
+                tools=[grounding_tool]
             )
             
-            return SmartChatResponse(
-                response=final_response.text,
-                status="success",
-                search_performed=False,
-                search_engine=None
-            )
+            return {
+                "contents": request.message,
+                "config": config,
+                "search_performed": True,
+                "search_engine": search_engine,
+                "decision_source": decision["source"],
+                "timings": timings
+            }
         
-        if need_search:
-            # Use the search engine specified by user
-            search_engine = request.search_engine
-            search_engine_used = search_engine
-            
-            if search_engine == "google":
-                # Use Gemini with Google Search grounding
-                search_performed = True
-                
-                grounding_tool = types.Tool(
-                    google_search=types.GoogleSearch()
-                )
-                
-                config = types.GenerateContentConfig(
-                    tools=[grounding_tool]
-                )
-                
-                final_response = client.models.generate_content(
-                    model="gemini-2.5-flash",
-                    contents=request.message,
-                    config=config
-                )
-                
-                return SmartChatResponse(
-                    response=final_response.text,
-                    status="success",
-                    search_performed=search_performed,
-                    search_engine=search_engine_used
-                )
-            else:
-                # Use DuckDuckGo or SerpAPI
-                search_results = search_web(
-                    request.message,
-                    search_engine=search_engine,
-                    max_results=5
-                )
-                search_performed = True
-                
-                # Generate answer based on search results
-                answer_prompt = f"""Dựa trên kết quả tìm kiếm, hãy trả lời câu hỏi một cách chi tiết và hữu ích.
+        # Use DuckDuckGo or SerpAPI
+        search_started = time.perf_counter()
+        search_results = await run_io(
+            search_web,
+            request.message,
+            search_engine=search_engine,
+            max_results=5
+        )
+        timings["search"] = round((time.perf_counter() - search_started) * 1000, 3)
+        
+        # Generate answer based on search results
+        answer_prompt = f"""Dựa trên kết quả tìm kiếm, hãy trả lời câu hỏi một cách chi tiết và hữu ích.
 
 Câu hỏi: {request.message}
 
@@ -432,23 +453,18 @@ Hãy:
 5. Trả lời bằng tiếng Việt
 
 Trả lời:"""
-                
-                # Generate final answer for DuckDuckGo/SerpAPI
-                final_response = client.models.generate_content(
-                    model="gemini-2.5-flash",
-                    contents=answer_prompt
-                )
-                
-                return SmartChatResponse(
-                    response=final_response.text,
-                    status="success",
-                    search_performed=search_performed,
-                    search_engine=search_engine_used
-                )
-            
-        else:
-            # Answer without search
-            answer_prompt = f"""Trả lời câu hỏi sau một cách chi tiết và hữu ích:
+        
+        return {
+            "contents": answer_prompt,
+            "config": None,
+            "search_performed": True,
+            "search_engine": search_engine,
+            "decision_source": decision["source"],
+            "timings": timings
+        }
+    
+    # Answer without search
+    answer_prompt = f"""Trả lời câu hỏi sau một cách chi tiết và hữu ích:
 
 {request.message}
 
@@ -458,29 +474,151 @@ Hãy:
 3. Trả lời bằng tiếng Việt
 
 Trả lời:"""
+    
+    return {
+        "contents": answer_prompt,
+        "config": None,
+        "search_performed": False,
+        "search_engine": None,
+        "decision_source": decision["source"],
+        "timings": timings
+    }
+
+
+async def _stream_gemini(contents, config=None):
+    """Yield text chunks from the Gemini streaming API as they arrive"""
+    stream = await client.aio.models.generate_content_stream(
+        model="gemini-2.5-flash",
+        contents=contents,
+        config=config
+    )
+    async for chunk in stream:
+        if chunk.text:
+            yield chunk.text
+
+
+@app.post("/smart-chat", response_model=SmartChatResponse)
+async def smart_chat(request: SmartChatRequest):
+    """
+    Smart chat endpoint that automatically decides when to search for information
+    AI will analyze the query and determine if web search is needed
+    Supports multimodal input with images
+    """
+    try:
+        started = time.perf_counter()
+        prepared = await _prepare_smart_chat(request)
+        timings = prepared["timings"]
         
         # Generate final answer
-        final_response = client.models.generate_content(
+        generation_started = time.perf_counter()
+        final_response = await run_io(
+            client.models.generate_content,
             model="gemini-2.5-flash",
-            contents=answer_prompt
+            contents=prepared["contents"],
+            config=prepared["config"]
         )
+        timings["generation"] = round((time.perf_counter() - generation_started) * 1000, 3)
+        timings["total"] = round((time.perf_counter() - started) * 1000, 3)
         
         return SmartChatResponse(
             response=final_response.text,
             status="success",
-            search_performed=search_performed,
-            search_engine=search_engine_used
+            search_performed=prepared["search_performed"],
+            search_engine=prepared["search_engine"],
+            decision_source=prepared["decision_source"],
+            timings=timings
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/smart-chat/stream")
+async def smart_chat_stream(request: SmartChatRequest, http_request: Request):
+    """
+    Streaming variant of /smart-chat over Server-Sent Events
+    
+    Emits "token" frames with text deltas as Gemini generates them, then a
+    "metadata" frame with search_performed/search_engine, or an "error" frame
+    """
+    async def event_stream():
+        try:
+            started = time.perf_counter()
+            prepared = await _prepare_smart_chat(request)
+            timings = prepared["timings"]
+            
+            generation_started = time.perf_counter()
+            async for text in _stream_gemini(prepared["contents"], prepared["config"]):
+                if await http_request.is_disconnected():
+                    return
+                if "first_token" not in timings:
+                    timings["first_token"] = round((time.perf_counter() - started) * 1000, 3)
+                yield _sse_event({"text": text}, event="token")
+            timings["generation"] = round((time.perf_counter() - generation_started) * 1000, 3)
+            timings["total"] = round((time.perf_counter() - started) * 1000, 3)
+            
+            yield _sse_event({
+                "status": "success",
+                "search_performed": prepared["search_performed"],
+                "search_engine": prepared["search_engine"],
+                "decision_source": prepared["decision_source"],
+                "timings": timings
+            }, event="metadata")
+        except Exception as e:
+            yield _sse_event({"status": "error", "detail": str(e)}, event="error")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """
+    Streaming variant of /chat over Server-Sent Events
+    
+    General AI responses are streamed token by token. Search and math results
+    are not generated by Gemini, so they arrive as a single "token" frame.
+    The stream ends with a "metadata" frame or an "error" frame.
+    """
+    is_search = request.feature == "search"
+    
+    async def event_stream():
+        try:
+            if request.feature in ("search", "math"):
+                result = await chat(request)
+                yield _sse_event({"text": result.response}, event="token")
+            else:
+                async for text in _stream_gemini(request.message):
+                    if await http_request.is_disconnected():
+                        return
+                    yield _sse_event({"text": text}, event="token")
+            
+            yield _sse_event({
+                "status": "success",
+                "search_performed": is_search,
+                "search_engine": request.search_engine if is_search else None
+            }, event="metadata")
+        except HTTPException as e:
+            yield _sse_event({"status": "error", "detail": e.detail}, event="error")
+        except Exception as e:
+            yield _sse_event({"status": "error", "detail": str(e)}, event="error")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/search")
 async def web_search(request: SearchRequest):
     """Web search endpoint"""
     try:
-        results = search_web(
+        results = await run_io(
+            search_web,
             request.query,
             search_engine=request.search_engine,
             max_results=request.max_results
@@ -494,7 +632,7 @@ async def web_search(request: SearchRequest):
 async def math_compute(request: MathRequest):
     """Wolfram Alpha computation endpoint"""
     try:
-        result = wolfram_compute(request.query)
+        result = await run_io(wolfram_compute, request.query, request.pod_filter, request.max_pods)
         return {
             "result": result, 
             "status": "success",
@@ -507,23 +645,62 @@ async def math_compute(request: MathRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/math/stream")
+async def math_compute_stream(request: MathRequest, http_request: Request):
+    """
+    Streaming variant of /math over Server-Sent Events
+    
+    Emits a "pod" frame for each Wolfram pod as soon as it is parsed from the
+    response, then a "done" frame, or an "error" frame
+    """
+    async def event_stream():
+        pods = iterate_io(wolfram_stream_pods(request.query, request.pod_filter))
+        try:
+            count = 0
+            async for pod in pods:
+                if await http_request.is_disconnected():
+                    return
+                yield _sse_event(pod, event="pod")
+                count += 1
+                if request.max_pods and count >= request.max_pods:
+                    break
+            yield _sse_event({"status": "success", "success": count > 0, "pods": count}, event="done")
+        except Exception as e:
+            yield _sse_event({"status": "error", "detail": str(e)}, event="error")
+        finally:
+            await pods.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/upload-csv")
-async def upload_csv(file: UploadFile = File(...)):
-    """Upload CSV file for analysis"""
+async def upload_csv(file: UploadFile = File(...), session_id: str = Form("default")):
+    """Upload CSV file for analysis into the given dataset session"""
     try:
-        # Save uploaded file
-        file_path = UPLOAD_DIR / file.filename
+        dataset_registry.validate_session_id(session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        # Save uploaded file (per session, so equal filenames do not collide)
+        file_path = UPLOAD_DIR / f"{session_id}_{Path(file.filename).name}"
         with open(file_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
         
         # Load and analyze
-        summary = data_tool.load_csv(str(file_path))
+        summary = await run_io(dataset_registry.load_csv, session_id, str(file_path))
+        columns = await run_io(dataset_registry.columns, session_id)
         
         return {
             "message": "File uploaded successfully",
             "filename": file.filename,
+            "session_id": session_id,
             "summary": summary,
-            "columns": data_tool.df.columns.tolist() if data_tool.df is not None else [],
+            "columns": columns,
             "status": "success"
         }
     except Exception as e:
@@ -534,36 +711,47 @@ async def upload_csv(file: UploadFile = File(...)):
 async def analyze_data(request: DataAnalysisRequest):
     """Analyze uploaded CSV data"""
     try:
-        if data_tool.df is None:
+        session_id = request.session_id
+        if not dataset_registry.has(session_id):
             raise HTTPException(status_code=400, detail="No CSV file loaded")
         
         if request.action == "summary":
-            result = data_tool.get_summary()
+            result = await run_io(dataset_registry.call, session_id, DataAnalysisTool.get_summary)
         elif request.action == "info":
-            result = data_tool.get_info()
+            result = await run_io(dataset_registry.call, session_id, DataAnalysisTool.get_info)
         elif request.action == "analyze_column":
             if not request.column:
                 raise HTTPException(status_code=400, detail="Column name required")
-            result = data_tool.analyze_column(request.column)
+            result = await run_io(dataset_registry.call, session_id, DataAnalysisTool.analyze_column, request.column)
         elif request.action == "ai_analyze":
             if not request.prompt:
                 raise HTTPException(status_code=400, detail="Prompt required for AI analysis")
-            result = data_tool.analyze_with_ai(request.prompt)
+            result = await run_io(dataset_registry.call, session_id, DataAnalysisTool.analyze_with_ai, request.prompt)
+        elif request.action == "ai_query":
+            if not request.prompt:
+                raise HTTPException(status_code=400, detail="Prompt required for AI query")
+            result = await run_io(dataset_registry.call, session_id, DataAnalysisTool.query_with_ai, request.prompt)
         elif request.action == "create_chart":
-            import time
-            # Use timestamp to create unique filename
-            output_filename = f"chart_{request.chart_type or 'bar'}_{int(time.time())}"
-            result = data_tool.create_chart(
+            # Charts are named by content, so identical requests reuse the file
+            result = await run_io(
+                dataset_registry.call,
+                session_id,
+                DataAnalysisTool.create_chart,
                 chart_type=request.chart_type or "bar",
                 x_col=request.x_col,
                 y_col=request.y_col,
                 title=request.title,
-                output_file=output_filename
+                profile=request.chart_profile
             )
         else:
             raise HTTPException(status_code=400, detail="Invalid action")
         
         return {"result": result, "status": "success"}
+    except HTTPException:
+        raise
+    except KeyError:
+        # Dataset expired between the check and the call
+        raise HTTPException(status_code=400, detail="No CSV file loaded")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -580,15 +768,15 @@ async def get_chart(filename: str):
 @app.get("/charts")
 async def list_charts():
     """List all generated charts"""
-    charts = [f.name for f in CHARTS_DIR.glob("*.png")]
+    chart_formats = {f".{p['format']}" for p in Config.CHART_PROFILES.values()}
+    charts = [f.name for f in CHARTS_DIR.iterdir() if f.suffix in chart_formats]
     return {"charts": charts, "status": "success"}
 
 
 @app.delete("/clear-data")
-async def clear_data():
-    """Clear uploaded data"""
-    global data_tool
-    data_tool = DataAnalysisTool()
+async def clear_data(session_id: str = "default"):
+    """Clear uploaded data of a dataset session"""
+    dataset_registry.clear(session_id)
     return {"message": "Data cleared", "status": "success"}
 
 
@@ -620,7 +808,7 @@ async def text_to_speech(request: TextToSpeechRequest):
         with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as fp:
             temp_path = fp.name
         
-        tts.save(temp_path)
+        await run_io(tts.save, temp_path)
         
         # Read file content
         with open(temp_path, 'rb') as audio_file:
@@ -663,15 +851,15 @@ async def local_llm_chat(request: LocalLLMRequest):
                 raise HTTPException(status_code=400, detail="API key is required for Gemini API")
             
             llm = get_gemini_api(request.api_key, request.model_name)
-            result = llm.generate(
+            result = await llm.agenerate(
                 prompt=request.message,
                 max_length=request.max_length,
                 temperature=request.temperature
             )
         else:
-            # Use local LLM
+            # Use local LLM (batched with concurrent requests by its scheduler)
             llm = get_local_llm()
-            result = llm.generate(
+            result = await llm.agenerate(
                 prompt=request.message,
                 max_length=request.max_length,
                 temperature=request.temperature
@@ -691,6 +879,81 @@ async def local_llm_chat(request: LocalLLMRequest):
         raise HTTPException(status_code=500, detail=f"LLM error: {str(e)}")
 
 
+@app.post("/local-llm/stream")
+async def local_llm_chat_stream(request: LocalLLMRequest, http_request: Request):
+    """
+    Streaming variant of /local-llm over Server-Sent Events
+    
+    Emits "token" frames as text is generated, then a "done" frame, or an
+    "error" frame. Generation is cancelled when the client disconnects.
+    """
+    if request.use_api and not request.api_key:
+        raise HTTPException(status_code=400, detail="API key is required for Gemini API")
+    
+    async def event_stream():
+        started = time.perf_counter()
+        first_token_ms = None
+        cancel_event = threading.Event()
+        
+        if request.use_api:
+            gemini = get_async_gemini_client(request.api_key)
+            pieces = None
+            model = request.model_name
+            device = "cloud"
+        else:
+            llm = get_local_llm()
+            pieces = iterate_io(llm.generate_stream(
+                [{"role": "user", "content": request.message}],
+                max_length=request.max_length,
+                temperature=request.temperature,
+                cancel_event=cancel_event
+            ))
+            model = llm.model_name
+            device = llm.device
+        
+        try:
+            if pieces is None:
+                stream = await gemini.models.generate_content_stream(
+                    model=request.model_name,
+                    contents=request.message,
+                    config=types.GenerateContentConfig(
+                        temperature=request.temperature,
+                        max_output_tokens=request.max_length
+                    )
+                )
+                pieces = (chunk.text async for chunk in stream if chunk.text)
+            
+            async for text in pieces:
+                if await http_request.is_disconnected():
+                    cancel_event.set()
+                    return
+                if first_token_ms is None:
+                    first_token_ms = round((time.perf_counter() - started) * 1000, 3)
+                yield _sse_event({"text": text}, event="token")
+            
+            yield _sse_event({
+                "status": "success",
+                "model": model,
+                "device": device,
+                "timings": {
+                    "first_token": first_token_ms,
+                    "total": round((time.perf_counter() - started) * 1000, 3)
+                }
+            }, event="done")
+        except Exception as e:
+            yield _sse_event({"status": "error", "detail": f"LLM error: {str(e)}"}, event="error")
+        finally:
+            cancel_event.set()
+            if pieces is not None:
+                await pieces.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/create-slides")
 async def create_slides(request: CreateSlidesRequest):
     """
@@ -703,16 +966,20 @@ async def create_slides(request: CreateSlidesRequest):
                 raise HTTPException(status_code=400, detail="API key is required for Gemini API")
             
             llm = get_gemini_api(request.api_key, request.model_name)
-            result = llm.create_presentation_slides(
+            result = await run_model(
+                llm.create_presentation_slides,
                 topic=request.topic,
-                num_slides=request.num_slides
+                num_slides=request.num_slides,
+                image_preview=request.image_preview
             )
         else:
             # Use local LLM
             llm = get_local_llm()
-            result = llm.create_presentation_slides(
+            result = await run_model(
+                llm.create_presentation_slides,
                 topic=request.topic,
-                num_slides=request.num_slides
+                num_slides=request.num_slides,
+                image_preview=request.image_preview
             )
         
         if result["success"]:
@@ -789,18 +1056,19 @@ async def vision_analysis(request: VisionRequest):
             if not request.question:
                 raise HTTPException(status_code=400, detail="Question required for VQA")
             
-            result = vision_tools.visual_question_answering(
+            result = await run_model(
+                vision_tools.visual_question_answering,
                 str(image_path),
                 request.question
             )
             
         elif request.action == "ocr_easyocr":
             # OCR - EasyOCR (simple and accurate)
-            result = vision_tools.extract_text_easyocr(str(image_path))
+            result = await run_model(vision_tools.extract_text_easyocr, str(image_path))
             
         elif request.action == "ocr_paddle":
             # OCR - PaddleOCR (traditional OCR with Vietnamese support)
-            result = vision_tools.extract_text_paddleocr(str(image_path))
+            result = await run_model(vision_tools.extract_text_paddleocr, str(image_path))
             
         else:
             raise HTTPException(status_code=400, detail="Invalid action. Use 'vqa', 'ocr_easyocr', or 'ocr_paddle'")
@@ -824,11 +1092,13 @@ async def summarize_text(request: SummarizationRequest):
     """
     try:
         summarizer = get_summarization_tool()
-        result = summarizer.summarize(
+        result = await run_model(
+            summarizer.summarize,
             text=request.text,
             max_length=request.max_length,
             min_length=request.min_length,
-            do_sample=request.do_sample
+            do_sample=request.do_sample,
+            hierarchical=request.hierarchical
         )
         
         if "error" in result:
@@ -840,6 +1110,9 @@ async def summarize_text(request: SummarizationRequest):
             "summary_length": result["summary_length"],
             "compression_ratio": result["compression_ratio"],
             "truncated": result.get("truncated", False),
+            "input_tokens": result.get("input_tokens"),
+            "chunks": result.get("chunks", 1),
+            "levels": result.get("levels", 0),
             "model": result["model"],
             "status": "success"
         }
@@ -850,6 +1123,43 @@ async def summarize_text(request: SummarizationRequest):
         raise HTTPException(status_code=500, detail=f"Summarization error: {str(e)}")
 
 
+@app.post("/summarization/batch")
+async def summarize_batch(request: SummarizationBatchRequest):
+    """
+    Summarize many texts in one request
+    
+    Texts are sorted by token length into buckets and run through batched
+    generation with dynamic padding; results are returned in input order.
+    """
+    if not request.texts:
+        raise HTTPException(status_code=400, detail="texts must not be empty")
+    if len(request.texts) > Config.SUMMARIZATION_BATCH_MAX_TEXTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {Config.SUMMARIZATION_BATCH_MAX_TEXTS} texts per request"
+        )
+    
+    try:
+        summarizer = get_summarization_tool()
+        result = await run_model(
+            summarizer.summarize_batch,
+            texts=request.texts,
+            max_length=request.max_length,
+            min_length=request.min_length,
+            do_sample=request.do_sample
+        )
+        
+        return {
+            "results": result["results"],
+            "stats": result["stats"],
+            "model": result["model"],
+            "status": "success"
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Summarization error: {str(e)}")
+
+
 @app.post("/speech-to-text")
 async def speech_to_text(
     file: UploadFile = File(...),
@@ -893,7 +1203,8 @@ async def speech_to_text(
         speech_tool = get_speech_tool(openai_api_key=openai_api_key)
         print(f"🎤 Starting transcription with method: {method}")
         
-        result = speech_tool.transcribe(
+        result = await run_io(
+            speech_tool.transcribe,
             audio_file_path=temp_file_path,
             method=method,
             language=language,
@@ -966,7 +1277,8 @@ async def asr_transcribe(
         asr_tool = get_asr_tool(model_name=model_name)
         
         # Transcribe
-        result = asr_tool.transcribe_audio(
+        result = await run_model(
+            asr_tool.transcribe_audio,
             audio_path=temp_file_path,
             language=language,
             task=task
@@ -1019,7 +1331,8 @@ async def text_to_image(request: TextToImageRequest):
         img_tool = get_image_generation_tool(Config.CLIPDROP_API_KEY)
         
         # Generate image
-        result = img_tool.text_to_image(
+        result = await run_io(
+            img_tool.text_to_image,
             prompt=request.prompt,
             width=request.width,
             height=request.height
@@ -1030,7 +1343,8 @@ async def text_to_image(request: TextToImageRequest):
             return {
                 "status": "success",
                 "message": result["message"],
-                "image_url": f"/output/{Path(result['image_path']).name}"
+                "image_url": f"/output/{Path(result['image_path']).relative_to(OUTPUT_DIR).as_posix()}",
+                "cached": result.get("cached", False)
             }
         else:
             raise HTTPException(status_code=400, detail=result["message"])
@@ -1057,7 +1371,8 @@ async def text_to_video(request: TextToVideoRequest):
         video_tool = get_video_generation_tool(Config.GEMINI_API_KEY)
         
         # Generate video
-        result = video_tool.text_to_video(
+        result = await run_io(
+            video_tool.text_to_video,
             prompt=request.prompt,
             max_wait_time=request.max_wait_time
         )
@@ -1099,7 +1414,8 @@ async def image_to_video(request: ImageToVideoRequest):
         video_tool = get_video_generation_tool(Config.GEMINI_API_KEY)
         
         # Generate video
-        result = video_tool.image_to_video(
+        result = await run_io(
+            video_tool.image_to_video,
             image_path=str(image_path),
             prompt=request.prompt,
             max_wait_time=request.max_wait_time,
@@ -1145,7 +1461,8 @@ async def reference_images_to_video(request: ReferenceImagesToVideoRequest):
         video_tool = get_video_generation_tool(Config.GEMINI_API_KEY)
         
         # Generate video with reference images
-        result = video_tool.reference_images_to_video(
+        result = await run_io(
+            video_tool.reference_images_to_video,
             image_paths=image_paths,
             prompt=request.prompt,
             max_wait_time=request.max_wait_time
@@ -1182,7 +1499,8 @@ async def prompt_to_image_to_video(request: PromptToImageToVideoRequest):
         video_tool = get_video_generation_tool(Config.GEMINI_API_KEY)
         
         # Generate image then video from prompt
-        result = video_tool.prompt_to_image_to_video(
+        result = await run_io(
+            video_tool.prompt_to_image_to_video,
             prompt=request.prompt,
             max_wait_time=request.max_wait_time
         )
@@ -1207,6 +1525,157 @@ async def prompt_to_image_to_video(request: PromptToImageToVideoRequest):
         raise HTTPException(status_code=500, detail=error_msg)
 
 
+# ==================== VIDEO JOB ENDPOINTS ====================
+
+def _format_video_result(result: dict) -> dict:
+    """Convert a video tool result into the public response format"""
+    if result["status"] != "success":
+        response = {"status": "error", "message": result["message"]}
+    else:
+        response = {
+            "status": "success",
+            "message": result["message"],
+            "video_url": f"/output/{Path(result['video_path']).name}",
+            "generation_time": result.get("generation_time", 0)
+        }
+    if result.get("generated_image_path"):
+        response["generated_image_url"] = f"/output/{Path(result['generated_image_path']).name}"
+    return response
+
+
+def _submit_video_job(kind: str, start_fn, max_wait_time: int) -> dict:
+    """Submit a video job and return the accepted-job response"""
+    manager = get_video_job_manager(Config.GEMINI_API_KEY)
+    job_id = manager.submit(kind, start_fn, max_wait_time=max_wait_time)
+    return {
+        "job_id": job_id,
+        "status_url": f"/video-jobs/{job_id}",
+        "result_url": f"/video-jobs/{job_id}/result",
+        "events_url": f"/video-jobs/{job_id}/events",
+        "status": "accepted"
+    }
+
+
+@app.post("/video-jobs/text-to-video", status_code=202)
+async def submit_text_to_video_job(request: TextToVideoRequest):
+    """
+    Submit a text-to-video job and return a job id immediately
+    """
+    video_tool = get_video_generation_tool(Config.GEMINI_API_KEY)
+    return _submit_video_job(
+        "text_to_video",
+        lambda: video_tool.start_text_to_video(request.prompt),
+        request.max_wait_time
+    )
+
+
+@app.post("/video-jobs/image-to-video", status_code=202)
+async def submit_image_to_video_job(request: ImageToVideoRequest):
+    """
+    Submit an image-to-video job and return a job id immediately
+    """
+    image_path = UPLOAD_DIR / request.image_filename
+    if not image_path.exists():
+        raise HTTPException(status_code=404, detail=f"Image not found: {request.image_filename}")
+    
+    video_tool = get_video_generation_tool(Config.GEMINI_API_KEY)
+    return _submit_video_job(
+        "image_to_video",
+        lambda: video_tool.start_image_to_video(str(image_path), request.prompt),
+        request.max_wait_time
+    )
+
+
+@app.post("/video-jobs/reference-images-to-video", status_code=202)
+async def submit_reference_images_to_video_job(request: ReferenceImagesToVideoRequest):
+    """
+    Submit a reference-images-to-video job and return a job id immediately
+    """
+    image_paths = []
+    for filename in request.image_filenames:
+        image_path = UPLOAD_DIR / filename
+        if not image_path.exists():
+            raise HTTPException(status_code=404, detail=f"Image not found: {filename}")
+        image_paths.append(str(image_path))
+    
+    video_tool = get_video_generation_tool(Config.GEMINI_API_KEY)
+    return _submit_video_job(
+        "reference_images_to_video",
+        lambda: video_tool.start_reference_images_to_video(image_paths, request.prompt),
+        request.max_wait_time
+    )
+
+
+@app.post("/video-jobs/prompt-to-image-to-video", status_code=202)
+async def submit_prompt_to_image_to_video_job(request: PromptToImageToVideoRequest):
+    """
+    Submit a prompt-to-image-to-video job and return a job id immediately
+    """
+    video_tool = get_video_generation_tool(Config.GEMINI_API_KEY)
+    return _submit_video_job(
+        "prompt_to_image_to_video",
+        lambda: video_tool.start_prompt_to_image_to_video(request.prompt),
+        request.max_wait_time
+    )
+
+
+@app.get("/video-jobs/{job_id}")
+async def get_video_job_status(job_id: str):
+    """
+    Get progress of a video generation job
+    """
+    status = get_video_job_manager(Config.GEMINI_API_KEY).get_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Video job not found")
+    return status
+
+
+@app.get("/video-jobs/{job_id}/result")
+async def get_video_job_result(job_id: str):
+    """
+    Get result of a video generation job (202 while still running)
+    """
+    manager = get_video_job_manager(Config.GEMINI_API_KEY)
+    status = manager.get_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Video job not found")
+    
+    if not status["done"]:
+        return JSONResponse(status_code=202, content=status)
+    
+    return _format_video_result(manager.get_result(job_id))
+
+
+@app.get("/video-jobs/{job_id}/events")
+async def stream_video_job_events(job_id: str, request: Request):
+    """
+    Stream job progress as Server-Sent Events until the job finishes
+    """
+    manager = get_video_job_manager(Config.GEMINI_API_KEY)
+    if manager.get_status(job_id) is None:
+        raise HTTPException(status_code=404, detail="Video job not found")
+    
+    async def event_stream():
+        last_version = None
+        while not await request.is_disconnected():
+            status = manager.get_status(job_id)
+            if status is None:
+                yield _sse_event({"message": "Video job expired"}, event="error")
+                return
+            
+            if status["version"] != last_version:
+                last_version = status["version"]
+                yield _sse_event(status, event="progress")
+            
+            if status["done"]:
+                yield _sse_event(_format_video_result(manager.get_result(job_id)), event="result")
+                return
+            
+            await asyncio.sleep(1)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @app.post("/translate")
 async def translate_text(request: TranslationRequest):
     """
@@ -1370,7 +1839,8 @@ async def generate_slides_from_documents(request: SlideGenerationRequest):
         
         # Generate slides
         print(f"🎨 Generating presentation from {len(file_paths)} document(s)...")
-        result = slide_tool.generate_slides_from_documents(
+        result = await run_io(
+            slide_tool.generate_slides_from_documents,
             file_paths=file_paths,
             output_path=output_path,
             num_slides=request.num_slides,
@@ -1431,7 +1901,7 @@ async def latex_ocr_convert(request: LatexOCRRequest):
         
         if request.action == "health_check":
             # Check service health
-            health = latex_tool.health_check()
+            health = await run_io(latex_tool.health_check)
             return {
                 "status": "success",
                 "health": health
@@ -1439,12 +1909,12 @@ async def latex_ocr_convert(request: LatexOCRRequest):
         
         elif request.action == "start_service":
             # Start the pix2tex container
-            result = latex_tool.start_container()
+            result = await run_io(latex_tool.start_container)
             return result
         
         elif request.action == "stop_service":
             # Stop the pix2tex container
-            result = latex_tool.stop_container()
+            result = await run_io(latex_tool.stop_container)
             return result
         
         elif request.action == "convert":
@@ -1454,7 +1924,7 @@ async def latex_ocr_convert(request: LatexOCRRequest):
             if not image_path.exists():
                 raise HTTPException(status_code=404, detail="Image not found")
             
-            result = latex_tool.get_latex_from_image(str(image_path))
+            result = await latex_tool.aget_latex_from_image(str(image_path))
             
             if result["status"] == "success":
                 return {
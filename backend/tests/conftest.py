@@ -0,0 +1,5 @@
+"""Make backend modules (config, tools.*) importable when running pytest from the repo"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
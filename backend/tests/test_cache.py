@@ -0,0 +1,65 @@
+"""Request coalescing in TTLCache.get_or_compute"""
+import threading
+
+from tools.cache import TTLCache
+
+
+class _HookedLock:
+    """Lock that runs a hook the first time a given thread releases it"""
+
+    def __init__(self, thread_name, hook):
+        self._lock = threading.Lock()
+        self._thread_name = thread_name
+        self._hook = hook
+        self._fired = False
+
+    def __enter__(self):
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+        if not self._fired and threading.current_thread().name == self._thread_name:
+            self._fired = True
+            self._hook()
+
+
+def test_caller_arriving_as_leader_finishes_is_not_a_new_leader():
+    cache = TTLCache(max_size=8, ttl=60)
+    calls = []
+    leader_started = threading.Event()
+    leader_go = threading.Event()
+    leader_done = threading.Event()
+
+    def slow_compute():
+        calls.append("leader")
+        leader_started.set()
+        leader_go.wait(5)
+        return "value"
+
+    def lead():
+        cache.get_or_compute("k", slow_compute)
+        leader_done.set()
+
+    def let_leader_finish():
+        # Between the follower's first critical section and anything after it,
+        # the leader stores its value and unregisters
+        leader_go.set()
+        leader_done.wait(5)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    assert leader_started.wait(5)
+
+    cache._lock = _HookedLock("follower", let_leader_finish)
+    results = []
+    follower = threading.Thread(
+        target=lambda: results.append(cache.get_or_compute("k", lambda: calls.append("follower") or "again")),
+        name="follower"
+    )
+    follower.start()
+    follower.join(5)
+    leader.join(5)
+
+    assert results == ["value"]
+    assert calls == ["leader"]
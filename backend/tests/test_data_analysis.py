@@ -0,0 +1,42 @@
+"""Loaded CSV data must give the same numbers as the file"""
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("matplotlib")
+pytest.importorskip("seaborn")
+pytest.importorskip("plotly")
+
+from config import Config  # noqa: E402
+from tools.data_analysis import DataAnalysisTool  # noqa: E402
+
+
+@pytest.fixture
+def small_ints_csv(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "CSV_CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "sales.csv"
+    path.write_text("price,qty\n200,100\n150,2\n3,1\n", encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_integer_arithmetic_does_not_wrap(small_ints_csv, monkeypatch, engine):
+    if engine == "pyarrow":
+        pytest.importorskip("pyarrow")
+    monkeypatch.setattr(Config, "CSV_ENGINE", engine)
+    tool = DataAnalysisTool()
+    tool.load_csv(small_ints_csv)
+    df = tool.df
+
+    assert (df.price * df.qty).sum() == 20303
+    assert (df.price - df.qty - 200).tolist() == [-100, -52, -198]
+
+
+def test_parquet_cache_keeps_integer_values(small_ints_csv):
+    pytest.importorskip("pyarrow")
+    first = DataAnalysisTool()
+    first.load_csv(small_ints_csv)
+    cached = DataAnalysisTool()
+    cached.load_csv(small_ints_csv)
+
+    assert cached.load_info["source"] == "parquet-cache"
+    assert (cached.df.price * cached.df.qty).sum() == 20303
@@ -0,0 +1,112 @@
+"""Sandbox checks for generated pandas/SQL data queries"""
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from tools.data_query import DataQueryEngine, PandasExpressionValidator, QueryValidationError  # noqa: E402
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        "price": [200, 150, 3],
+        "qty": [100, 2, 1],
+        "city": ["HN", "HCM", "HN"],
+        "__globals__": [1, 2, 3],
+        "system": [4, 5, 6]
+    })
+
+
+@pytest.fixture
+def engine():
+    return DataQueryEngine(client=None)
+
+
+@pytest.mark.parametrize("expression", [
+    "pd.to_datetime.__globals__['__builtins__']['__import__']('os').system('echo PWNED')",
+    "pd.to_datetime.__globals__",
+    "df.__globals__",
+    "df.__class__",
+    "df.price.__class__.__mro__",
+    "df.__class__.__init__.__globals__['os'].system('echo PWNED')",
+    "df._data",
+    "pd.to_datetime.system",
+    "df.price.system",
+    "df.groupby('city').system"
+])
+def test_rejects_escape_chains(df, engine, expression):
+    with pytest.raises(QueryValidationError):
+        engine.run_pandas(df, expression)
+
+
+@pytest.mark.parametrize("expression", [
+    "df.to_string(buf='/tmp/x')",
+    "df.agg('to_csv', 0, '/tmp/x')",
+    "df.agg('eval', 0, 'c = price + 1')",
+    "df.merge(df, how='cross')",
+    "df.sample(n=10**9, replace=True)",
+    "df.agg(**{'func': 'eval'})"
+])
+def test_rejects_side_effects_and_blowups(df, expression):
+    with pytest.raises(QueryValidationError):
+        PandasExpressionValidator().validate(expression, df.columns)
+
+
+def test_column_attribute_on_df(df, engine):
+    assert engine.run_pandas(df, "df.system.sum()") == 15
+    assert engine.run_pandas(df, "df['__globals__'].sum()") == 6
+    assert engine.run_pandas(df, "df.groupby('city')['price'].agg('sum')").to_dict() == {"HCM": 150, "HN": 203}
+
+
+def test_sql_literals_do_not_trigger_keyword_checks(df, engine):
+    pytest.importorskip("duckdb")
+    result = engine.run_sql(df, "SELECT count(*) AS n FROM data WHERE city = 'update'")
+    assert int(result["n"].iloc[0]) == 0
+    with pytest.raises(QueryValidationError):
+        engine.run_sql(df, "SELECT 1; DROP TABLE data")
+
+
+@pytest.mark.parametrize("expression", [
+    "df['city'].str.contains('(a+)+$')",
+    "df['city'].str.replace('(x|xx)*y', '', regex=True)",
+    "df['city'].str.match('" + "a" * 500 + "')",
+    "df.pivot_table(index=['a', 'b', 'c'], columns=['d', 'e'], values='price')",
+    "pd.crosstab([df['a'], df['b'], df['c']], [df['d'], df['e']])"
+])
+def test_rejects_expensive_regex_and_reshapes(df, expression):
+    with pytest.raises(QueryValidationError):
+        PandasExpressionValidator().validate(expression, df.columns)
+
+
+def test_rejects_pivot_larger_than_result_cap(engine, monkeypatch):
+    from config import Config
+    monkeypatch.setattr(Config, "DATA_QUERY_MAX_RESULT_CELLS", 100)
+    wide = pd.DataFrame({"a": range(20), "b": range(20), "v": range(20)})
+    with pytest.raises(QueryValidationError):
+        engine.run_pandas(wide, "df.pivot_table(index='a', columns='b', values='v')")
+    assert engine.run_pandas(wide, "pd.crosstab(df['a'] % 2, df['b'] % 3)").shape == (2, 3)
+
+
+def test_refuses_new_queries_while_slots_are_taken():
+    import threading
+    import time
+    import tools.data_query as data_query
+
+    release = threading.Event()
+    slots = data_query.Config.DATA_QUERY_MAX_RUNNING
+    for _ in range(slots):
+        with pytest.raises(data_query.QueryTimeoutError):
+            data_query._call_with_timeout(release.wait, 0.05)
+    try:
+        with pytest.raises(data_query.QueryBusyError):
+            data_query._call_with_timeout(lambda: 1, 1)
+    finally:
+        release.set()
+    for _ in range(100):
+        try:
+            assert data_query._call_with_timeout(lambda: 1, 1) == 1
+            break
+        except data_query.QueryBusyError:
+            time.sleep(0.01)
+    else:
+        pytest.fail("query slots were not released")
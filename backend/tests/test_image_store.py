@@ -0,0 +1,41 @@
+"""Size-budget trimming in ImageStore"""
+import os
+import time
+
+from tools.image_store import ImageStore
+
+
+def _age(path, seconds):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_trim_skips_recently_used_images(tmp_path):
+    store = ImageStore(str(tmp_path), max_mb=2500 / 1024 / 1024, grace_s=60)
+    old = store.put_bytes("old", b"x" * 1000)
+    in_use = store.put_bytes("in-use", b"y" * 1000)
+    _age(old, 600)
+    _age(in_use, 600)
+    # A caller (e.g. a deck being built) just looked this one up
+    assert store.get("in-use") == in_use
+
+    new = store.put_bytes("new", b"z" * 1000)
+
+    assert not os.path.exists(old)
+    assert os.path.exists(in_use)
+    assert os.path.exists(new)
+    assert store.evictions == 1
+
+
+def test_trim_can_run_over_budget_while_images_are_in_use(tmp_path):
+    store = ImageStore(str(tmp_path), max_mb=1500 / 1024 / 1024, grace_s=60)
+    first = store.put_bytes("first", b"x" * 1000)
+    second = store.put_bytes("second", b"y" * 1000)
+
+    assert os.path.exists(first) and os.path.exists(second)
+    assert store.evictions == 0
+
+    _age(first, 600)
+    store.put_bytes("third", b"z" * 1000)
+    assert not os.path.exists(first)
+    assert os.path.exists(second)
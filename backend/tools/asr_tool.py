@@ -5,9 +5,14 @@ import whisper
 import os
 from typing import Dict, Optional
 import logging
+import torch
+from tools.model_manager import get_model_manager
 
 logger = logging.getLogger(__name__)
 
+# Approximate fp32 weight size per model family (used before the first load is measured)
+WHISPER_SIZES_MB = {"tiny": 150, "base": 300, "small": 1000, "medium": 3000, "large": 6200, "turbo": 3200}
+
 class ASRTool:
     def __init__(self, model_name: str = "large-v3"):
         """
@@ -17,19 +22,28 @@ class ASRTool:
             model_name: Whisper model name (tiny, base, small, medium, large, large-v2, large-v3, turbo)
         """
         self.model_name = model_name
-        self.model = None
+        self.resident_name = f"whisper:{model_name}"
+        get_model_manager().register(
+            self.resident_name,
+            load=self._load_whisper,
+            device="cuda" if torch.cuda.is_available() else "cpu",
+            size_mb=WHISPER_SIZES_MB.get(model_name.split("-")[0].split(".")[0], 3000)
+        )
         logger.info(f"ASR Tool initialized with model: {model_name}")
     
+    def _load_whisper(self):
+        try:
+            logger.info(f"Loading Whisper model: {self.model_name}")
+            model = whisper.load_model(self.model_name)
+            logger.info(f"Whisper model loaded successfully on {model.device}")
+            return model
+        except Exception as e:
+            logger.error(f"Error loading Whisper model: {str(e)}")
+            raise
+    
     def load_model(self):
-        """Load Whisper model"""
-        if self.model is None:
-            try:
-                logger.info(f"Loading Whisper model: {self.model_name}")
-                self.model = whisper.load_model(self.model_name)
-                logger.info(f"Whisper model loaded successfully on {self.model.device}")
-            except Exception as e:
-                logger.error(f"Error loading Whisper model: {str(e)}")
-                raise
+        """Load Whisper model (kept resident by the model manager)"""
+        return get_model_manager().load(self.resident_name)
     
     def transcribe_audio(
         self, 
@@ -49,22 +63,21 @@ class ASRTool:
             Dictionary with transcription result
         """
         try:
-            # Load model if not already loaded
-            self.load_model()
-            
             # Check if file exists
             if not os.path.exists(audio_path):
                 raise FileNotFoundError(f"Audio file not found: {audio_path}")
             
             logger.info(f"Transcribing audio file: {audio_path}")
             
-            # Transcribe using whisper
-            result = self.model.transcribe(
-                audio_path,
-                language=language,
-                task=task,
-                verbose=False
-            )
+            # Transcribe using whisper (loads the model on first use)
+            with get_model_manager().acquire(self.resident_name) as model:
+                result = model.transcribe(
+                    audio_path,
+                    language=language,
+                    task=task,
+                    verbose=False
+                )
+                device = str(model.device)
             
             logger.info("Transcription completed successfully")
             
@@ -74,7 +87,7 @@ class ASRTool:
                 "language": result.get("language", language or "auto-detected"),
                 "task": task,
                 "model": self.model_name,
-                "device": str(self.model.device)
+                "device": device
             }
             
         except Exception as e:
@@ -96,17 +109,16 @@ class ASRTool:
             Dictionary with detected language
         """
         try:
-            self.load_model()
-            
             # Load audio and pad/trim it to fit 30 seconds
             audio = whisper.load_audio(audio_path)
             audio = whisper.pad_or_trim(audio)
             
-            # Make log-Mel spectrogram
-            mel = whisper.log_mel_spectrogram(audio, n_mels=self.model.dims.n_mels).to(self.model.device)
-            
-            # Detect the spoken language
-            _, probs = self.model.detect_language(mel)
+            with get_model_manager().acquire(self.resident_name) as model:
+                # Make log-Mel spectrogram
+                mel = whisper.log_mel_spectrogram(audio, n_mels=model.dims.n_mels).to(model.device)
+                
+                # Detect the spoken language
+                _, probs = model.detect_language(mel)
             detected_lang = max(probs, key=probs.get)
             
             return {
@@ -123,13 +135,8 @@ class ASRTool:
             }
     
     def unload_model(self):
-        """Free up memory by unloading the model"""
-        if self.model is not None:
-            del self.model
-            self.model = None
-            import torch
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
+        """Free up memory by unloading the model (skipped while it is in use)"""
+        if get_model_manager().unload(self.resident_name):
             logger.info("Whisper model unloaded")
 
 
@@ -0,0 +1,174 @@
+"""In-memory TTL + LRU cache shared by tools"""
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+# Sentinel for "not in cache" so that None can be cached
+MISSING = object()
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache keys (unicode form, case, whitespace, trailing punctuation)"""
+    query = unicodedata.normalize("NFC", query or "").lower()
+    query = re.sub(r"\s+", " ", query).strip()
+    return query.rstrip("?!.。 ")
+
+
+class _InFlight:
+    """A computation in progress that concurrent callers can wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a time-to-live"""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300):
+        """
+        Initialize cache
+
+        Args:
+            max_size: Maximum number of entries before LRU eviction
+            ttl: Default time-to-live in seconds
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, _InFlight] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a cached value and mark it as recently used
+
+        Returns:
+            Cached value, or default if missing or expired
+        """
+        with self._lock:
+            return self._lookup(key, default)
+
+    def _lookup(self, key: Hashable, default: Any) -> Any:
+        """get() with the lock held"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Store a value, evicting least recently used entries when full
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Time-to-live in seconds (default: cache ttl)
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Any],
+        ttl: Union[None, float, Callable[[Any], Optional[float]]] = None
+    ) -> Any:
+        """
+        Get a cached value, or compute it once for all concurrent callers
+
+        Concurrent misses for the same key are coalesced: the first caller runs
+        `compute` while the others wait for its result (or exception). The
+        lookup and the in-flight registration happen under one lock, and the
+        leader stores the value before it unregisters, so a caller can never
+        miss a value that was just stored and compute it again.
+
+        Args:
+            key: Cache key
+            compute: Function producing the value on a miss
+            ttl: Time-to-live in seconds, or a function of the computed value
+                 returning one (0 means do not cache)
+
+        Returns:
+            Cached or freshly computed value
+        """
+        with self._lock:
+            value = self._lookup(key, MISSING)
+            if value is not MISSING:
+                return value
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _InFlight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = compute()
+            entry_ttl = ttl(value) if callable(ttl) else ttl
+            if entry_ttl is None or entry_ttl > 0:
+                self.set(key, value, entry_ttl)
+            flight.value = value
+            return value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._inflight)
+            }
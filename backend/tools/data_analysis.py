@@ -1,12 +1,343 @@
 """CSV analysis and data visualization tool"""
+import hashlib
+import importlib.util
+import json
 import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+import numpy as np
 import pandas as pd
+import matplotlib
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import seaborn as sns
 import plotly.express as px
 import plotly.graph_objects as go
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from config import Config
+from tools.data_context import DataContextBuilder
+
+# pyarrow is only used through pandas (CSV engine and Parquet cache, optional)
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+if not PYARROW_AVAILABLE:
+    print("⚠️ pyarrow not installed. CSV files will be parsed in chunks without a Parquet cache.")
+
+# Bumped when cached frames change shape (2: integers are no longer downcast)
+CSV_CACHE_FORMAT = 2
+
+# Matplotlib 3.9 renamed boxplot's labels= to tick_labels=
+BOXPLOT_LABELS_ARG = "tick_labels" if tuple(
+    int(part) for part in matplotlib.__version__.split(".")[:2]
+) >= (3, 9) else "labels"
+
+# Text the pyarrow CSV engine infers as a date or timestamp
+ISO_DATETIME_PATTERN = r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d{1,9})?)?(?:Z|[+-]\d{2}:?\d{2})?)?"
+
+
+def _sample_dtypes(sample: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Infer read dtypes from a sample of rows
+    
+    Numeric columns are read as float64/int64 (floats are narrowed after
+    reading, see _downcast_frame); low-cardinality strings are read as
+    category.
+    
+    Returns:
+        Column -> dtype mapping for pd.read_csv
+    """
+    dtypes = {}
+    for col in sample.columns:
+        series = sample[col]
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            dtypes[col] = "int64"
+        elif pd.api.types.is_float_dtype(series):
+            dtypes[col] = "float64"
+        elif pd.api.types.is_object_dtype(series):
+            non_null = series.dropna()
+            unique = non_null.nunique()
+            if len(non_null) and unique <= Config.CSV_CATEGORY_MAX_UNIQUE \
+                    and unique / len(non_null) <= Config.CSV_CATEGORY_MAX_RATIO:
+                dtypes[col] = "category"
+    return dtypes
+
+
+def _sample_date_columns(sample: pd.DataFrame) -> List[str]:
+    """Text columns of a sample whose values are all ISO-8601 dates or timestamps"""
+    columns = []
+    for col in sample.columns:
+        series = sample[col]
+        if not pd.api.types.is_object_dtype(series):
+            continue
+        non_null = series.dropna().astype(str)
+        if len(non_null) and non_null.str.fullmatch(ISO_DATETIME_PATTERN).all():
+            columns.append(col)
+    return columns
+
+
+def _parse_dates(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """
+    Convert date columns to datetime64
+    
+    The pyarrow engine already returns timestamps (and date-only values as
+    datetime.date objects) while the C engine keeps the text, so this runs
+    after either engine to give both the same dtypes.
+    """
+    for col in columns:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            try:
+                df[col] = pd.to_datetime(df[col], format="ISO8601")
+            except (ValueError, TypeError):
+                pass  # A value outside the sample is not a date; keep the column as read
+    return df
+
+
+def _downcast_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Store float columns as float32 where that is lossless
+    
+    Integer columns stay int64: numpy integer arithmetic wraps silently, so
+    narrow ints would make products, differences and sums of the loaded
+    data wrong (200 * 100 in uint8 is 32).
+    """
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_float_dtype(series):
+            as_float32 = series.astype("float32")
+            # Only when lossless, so statistics stay identical
+            if ((as_float32.astype("float64") == series) | series.isna()).all():
+                df[col] = as_float32
+    return df
+
+
+def _concat_chunks(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate chunks, keeping category columns categorical"""
+    if len(chunks) == 1:
+        return chunks[0]
+    
+    from pandas.api.types import union_categoricals
+    
+    categorical = [c for c in chunks[0].columns if isinstance(chunks[0][c].dtype, pd.CategoricalDtype)]
+    for col in categorical:
+        # Chunks see different categories; unify them so concat does not fall back to object
+        if all(isinstance(chunk[col].dtype, pd.CategoricalDtype) for chunk in chunks):
+            union = union_categoricals([chunk[col] for chunk in chunks]).categories
+            for chunk in chunks:
+                chunk[col] = chunk[col].cat.set_categories(union)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def approx_distinct(series: pd.Series, precision: int = 14) -> int:
+    """
+    HyperLogLog estimate of the number of distinct non-null values
+    
+    Values are hashed with pandas' vectorized hashing; the relative error is
+    about 1.04 / sqrt(2 ** precision) (~0.8% at the default precision).
+    
+    Args:
+        series: Column to count
+        precision: Number of hash bits used to select a register
+    """
+    hashes = pd.util.hash_pandas_object(series.dropna(), index=False).to_numpy(dtype=np.uint64)
+    if len(hashes) == 0:
+        return 0
+    
+    m = 1 << precision
+    value_bits = 64 - precision
+    registers_idx = (hashes >> np.uint64(value_bits)).astype(np.int64)
+    rest = hashes & np.uint64((1 << value_bits) - 1)
+    
+    # Rank = position of the first set bit in the remaining bits (1-based)
+    bit_length = np.zeros(len(rest), dtype=np.int64)
+    nonzero = rest > 0
+    bit_length[nonzero] = np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.int64) + 1
+    ranks = value_bits - bit_length + 1
+    
+    registers = np.zeros(m, dtype=np.int64)
+    maxima = pd.Series(ranks).groupby(registers_idx).max()
+    registers[maxima.index.to_numpy()] = maxima.to_numpy()
+    
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.power(2.0, -registers))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        # Small-range correction (linear counting)
+        estimate = m * np.log(m / zeros)
+    return int(round(estimate))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling
+    
+    Keeps the first and last points and, from each of threshold - 2 equal
+    buckets, the point forming the largest triangle with the previously kept
+    point and the mean of the next bucket, which preserves peaks and troughs.
+    
+    Args:
+        x: Sorted numeric x values
+        y: Numeric y values
+        threshold: Number of points to keep
+        
+    Returns:
+        Indices of the kept points
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0] = 0
+    kept[-1] = n - 1
+    
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def _line_points(df: pd.DataFrame, x_col: str, y_col: str, max_points: int):
+    """
+    Points for a line chart, downsampled with LTTB above max_points
+    
+    Returns:
+        (x values, y values, downsampled flag)
+    """
+    data = df[[x_col, y_col]].dropna()
+    if len(data) <= max_points or not pd.api.types.is_numeric_dtype(data[y_col]):
+        return df[x_col], df[y_col], False
+    
+    x = data[x_col]
+    if pd.api.types.is_numeric_dtype(x) or pd.api.types.is_datetime64_any_dtype(x):
+        data = data.sort_values(x_col, kind="mergesort")
+        x_numeric = data[x_col].to_numpy().astype(np.float64) if pd.api.types.is_numeric_dtype(x) \
+            else data[x_col].to_numpy().astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    else:
+        # Categorical/text x: keep row order and downsample along the position
+        x_numeric = np.arange(len(data), dtype=np.float64)
+    
+    idx = lttb_indices(x_numeric, data[y_col].to_numpy(dtype=np.float64), max_points)
+    sampled = data.iloc[idx]
+    return sampled[x_col], sampled[y_col], True
+
+
+def _bar_values(df: pd.DataFrame, x_col: str, y_col: str, max_bars: int):
+    """
+    Bar heights, aggregated when x repeats or has too many values
+    
+    Repeated x values are averaged with one groupby; above max_bars only the
+    most frequent groups are kept.
+    
+    Returns:
+        (x labels, heights, aggregation note or None)
+    """
+    x = df[x_col]
+    if len(df) <= max_bars and x.is_unique:
+        return x, df[y_col], None
+    
+    grouped = df.groupby(x_col, observed=True, sort=True)[y_col].agg(['mean', 'size'])
+    note = f"trung bình {y_col} theo {x_col}"
+    if len(grouped) > max_bars:
+        grouped = grouped.nlargest(max_bars, 'size').sort_index()
+        note += f", {max_bars} nhóm nhiều dòng nhất"
+    return grouped.index.astype(str), grouped['mean'], note
+
+
+# One reusable Agg figure per worker thread (pyplot's figure manager is not thread-safe)
+_figure_local = threading.local()
+
+
+def _get_figure(figsize=(12, 7)) -> Figure:
+    """Get this thread's chart figure, cleared and resized"""
+    fig = getattr(_figure_local, "figure", None)
+    if fig is None:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        _figure_local.figure = fig
+    else:
+        fig.clear()
+        fig.set_size_inches(*figsize)
+    return fig
+
+
+def _trim_chart_dir(keep: str):
+    """Delete least recently used charts until the directory fits Config.CHART_DIR_MAX_MB"""
+    directory = Config.CHART_OUTPUT_DIR
+    try:
+        files = [os.path.join(directory, f) for f in os.listdir(directory)]
+        files = [f for f in files if os.path.isfile(f)]
+        files.sort(key=os.path.getmtime)
+        total = sum(os.path.getsize(f) for f in files)
+        budget = Config.CHART_DIR_MAX_MB * 1024 * 1024
+        for path in files:
+            if total <= budget:
+                break
+            if path == keep:
+                continue
+            total -= os.path.getsize(path)
+            os.remove(path)
+    except OSError as e:
+        print(f"⚠️ Could not trim chart directory: {e}")
+
+
+def profile_frame(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Compute per-column statistics with vectorized whole-frame operations
+    
+    Nulls are counted for all columns at once and the numeric block is
+    described once; distinct counts are exact for small columns and
+    HyperLogLog estimates above Config.PROFILE_EXACT_DISTINCT_MAX_ROWS.
+    
+    Returns:
+        Dict with rows, dtypes, nulls, unique, unique_approx and describe
+    """
+    rows = len(df)
+    nulls = df.isna().sum()
+    
+    numeric = df.select_dtypes(include=['number'])
+    # Same default as DataFrame.describe(): numeric columns, or all if there are none
+    describe = numeric.describe() if len(numeric.columns) else df.describe()
+    
+    unique = {}
+    unique_approx = {}
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            unique[col] = int(series.cat.remove_unused_categories().cat.categories.size)
+            unique_approx[col] = False
+        elif rows > Config.PROFILE_EXACT_DISTINCT_MAX_ROWS:
+            unique[col] = approx_distinct(series)
+            unique_approx[col] = True
+        else:
+            unique[col] = int(series.nunique())
+            unique_approx[col] = False
+    
+    return {
+        "rows": rows,
+        "columns": df.columns.tolist(),
+        "dtypes": df.dtypes,
+        "nulls": nulls,
+        "unique": unique,
+        "unique_approx": unique_approx,
+        "describe": describe
+    }
 
 
 class DataAnalysisTool:
@@ -16,6 +347,13 @@ class DataAnalysisTool:
         """Initialize data analysis tool"""
         self.df = None
         self.file_path = None
+        self.cache_path = None
+        self.version = None  # Identifies the loaded data (for derived caches)
+        self.load_info = {}
+        self._profile = None
+        self._profile_version = None
+        self._profile_lock = threading.Lock()
+        self._context_builder = DataContextBuilder(token_budget=Config.AI_CONTEXT_TOKEN_BUDGET)
         
         # Create charts directory if it doesn't exist
         os.makedirs(Config.CHART_OUTPUT_DIR, exist_ok=True)
@@ -36,23 +374,124 @@ class DataAnalysisTool:
         """
         try:
             # Check file size
-            file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+            stat = os.stat(file_path)
+            file_size_mb = stat.st_size / (1024 * 1024)
             if file_size_mb > Config.MAX_CSV_SIZE_MB:
                 return f"File quá lớn ({file_size_mb:.2f} MB). Tối đa {Config.MAX_CSV_SIZE_MB} MB."
             
-            self.df = pd.read_csv(file_path)
+            started = time.perf_counter()
+            key = hashlib.sha1(
+                f"{os.path.abspath(file_path)}:{stat.st_size}:{stat.st_mtime_ns}:{CSV_CACHE_FORMAT}".encode("utf-8")
+            ).hexdigest()
+            cache_path = os.path.join(Config.CSV_CACHE_DIR, f"{key}.parquet")
+            
+            if PYARROW_AVAILABLE and os.path.exists(cache_path):
+                # Columnar copy from an earlier load: no parsing, pages mapped on demand
+                self.df = pd.read_parquet(cache_path, engine="pyarrow", memory_map=True)
+                source = "parquet-cache"
+            else:
+                self.df = self._read_csv(file_path)
+                source = "csv"
+                if PYARROW_AVAILABLE:
+                    self._write_cache(cache_path)
+            
             self.file_path = file_path
+            self.cache_path = cache_path if PYARROW_AVAILABLE and os.path.exists(cache_path) else None
+            self.version = key
+            self.load_info = {
+                "source": source,
+                "rows": len(self.df),
+                "file_mb": round(file_size_mb, 2),
+                "memory_mb": round(self.df.memory_usage(deep=True).sum() / (1024 * 1024), 2),
+                "seconds": round(time.perf_counter() - started, 3)
+            }
+            print(f"📥 Loaded {os.path.basename(file_path)} from {source}: "
+                  f"{self.load_info['rows']} rows, {self.load_info['memory_mb']} MB in {self.load_info['seconds']}s")
             
             return self.get_summary()
             
         except Exception as e:
             return f"Lỗi khi đọc file CSV: {str(e)}"
     
+    def _read_csv(self, file_path: str) -> pd.DataFrame:
+        """
+        Parse a CSV with sampled dtypes, in chunks unless the pyarrow engine is used
+        
+        Args:
+            file_path: Path to CSV file
+            
+        Returns:
+            DataFrame with category, datetime and downcast numeric columns
+        """
+        sample = pd.read_csv(file_path, nrows=Config.CSV_SAMPLE_ROWS)
+        dtypes = _sample_dtypes(sample)
+        date_columns = _sample_date_columns(sample)
+        for col in date_columns:
+            dtypes.pop(col, None)
+        
+        engine = Config.CSV_ENGINE
+        if engine == "auto":
+            engine = "pyarrow" if PYARROW_AVAILABLE else "c"
+        
+        try:
+            if engine == "pyarrow":
+                df = pd.read_csv(file_path, dtype=dtypes, engine="pyarrow")
+            else:
+                reader = pd.read_csv(file_path, dtype=dtypes, chunksize=Config.CSV_CHUNK_ROWS)
+                df = _concat_chunks([chunk for chunk in reader])
+        except (ValueError, TypeError, OverflowError):
+            # A value outside the sample did not fit the inferred dtype
+            # (e.g. text in a numeric column); let pandas infer everything
+            print("⚠️ Sampled dtypes did not fit the whole file, re-reading with inferred dtypes")
+            df = pd.read_csv(file_path, low_memory=False)
+        
+        return _downcast_frame(_parse_dates(df, date_columns))
+    
+    def _write_cache(self, cache_path: str):
+        """Store the loaded DataFrame as Parquet and trim the cache directory"""
+        os.makedirs(Config.CSV_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            self.df.to_parquet(tmp_path, engine="pyarrow", index=False)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            print(f"⚠️ Could not write Parquet cache: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        
+        # Oldest files go first once the cache grows past its budget
+        files = [os.path.join(Config.CSV_CACHE_DIR, f) for f in os.listdir(Config.CSV_CACHE_DIR)
+                 if f.endswith(".parquet")]
+        files.sort(key=os.path.getmtime)
+        total = sum(os.path.getsize(f) for f in files)
+        budget = Config.CSV_CACHE_MAX_MB * 1024 * 1024
+        for path in files:
+            if total <= budget or path == cache_path:
+                break
+            total -= os.path.getsize(path)
+            os.remove(path)
+    
+    def get_profile(self) -> Dict[str, Any]:
+        """
+        Get the column profile of the loaded data (see profile_frame)
+        
+        Computed once per dataset version and shared by summary, info and
+        AI analysis.
+        """
+        with self._profile_lock:
+            if self._profile is None or self._profile_version != self.version:
+                self._profile = profile_frame(self.df)
+                self._profile_version = self.version
+            return self._profile
+    
     def get_summary(self) -> str:
         """Get summary statistics of the loaded data"""
         if self.df is None:
             return "Chưa có dữ liệu nào được tải."
         
+        profile = self.get_profile()
+        
         summary = f"📊 Thông tin Dataset:\n"
         summary += f"- Số dòng: {len(self.df)}\n"
         summary += f"- Số cột: {len(self.df.columns)}\n"
@@ -70,10 +509,10 @@ class DataAnalysisTool:
         summary += "📉 Thống kê mô tả:\n"
         try:
             from tabulate import tabulate
-            desc_df = self.df.describe()
+            desc_df = profile["describe"]
             summary += tabulate(desc_df, headers='keys', tablefmt='grid', showindex=True)
         except ImportError:
-            summary += self.df.describe().to_string()
+            summary += profile["describe"].to_string()
         
         return summary
     
@@ -84,20 +523,27 @@ class DataAnalysisTool:
         
         info = "📋 Thông tin chi tiết các cột:\n\n"
         
+        profile = self.get_profile()
+        describe = profile["describe"]
+        
+        def fmt(value) -> str:
+            return f"{value:.2f}" if pd.notna(value) else 'N/A'
+        
         # Create a summary dataframe for better display
         info_data = []
-        for col in self.df.columns:
+        for col in profile["columns"]:
+            unique = profile["unique"][col]
             col_info = {
                 'Cột': col,
-                'Kiểu dữ liệu': str(self.df[col].dtype),
-                'Null': self.df[col].isnull().sum(),
-                'Unique': self.df[col].nunique()
+                'Kiểu dữ liệu': str(profile["dtypes"][col]),
+                'Null': int(profile["nulls"][col]),
+                'Unique': f"~{unique}" if profile["unique_approx"][col] else unique
             }
             
-            if pd.api.types.is_numeric_dtype(self.df[col]):
-                col_info['Min'] = f"{self.df[col].min():.2f}" if pd.notna(self.df[col].min()) else 'N/A'
-                col_info['Max'] = f"{self.df[col].max():.2f}" if pd.notna(self.df[col].max()) else 'N/A'
-                col_info['Mean'] = f"{self.df[col].mean():.2f}" if pd.notna(self.df[col].mean()) else 'N/A'
+            if pd.api.types.is_numeric_dtype(profile["dtypes"][col]) and col in describe.columns:
+                col_info['Min'] = fmt(describe.at['min', col])
+                col_info['Max'] = fmt(describe.at['max', col])
+                col_info['Mean'] = fmt(describe.at['mean', col])
             else:
                 col_info['Min'] = '-'
                 col_info['Max'] = '-'
@@ -117,16 +563,21 @@ class DataAnalysisTool:
         return info
     
     def create_chart(self, chart_type: str, x_col: str = None, y_col: str = None, 
-                    title: str = None, output_file: str = None) -> str:
+                    title: str = None, output_file: str = None, profile: str = None) -> str:
         """
         Create various types of charts
         
+        Charts are content-addressed by (dataset version, chart parameters,
+        profile), so an identical request returns the existing file without
+        rendering.
+        
         Args:
             chart_type: Type of chart (bar, line, scatter, histogram, pie, box, heatmap)
             x_col: Column for x-axis
             y_col: Column for y-axis
             title: Chart title
-            output_file: Output filename (without extension)
+            output_file: Output filename (without extension); bypasses the cache
+            profile: Output profile from Config.CHART_PROFILES (default: CHART_DEFAULT_PROFILE)
             
         Returns:
             Path to saved chart or error message
@@ -134,42 +585,82 @@ class DataAnalysisTool:
         if self.df is None:
             return "Chưa có dữ liệu nào được tải."
         
+        profile = profile or Config.CHART_DEFAULT_PROFILE
+        if profile not in Config.CHART_PROFILES:
+            return f"Profile '{profile}' không hợp lệ. Chọn một trong: {', '.join(Config.CHART_PROFILES)}."
+        chart_format = Config.CHART_PROFILES[profile]["format"]
+        dpi = Config.CHART_PROFILES[profile]["dpi"]
+        
         try:
-            if output_file is None:
+            cacheable = output_file is None and self.version is not None
+            if cacheable:
+                key = hashlib.sha1(json.dumps(
+                    [self.version, chart_type, x_col, y_col, title, profile],
+                    ensure_ascii=False
+                ).encode("utf-8")).hexdigest()[:20]
+                output_file = f"chart_{chart_type}_{key}"
+            elif output_file is None:
                 output_file = f"chart_{chart_type}"
             
-            output_path = os.path.join(Config.CHART_OUTPUT_DIR, f"{output_file}.png")
+            output_path = os.path.join(Config.CHART_OUTPUT_DIR, f"{output_file}.{chart_format}")
+            
+            if cacheable and os.path.exists(output_path):
+                # Mark as recently used for the directory's LRU trimming
+                os.utime(output_path)
+                return f"✅ Đã tạo biểu đồ: {output_path}"
             
-            fig, ax = plt.subplots(figsize=(12, 7))
+            fig = _get_figure()
+            ax = fig.add_subplot()
+            
+            # Extra line appended to the default title when data was reduced
+            note = None
             
             if chart_type == "bar":
                 if x_col and y_col:
-                    ax.bar(self.df[x_col], self.df[y_col])
+                    bar_x, bar_y, note = _bar_values(self.df, x_col, y_col, Config.CHART_MAX_BARS)
+                    ax.bar(bar_x, bar_y)
                     ax.set_xlabel(x_col)
                     ax.set_ylabel(y_col)
-                    plt.xticks(rotation=45, ha='right')
+                    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
                 else:
-                    plt.close(fig)
                     return "Cần chỉ định x_col và y_col cho biểu đồ cột."
             
             elif chart_type == "line":
                 if x_col and y_col:
-                    ax.plot(self.df[x_col], self.df[y_col], marker='o')
+                    line_x, line_y, downsampled = _line_points(self.df, x_col, y_col, Config.CHART_MAX_LINE_POINTS)
+                    if downsampled:
+                        # Markers would hide the shape at this density
+                        ax.plot(line_x, line_y, linewidth=1)
+                        note = f"LTTB {len(line_x):,}/{len(self.df):,} điểm"
+                    else:
+                        ax.plot(line_x, line_y, marker='o')
                     ax.set_xlabel(x_col)
                     ax.set_ylabel(y_col)
                     ax.grid(True, alpha=0.3)
                 else:
-                    plt.close(fig)
                     return "Cần chỉ định x_col và y_col cho biểu đồ đường."
             
             elif chart_type == "scatter":
                 if x_col and y_col:
-                    ax.scatter(self.df[x_col], self.df[y_col], alpha=0.5)
+                    numeric = pd.api.types.is_numeric_dtype(self.df[x_col]) and \
+                        pd.api.types.is_numeric_dtype(self.df[y_col])
+                    if len(self.df) > Config.CHART_SCATTER_BIN_ROWS and numeric:
+                        # Density bins instead of millions of overlapping markers
+                        data = self.df[[x_col, y_col]].dropna()
+                        hb = ax.hexbin(data[x_col], data[y_col], gridsize=Config.CHART_HEXBIN_GRIDSIZE,
+                                       mincnt=1, bins='log', cmap='viridis')
+                        fig.colorbar(hb, ax=ax, label="Số điểm (log)")
+                        note = f"hexbin {len(data):,} điểm"
+                    elif len(self.df) > Config.CHART_SCATTER_BIN_ROWS:
+                        sample = self.df.sample(Config.CHART_SCATTER_BIN_ROWS, random_state=0)
+                        ax.scatter(sample[x_col], sample[y_col], alpha=0.5)
+                        note = f"mẫu {len(sample):,}/{len(self.df):,} điểm"
+                    else:
+                        ax.scatter(self.df[x_col], self.df[y_col], alpha=0.5)
                     ax.set_xlabel(x_col)
                     ax.set_ylabel(y_col)
                     ax.grid(True, alpha=0.3)
                 else:
-                    plt.close(fig)
                     return "Cần chỉ định x_col và y_col cho biểu đồ phân tán."
             
             elif chart_type == "histogram":
@@ -179,7 +670,6 @@ class DataAnalysisTool:
                     ax.set_ylabel("Tần suất")
                     ax.grid(True, alpha=0.3, axis='y')
                 else:
-                    plt.close(fig)
                     return "Cần chỉ định x_col cho histogram."
             
             elif chart_type == "pie":
@@ -188,24 +678,26 @@ class DataAnalysisTool:
                     ax.pie(value_counts, labels=value_counts.index, autopct='%1.1f%%')
                     ax.set_ylabel("")
                 else:
-                    plt.close(fig)
                     return "Cần chỉ định x_col cho biểu đồ tròn."
             
             elif chart_type == "box":
                 if y_col:
                     if x_col:
-                        # Group by x_col and create box plot
-                        data_to_plot = [self.df[self.df[x_col] == cat][y_col].dropna() for cat in self.df[x_col].unique()]
-                        ax.boxplot(data_to_plot, labels=self.df[x_col].unique())
+                        # One groupby pass instead of a boolean mask per category
+                        groups = self.df.groupby(x_col, observed=True, sort=False, dropna=True)[y_col]
+                        labels, data_to_plot = [], []
+                        for cat, values in groups:
+                            labels.append(cat)
+                            data_to_plot.append(values.dropna().to_numpy())
+                        ax.boxplot(data_to_plot, **{BOXPLOT_LABELS_ARG: labels})
                         ax.set_xlabel(x_col)
                         ax.set_ylabel(y_col)
-                        plt.xticks(rotation=45, ha='right')
+                        plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
                     else:
                         ax.boxplot(self.df[y_col].dropna())
                         ax.set_ylabel(y_col)
                     ax.grid(True, alpha=0.3, axis='y')
                 else:
-                    plt.close(fig)
                     return "Cần chỉ định y_col cho box plot."
             
             elif chart_type == "heatmap":
@@ -214,20 +706,23 @@ class DataAnalysisTool:
                     correlation = self.df[numeric_cols].corr()
                     sns.heatmap(correlation, annot=True, cmap='coolwarm', center=0, ax=ax)
                 else:
-                    plt.close(fig)
                     return "Không có cột số để tạo heatmap."
             
             else:
                 return f"Loại biểu đồ '{chart_type}' không được hỗ trợ."
             
             if title:
-                plt.title(title)
+                ax.set_title(title)
+            elif note:
+                ax.set_title(f"Biểu đồ {chart_type.upper()}\n({note})")
             else:
-                plt.title(f"Biểu đồ {chart_type.upper()}")
+                ax.set_title(f"Biểu đồ {chart_type.upper()}")
             
-            plt.tight_layout()
-            plt.savefig(output_path, dpi=300, bbox_inches='tight')
-            plt.close()
+            fig.tight_layout()
+            tmp_path = f"{output_path}.{threading.get_ident()}.tmp"
+            fig.savefig(tmp_path, format=chart_format, dpi=dpi, bbox_inches='tight')
+            os.replace(tmp_path, output_path)
+            _trim_chart_dir(keep=output_path)
             
             return f"✅ Đã tạo biểu đồ: {output_path}"
             
@@ -240,20 +735,8 @@ class DataAnalysisTool:
             return "Chưa có dữ liệu nào được tải."
         
         try:
-            # Get data summary for AI context
-            data_context = f"""Dataset Information:
-- Rows: {len(self.df)}
-- Columns: {', '.join(self.df.columns.tolist())}
-
-First 10 rows:
-{self.df.head(10).to_string()}
-
-Statistical Summary:
-{self.df.describe().to_string()}
-
-Data Types:
-{self.df.dtypes.to_string()}
-"""
+            # Compact, question-focused data summary for AI context
+            data_context = self._context_builder.build(self.df, self.get_profile(), self.version, prompt)
             
             # Create prompt for Gemini
             full_prompt = f"""Bạn là một data analyst chuyên nghiệp. Hãy phân tích dữ liệu sau và trả lời câu hỏi của người dùng.
@@ -264,10 +747,9 @@ Câu hỏi của người dùng: {prompt}
 
 Hãy trả lời bằng tiếng Việt, chi tiết và dễ hiểu. Nếu cần thống kê hoặc tính toán, hãy đưa ra con số cụ thể."""
             
-            from google import genai
-            from config import Config
+            from tools.gemini_client import get_gemini_client
             
-            client = genai.Client(api_key=Config.GEMINI_API_KEY)
+            client = get_gemini_client(Config.GEMINI_API_KEY)
             response = client.models.generate_content(
                 model="gemini-2.5-flash",
                 contents=full_prompt
@@ -278,6 +760,23 @@ Hãy trả lời bằng tiếng Việt, chi tiết và dễ hiểu. Nếu cần
         except Exception as e:
             return f"Lỗi khi phân tích với AI: {str(e)}"
     
+    def query_with_ai(self, prompt: str) -> str:
+        """Answer a data question by running a generated query on the full dataset"""
+        if self.df is None:
+            return "Chưa có dữ liệu nào được tải."
+        
+        try:
+            from tools.data_query import get_data_query_engine
+            
+            result = get_data_query_engine().answer(self.df, prompt)
+            if not result["success"]:
+                return result["answer"]
+            
+            return f"{result['answer']}\n\n🔎 Truy vấn ({result['engine']}):\n{result['query']}"
+            
+        except Exception as e:
+            return f"Lỗi khi truy vấn dữ liệu với AI: {str(e)}"
+    
     def analyze_column(self, column_name: str) -> str:
         """Analyze a specific column"""
         if self.df is None:
@@ -308,6 +807,302 @@ Hãy trả lời bằng tiếng Việt, chi tiết và dễ hiểu. Nếu cần
         return analysis
 
 
+class _DatasetEntry:
+    """A session's dataset: the tool, its memory footprint and spill state"""
+    
+    def __init__(self, tool: DataAnalysisTool):
+        self.tool = tool
+        self.nbytes = _frame_nbytes(tool.df)
+        self.spill_path = None
+        self.pins = 0
+        self.lock = threading.Lock()
+        self.last_access = time.time()
+    
+    @property
+    def in_memory(self) -> bool:
+        return self.tool.df is not None
+
+
+def _frame_nbytes(df: Optional[pd.DataFrame]) -> int:
+    """Memory used by a DataFrame including object columns"""
+    if df is None:
+        return 0
+    return int(df.memory_usage(deep=True).sum())
+
+
+class DatasetRegistry:
+    """
+    Session-scoped registry of loaded datasets
+    
+    Every session (or upload id) gets its own DataAnalysisTool, so concurrent
+    analysts never share a DataFrame. DataFrames are kept in memory up to a
+    byte budget; beyond that, the least recently used ones are spilled to
+    Parquet (pickle if pyarrow is unavailable) and reloaded transparently on
+    the next access. Datasets in use by a request are never spilled.
+    """
+    
+    SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+    
+    def __init__(self, memory_budget_mb: float, spill_dir: str, idle_ttl: float):
+        """
+        Initialize registry
+        
+        Args:
+            memory_budget_mb: Total in-memory DataFrame size across sessions
+            spill_dir: Directory for spilled datasets
+            idle_ttl: Seconds after which an unused session is dropped entirely
+        """
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.spill_dir = spill_dir
+        self.idle_ttl = idle_ttl
+        self._entries: "OrderedDict[str, _DatasetEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.spills = 0
+        self.reloads = 0
+        self.expired = 0
+        os.makedirs(spill_dir, exist_ok=True)
+    
+    def validate_session_id(self, session_id: str) -> str:
+        """Check that a session id is safe to use in file names"""
+        if not session_id or not self.SESSION_ID_PATTERN.match(session_id):
+            raise ValueError("session_id chỉ được chứa chữ, số, '_' hoặc '-' (tối đa 64 ký tự).")
+        return session_id
+    
+    # ---------- Spill / reload ----------
+    
+    def _write_spill(self, session_id: str, entry: _DatasetEntry) -> str:
+        """
+        Write a registry-owned copy of a dataset
+        
+        The ingestion cache is hardlinked (or copied) rather than referenced,
+        since cache trimming may delete it while the session is spilled.
+        
+        Returns:
+            Path of the spill file
+        """
+        base = os.path.join(self.spill_dir, f"{session_id}-{uuid.uuid4().hex[:8]}")
+        cache_path = entry.tool.cache_path
+        if cache_path:
+            path = f"{base}.parquet"
+            try:
+                os.link(cache_path, path)
+                return path
+            except OSError:
+                try:
+                    shutil.copyfile(cache_path, path)
+                    return path
+                except OSError:
+                    pass  # Trimmed from the cache meanwhile
+        try:
+            path = f"{base}.parquet"
+            entry.tool.df.to_parquet(path)
+        except Exception:
+            # pyarrow/fastparquet missing or unsupported column types
+            if os.path.exists(path):
+                os.remove(path)
+            path = f"{base}.pkl"
+            entry.tool.df.to_pickle(path)
+        return path
+    
+    def _spill(self, session_id: str, entry: _DatasetEntry):
+        """
+        Write a dataset to disk and drop it from memory (registry lock not held)
+        
+        The file is written under the entry's lock only, so other sessions
+        are not blocked; the dataset stays in memory if it was pinned or
+        removed from the registry meanwhile.
+        """
+        with entry.lock:
+            if not entry.in_memory:
+                return
+            if entry.spill_path is None:
+                try:
+                    path = self._write_spill(session_id, entry)
+                except Exception as e:
+                    print(f"⚠️ Could not spill dataset '{session_id}': {e}")
+                    return
+            else:
+                path = None  # Unchanged since it was last spilled
+            
+            with self._lock:
+                registered = self._entries.get(session_id) is entry
+                if path is not None:
+                    if not registered:
+                        os.remove(path)
+                        return
+                    entry.spill_path = path
+                if not registered or entry.pins:
+                    return
+                entry.tool.df = None
+                self.spills += 1
+        print(f"💾 Spilled dataset '{session_id}' ({entry.nbytes / 1024 / 1024:.1f} MB) to disk")
+    
+    def _reload(self, entry: _DatasetEntry):
+        """Load a spilled dataset back into memory"""
+        if entry.spill_path.endswith(".parquet"):
+            entry.tool.df = pd.read_parquet(entry.spill_path, memory_map=True)
+        else:
+            entry.tool.df = pd.read_pickle(entry.spill_path)
+        self.reloads += 1
+    
+    def _remove_spill(self, entry: _DatasetEntry):
+        if entry.spill_path and os.path.exists(entry.spill_path):
+            try:
+                os.remove(entry.spill_path)
+            except OSError:
+                pass
+        entry.spill_path = None
+    
+    def _resident_bytes(self) -> int:
+        return sum(e.nbytes for e in self._entries.values() if e.in_memory)
+    
+    def _enforce_budget(self) -> List[Tuple[str, _DatasetEntry]]:
+        """
+        Drop idle sessions and pick LRU datasets to spill until under budget (lock held)
+        
+        Returns:
+            (session_id, entry) pairs to pass to _spill once the lock is released
+        """
+        now = time.time()
+        for session_id, entry in list(self._entries.items()):
+            if entry.pins == 0 and now - entry.last_access > self.idle_ttl:
+                self._remove_spill(entry)
+                del self._entries[session_id]
+                self.expired += 1
+        
+        resident = self._resident_bytes()
+        victims = []
+        for session_id, entry in self._entries.items():
+            if resident <= self.memory_budget:
+                break
+            if entry.in_memory and entry.pins == 0:
+                victims.append((session_id, entry))
+                resident -= entry.nbytes
+        return victims
+    
+    # ---------- Public API ----------
+    
+    def load_csv(self, session_id: str, file_path: str) -> str:
+        """
+        Load a CSV into a fresh tool for the session (replacing its dataset)
+        
+        Args:
+            session_id: Session or upload id
+            file_path: Path to CSV file
+            
+        Returns:
+            Summary of loaded data (or error message)
+        """
+        self.validate_session_id(session_id)
+        tool = DataAnalysisTool()
+        summary = tool.load_csv(file_path)
+        if tool.df is None:
+            return summary
+        
+        with self._lock:
+            old = self._entries.pop(session_id, None)
+            if old is not None:
+                self._remove_spill(old)
+            self._entries[session_id] = _DatasetEntry(tool)
+            victims = self._enforce_budget()
+        for victim in victims:
+            self._spill(*victim)
+        return summary
+    
+    @contextmanager
+    def use(self, session_id: str):
+        """
+        Pin a session's dataset in memory for the duration of a request
+        
+        Yields:
+            The session's DataAnalysisTool, or None if nothing is loaded
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                entry.pins += 1
+                entry.last_access = time.time()
+                self._entries.move_to_end(session_id)
+        
+        if entry is None:
+            yield None
+            return
+        
+        try:
+            # Pinned entries are never spilled, so reloading needs only the entry lock
+            with entry.lock:
+                if not entry.in_memory:
+                    self._reload(entry)
+            with self._lock:
+                victims = self._enforce_budget()
+            for victim in victims:
+                self._spill(*victim)
+            yield entry.tool
+        finally:
+            with self._lock:
+                entry.pins -= 1
+    
+    def call(self, session_id: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run func(tool, *args, **kwargs) with the session's dataset pinned
+        
+        Raises:
+            KeyError: No dataset loaded for the session
+        """
+        with self.use(session_id) as tool:
+            if tool is None:
+                raise KeyError(session_id)
+            return func(tool, *args, **kwargs)
+    
+    def columns(self, session_id: str) -> List[str]:
+        """Column names of a session's dataset (empty if none)"""
+        with self.use(session_id) as tool:
+            return tool.df.columns.tolist() if tool is not None else []
+    
+    def has(self, session_id: str) -> bool:
+        """Whether a dataset is loaded for the session"""
+        with self._lock:
+            return session_id in self._entries
+    
+    def clear(self, session_id: str) -> bool:
+        """Drop a session's dataset; returns False if there was none"""
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+            if entry is None:
+                return False
+            self._remove_spill(entry)
+            return True
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get registry metrics"""
+        with self._lock:
+            return {
+                "sessions": len(self._entries),
+                "in_memory": sum(1 for e in self._entries.values() if e.in_memory),
+                "resident_mb": round(self._resident_bytes() / 1024 / 1024, 2),
+                "budget_mb": round(self.memory_budget / 1024 / 1024, 2),
+                "spills": self.spills,
+                "reloads": self.reloads,
+                "expired": self.expired
+            }
+
+
+# Global instance (created on first use)
+_dataset_registry = None
+
+
+def get_dataset_registry() -> DatasetRegistry:
+    """Get or create the dataset registry configured from Config"""
+    global _dataset_registry
+    if _dataset_registry is None:
+        _dataset_registry = DatasetRegistry(
+            memory_budget_mb=Config.DATASET_MEMORY_BUDGET_MB,
+            spill_dir=Config.DATASET_SPILL_DIR,
+            idle_ttl=Config.DATASET_IDLE_TTL
+        )
+    return _dataset_registry
+
+
 def analyze_csv(file_path: str) -> str:
     """
     Convenience function to load and analyze CSV
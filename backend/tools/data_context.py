@@ -0,0 +1,162 @@
+"""Token-budgeted dataset context for AI data analysis prompts"""
+import re
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+def _fold(text: str) -> str:
+    """Lowercase and strip diacritics, so 'Doanh thu' matches 'doanh_thu'"""
+    text = unicodedata.normalize("NFD", str(text).lower())
+    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
+    return text.replace("đ", "d")
+
+
+def _words(text: str) -> set:
+    return {w for w in re.split(r"[^0-9a-z]+", _fold(text)) if len(w) > 1}
+
+
+def _fmt(value: Any) -> str:
+    """Compact number formatting"""
+    if isinstance(value, float):
+        if pd.isna(value):
+            return "NaN"
+        return f"{value:.4g}"
+    return str(value)
+
+
+class DataContextBuilder:
+    """
+    Builds the dataset description sent with an AI analysis question
+
+    Columns are ranked by relevance to the question (name and category
+    matches first, then table order) and described with one compact line
+    each until the token budget is spent; a few sample rows of the chosen
+    columns follow if room remains. Column lines are computed once per
+    dataset version and reused for every question.
+    """
+
+    SAMPLE_ROWS = 5
+    MAX_SAMPLE_COLUMNS = 8
+    TOP_VALUES = 3
+
+    def __init__(self, token_budget: int = 1500):
+        """
+        Args:
+            token_budget: Approximate token limit for the whole context
+        """
+        self.token_budget = token_budget
+        self._version = None
+        self._column_lines: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _column_line(self, df: pd.DataFrame, profile: Dict[str, Any], col: str) -> str:
+        """One-line statistics for a column"""
+        dtype = profile["dtypes"][col]
+        unique = profile["unique"][col]
+        parts = [
+            f"{col} ({dtype})",
+            f"null={int(profile['nulls'][col])}",
+            f"unique={'~' if profile['unique_approx'][col] else ''}{unique}"
+        ]
+
+        describe = profile["describe"]
+        if pd.api.types.is_numeric_dtype(dtype) and col in describe.columns:
+            stats = describe[col]
+            parts.append(
+                f"min={_fmt(stats['min'])} mean={_fmt(stats['mean'])} "
+                f"max={_fmt(stats['max'])} std={_fmt(stats['std'])}"
+            )
+        else:
+            top = df[col].value_counts().head(self.TOP_VALUES)
+            if len(top):
+                parts.append("top=" + ", ".join(f"{str(v)[:30]}({n})" for v, n in top.items()))
+        return "- " + "; ".join(parts)
+
+    def _rank_columns(self, df: pd.DataFrame, columns: List[str], question: str) -> List[str]:
+        """Order columns by relevance to the question, keeping table order for ties"""
+        question_words = _words(question)
+        folded_question = _fold(question)
+
+        def score(col: str) -> float:
+            col_words = _words(col)
+            value = 3.0 * len(col_words & question_words)
+            if _fold(col) in folded_question:
+                value += 5.0
+            series = df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # Question mentions one of the column's values (e.g. a region name)
+                if any(_fold(c) in folded_question for c in series.cat.categories[:1000] if len(str(c)) > 2):
+                    value += 2.0
+            return value
+
+        scores = {col: score(col) for col in columns}
+        return sorted(columns, key=lambda c: -scores[c])
+
+    def build(
+        self,
+        df: pd.DataFrame,
+        profile: Dict[str, Any],
+        version: Optional[str],
+        question: str
+    ) -> str:
+        """
+        Build the context for one question
+
+        Args:
+            df: Loaded DataFrame
+            profile: Column profile (see data_analysis.profile_frame)
+            version: Dataset version (column lines are cached per version)
+            question: User question
+
+        Returns:
+            Context text within the token budget
+        """
+        columns = profile["columns"]
+        header = f"Dataset Information:\n- Rows: {profile['rows']}\n- Columns ({len(columns)}): "
+        names = ", ".join(columns)
+        if estimate_tokens(names) > self.token_budget // 4:
+            names = names[: self.token_budget].rsplit(", ", 1)[0] + ", ..."
+        context = header + names + "\n\nColumn statistics:\n"
+        used = estimate_tokens(context)
+
+        with self._lock:
+            if version is None or version != self._version:
+                self._column_lines = {}
+                self._version = version
+
+        selected = []
+        for col in self._rank_columns(df, columns, question):
+            with self._lock:
+                line = self._column_lines.get(col) if version == self._version else None
+            if line is None:
+                line = self._column_line(df, profile, col)
+                if version is not None:
+                    with self._lock:
+                        # Another dataset may have reset the memo meanwhile
+                        if version == self._version:
+                            self._column_lines[col] = line
+            cost = estimate_tokens(line) + 1
+            if used + cost > self.token_budget:
+                continue  # A shorter line further down may still fit
+            context += line + "\n"
+            used += cost
+            selected.append(col)
+
+        omitted = len(columns) - len(selected)
+        if omitted:
+            context += f"- ... {omitted} cột khác được lược bỏ\n"
+
+        if selected:
+            sample = df[selected[: self.MAX_SAMPLE_COLUMNS]].head(self.SAMPLE_ROWS).to_csv(index=False)
+            if used + estimate_tokens(sample) + 10 <= self.token_budget:
+                context += f"\nFirst {self.SAMPLE_ROWS} rows (CSV):\n{sample}"
+
+        return context
@@ -0,0 +1,565 @@
+"""Answer data questions by executing restricted pandas/SQL queries generated by Gemini"""
+import ast
+import json
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from config import Config
+
+# Import DuckDB for in-process SQL (optional)
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+    print("⚠️ duckdb not installed. AI data queries will use pandas expressions only.")
+
+
+class QueryValidationError(ValueError):
+    """Generated query uses something outside the allowed subset"""
+
+
+class QueryTimeoutError(QueryValidationError):
+    """Generated query ran longer than Config.DATA_QUERY_TIMEOUT"""
+
+
+class QueryBusyError(QueryValidationError):
+    """All query slots are taken (by running or timed-out queries)"""
+
+
+# Held by every evaluating query thread until it finishes, including abandoned ones
+_query_slots = threading.BoundedSemaphore(Config.DATA_QUERY_MAX_RUNNING)
+
+
+def _call_with_timeout(func: Callable[[], Any], timeout: float) -> Any:
+    """
+    Run func in a daemon thread and wait at most `timeout` seconds
+
+    pandas cannot be interrupted, so an overrunning query keeps its thread
+    (and its slot) until it finishes; the caller gets QueryTimeoutError
+    right away. New queries are refused while every slot is taken, so slow
+    queries cannot pile up threads and CPU.
+
+    Raises:
+        QueryBusyError: Config.DATA_QUERY_MAX_RUNNING queries are still running
+        QueryTimeoutError: func ran longer than timeout
+    """
+    if not _query_slots.acquire(blocking=False):
+        raise QueryBusyError("too many data queries are still running; try again later")
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = func()
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            _query_slots.release()
+
+    thread = threading.Thread(target=target, name="data-query", daemon=True)
+    try:
+        thread.start()
+    except BaseException:
+        _query_slots.release()
+        raise
+    thread.join(timeout)
+    if thread.is_alive():
+        raise QueryTimeoutError(f"query ran longer than {timeout:g}s")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+class PandasExpressionValidator:
+    """
+    Whitelist check for a single pandas expression over `df`
+
+    Only expressions are accepted (no statements, lambdas or comprehensions),
+    the only names are df, pd and np, pd/np are limited to a set of pure
+    functions, private/dunder attributes are rejected and every other
+    attribute must be a read-only DataFrame, Series, GroupBy or accessor
+    member from ALLOWED_ATTRS (or a column of df itself, as in df.price).
+    Functions named by string (agg/apply/transform, aggfunc=) must be simple
+    aggregations, file-path arguments and **kwargs are rejected, as are
+    operations that can blow up memory or CPU from a tiny expression
+    (sequence/string repetition, huge constant powers, joins, sampling,
+    long or backtracking-prone regexes, reshapes over many keys).
+    """
+
+    ALLOWED_NODES = (
+        ast.Expression, ast.Call, ast.Attribute, ast.Name, ast.Load, ast.Constant,
+        ast.Subscript, ast.Slice, ast.Tuple, ast.List, ast.Dict, ast.keyword,
+        ast.Compare, ast.BoolOp, ast.BinOp, ast.UnaryOp,
+        ast.And, ast.Or, ast.Not, ast.Invert, ast.USub, ast.UAdd,
+        ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+        ast.BitAnd, ast.BitOr, ast.BitXor,
+        ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn, ast.Is, ast.IsNot
+    )
+
+    ALLOWED_NAMES = {"df", "pd", "np"}
+
+    ALLOWED_MODULE_ATTRS = {
+        "pd": {"to_datetime", "to_numeric", "cut", "qcut", "Grouper", "NamedAgg", "Timestamp",
+               "Timedelta", "crosstab", "pivot_table", "concat", "isna", "notna", "DateOffset"},
+        "np": {"where", "nan", "log", "log10", "exp", "abs", "round", "sqrt", "mean", "median",
+               "sum", "std", "min", "max", "percentile", "quantile", "clip", "inf"}
+    }
+
+    ALLOWED_ATTRS = {
+        # Selection and metadata
+        "loc", "iloc", "at", "iat", "columns", "index", "dtypes", "dtype", "shape", "size", "ndim",
+        "empty", "name", "names", "values", "keys", "get", "head", "tail", "nlargest", "nsmallest",
+        "sort_values", "sort_index", "drop_duplicates", "duplicated", "dropna", "fillna", "isna",
+        "isnull", "notna", "notnull", "isin", "between", "where", "mask", "filter", "select_dtypes",
+        "rename", "reset_index", "set_index", "astype", "drop", "replace", "assign", "interpolate",
+        "to_frame", "to_numpy", "to_list", "tolist", "to_dict", "to_period", "to_timestamp",
+        # Element-wise arithmetic and comparison
+        "add", "sub", "mul", "div", "truediv", "floordiv", "mod", "eq", "ne", "lt", "le", "gt", "ge",
+        "abs", "round", "clip", "map",
+        # Aggregation
+        "sum", "mean", "median", "min", "max", "count", "std", "var", "sem", "prod", "quantile",
+        "describe", "value_counts", "unique", "nunique", "mode", "idxmin", "idxmax", "any", "all",
+        "corr", "corrwith", "cov", "skew", "kurt", "first", "last", "nth", "cumcount", "ngroup",
+        "cumsum", "cumprod", "cummax", "cummin", "diff", "pct_change", "rank", "shift",
+        "agg", "aggregate", "apply", "transform",
+        # Grouping and reshaping
+        "groupby", "get_group", "resample", "rolling", "expanding", "ewm", "pivot", "pivot_table",
+        "melt", "stack", "unstack",
+        # Accessors (.str, .dt, .cat)
+        "str", "dt", "cat", "contains", "startswith", "endswith", "lower", "upper", "title", "strip",
+        "len", "split", "slice", "extract", "match", "fullmatch", "zfill", "year", "month", "day",
+        "hour", "minute", "second", "date", "dayofweek", "day_of_week", "weekday", "quarter",
+        "dayofyear", "day_of_year", "isocalendar", "day_name", "month_name", "floor", "ceil",
+        "strftime", "normalize", "days", "seconds", "total_seconds", "categories", "codes"
+    }
+
+    # Methods whose function argument may name a function by string
+    FUNC_ARG_METHODS = {"agg", "aggregate", "apply", "transform"}
+
+    # Function names allowed as strings (anything else is looked up on the object, e.g. 'to_csv')
+    ALLOWED_FUNC_NAMES = {"sum", "mean", "min", "max", "count", "median", "std", "nunique"}
+
+    # Methods taking a regex as their first argument (or pat=/to_replace=/regex=)
+    REGEX_METHODS = {"contains", "match", "fullmatch", "extract", "replace", "split", "filter"}
+    REGEX_KEYWORDS = {"pat", "to_replace", "regex"}
+
+    # A quantified group that itself contains a quantifier or alternation, e.g. (a+)+ or (a|aa)*
+    NESTED_QUANTIFIER = re.compile(r"\((?:[^()\\]|\\.)*[+*}|](?:[^()\\]|\\.)*\)\s*[+*{]")
+
+    # Reshaping calls whose output size is the product of their key cardinalities
+    RESHAPE_METHODS = {"pivot", "pivot_table", "crosstab"}
+    MAX_RESHAPE_KEYS = 4
+
+    # Argument names that take a file path or buffer
+    BLOCKED_KEYWORDS = {"buf", "path", "path_or_buf", "path_or_buffer", "filepath_or_buffer",
+                        "excel_writer", "file", "fname"}
+
+    def validate(self, expression: str, columns: Iterable[Any] = ()) -> ast.Expression:
+        """
+        Parse and check an expression
+
+        Args:
+            expression: pandas expression over df
+            columns: Column names that may be used as attributes of df (df.price)
+
+        Returns:
+            Parsed ast.Expression
+
+        Raises:
+            QueryValidationError: Disallowed syntax, name or attribute
+        """
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+        except SyntaxError as e:
+            raise QueryValidationError(f"invalid syntax: {e.msg}")
+
+        # pandas resolves methods before columns, so a column named like a method is not a column
+        column_attrs = {
+            c for c in columns
+            if isinstance(c, str) and c.isidentifier() and not c.startswith("_")
+            and not hasattr(pd.DataFrame, c) and not hasattr(pd.Series, c)
+        }
+
+        for node in ast.walk(tree):
+            if not isinstance(node, self.ALLOWED_NODES):
+                raise QueryValidationError(f"'{type(node).__name__}' is not allowed")
+            if isinstance(node, ast.Name) and node.id not in self.ALLOWED_NAMES:
+                raise QueryValidationError(f"name '{node.id}' is not allowed")
+            if isinstance(node, ast.Attribute):
+                receiver = node.value.id if isinstance(node.value, ast.Name) else None
+                if node.attr.startswith("_"):
+                    raise QueryValidationError(f"attribute '{node.attr}' is not allowed")
+                if receiver in self.ALLOWED_MODULE_ATTRS:
+                    if node.attr not in self.ALLOWED_MODULE_ATTRS[receiver]:
+                        raise QueryValidationError(f"'{receiver}.{node.attr}' is not allowed")
+                elif node.attr not in self.ALLOWED_ATTRS and not (receiver == "df" and node.attr in column_attrs):
+                    raise QueryValidationError(f"attribute '{node.attr}' is not allowed (use df['{node.attr}'])")
+            if isinstance(node, ast.keyword):
+                if node.arg is None:
+                    raise QueryValidationError("**kwargs is not allowed")
+                if node.arg in self.BLOCKED_KEYWORDS:
+                    raise QueryValidationError(f"argument '{node.arg}' is not allowed")
+                if node.arg == "aggfunc":
+                    self._check_func_arg(node.value)
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+                if node.func.attr in self.FUNC_ARG_METHODS:
+                    if node.args:
+                        self._check_func_arg(node.args[0])
+                    for keyword in node.keywords:
+                        if keyword.arg == "func":
+                            self._check_func_arg(keyword.value)
+                        elif isinstance(keyword.value, ast.Tuple) and len(keyword.value.elts) == 2:
+                            # Named aggregation: column=(source, func)
+                            self._check_func_arg(keyword.value.elts[1])
+                elif node.func.attr == "NamedAgg" and len(node.args) > 1:
+                    self._check_func_arg(node.args[1])
+                if node.func.attr in self.REGEX_METHODS:
+                    patterns = node.args[:1] + [k.value for k in node.keywords if k.arg in self.REGEX_KEYWORDS]
+                    for pattern in patterns:
+                        self._check_pattern(pattern)
+                if node.func.attr in self.RESHAPE_METHODS:
+                    keys = sum((self.reshape_keys(node, part) for part in ("index", "columns")), [])
+                    if len(keys) > self.MAX_RESHAPE_KEYS:
+                        raise QueryValidationError(
+                            f"{node.func.attr} over {len(keys)} keys is not allowed (max {self.MAX_RESHAPE_KEYS})"
+                        )
+            if isinstance(node, ast.BinOp):
+                for operand in (node.left, node.right):
+                    if isinstance(operand, (ast.List, ast.Tuple)) or \
+                            (isinstance(operand, ast.Constant) and isinstance(operand.value, (str, bytes))):
+                        raise QueryValidationError("arithmetic on lists/strings is not allowed")
+                if isinstance(node.op, ast.Pow):
+                    exponent = node.right.operand if isinstance(node.right, ast.UnaryOp) else node.right
+                    if not (isinstance(exponent, ast.Constant) and isinstance(exponent.value, (int, float))
+                            and abs(exponent.value) <= 100):
+                        raise QueryValidationError("exponent must be a number up to 100")
+        return tree
+
+    def _check_pattern(self, node: ast.AST):
+        """Reject long regexes and nested quantifiers (catastrophic backtracking)"""
+        values = [node] if not isinstance(node, (ast.List, ast.Tuple)) else node.elts
+        for value in values:
+            if not (isinstance(value, ast.Constant) and isinstance(value.value, str)):
+                continue
+            if len(value.value) > Config.DATA_QUERY_MAX_PATTERN_LENGTH:
+                raise QueryValidationError(
+                    f"pattern is longer than {Config.DATA_QUERY_MAX_PATTERN_LENGTH} characters"
+                )
+            if self.NESTED_QUANTIFIER.search(value.value):
+                raise QueryValidationError(f"nested quantifiers in pattern '{value.value}' are not allowed")
+
+    @staticmethod
+    def reshape_keys(call: ast.Call, part: str) -> List[ast.AST]:
+        """
+        Key expressions of a pivot/pivot_table/crosstab call
+
+        Args:
+            call: The reshaping call
+            part: "index" or "columns"
+
+        Returns:
+            One node per key (list arguments are expanded)
+        """
+        for keyword in call.keywords:
+            if keyword.arg == part:
+                node = keyword.value
+                break
+        else:
+            # Positional keys: crosstab(index, columns), df.pivot_table(values, index, columns),
+            # pd.pivot_table(data, values, index, columns)
+            position = {"index": 0, "columns": 1}[part]
+            if call.func.attr == "pivot_table":
+                position += 2 if isinstance(call.func.value, ast.Name) and call.func.value.id == "pd" else 1
+            elif call.func.attr != "crosstab":
+                return []
+            if len(call.args) <= position:
+                return []
+            node = call.args[position]
+        return list(node.elts) if isinstance(node, (ast.List, ast.Tuple)) else [node]
+
+    def _check_func_arg(self, node: ast.AST):
+        """Reject function names given as strings unless they are simple aggregations"""
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            if node.value not in self.ALLOWED_FUNC_NAMES:
+                raise QueryValidationError(
+                    f"function '{node.value}' is not allowed (use one of {sorted(self.ALLOWED_FUNC_NAMES)})"
+                )
+        elif isinstance(node, (ast.List, ast.Tuple)):
+            for item in node.elts:
+                self._check_func_arg(item)
+        elif isinstance(node, ast.Dict):
+            for item in node.values:
+                self._check_func_arg(item)
+
+
+class DataQueryEngine:
+    """
+    Question → generated query → local execution → answer
+
+    Gemini sees only the schema (names, dtypes, a few example values) and
+    returns a pandas expression or a DuckDB SELECT. The query runs locally
+    against the full DataFrame and only its (truncated) result is sent back
+    to Gemini to phrase the answer, so answers are computed exactly at any
+    dataset size while prompts stay small.
+    """
+
+    SQL_BLOCKED = re.compile(
+        r"\b(attach|detach|copy|export|import|install|load|pragma|set|call|create|insert|update|"
+        r"delete|drop|alter|checkpoint|vacuum|read_\w+|glob|httpfs)\b",
+        re.IGNORECASE
+    )
+
+    # String literals, quoted identifiers and comments (blanked before keyword checks)
+    SQL_QUOTED = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\$\$.*?\$\$|--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+    QUERY_PROMPT = """Bạn viết truy vấn để trả lời câu hỏi về một bảng dữ liệu.
+
+Bảng có {rows} dòng. Các cột (tên: kiểu, ví dụ giá trị):
+{schema}
+
+Câu hỏi: {question}
+{retry}
+Trả lời CHÍNH XÁC một JSON (không thêm text nào khác), chọn một trong hai dạng:
+{{"engine": "pandas", "query": "<một biểu thức pandas duy nhất dùng biến df, pd, np>"}}
+{engines}
+Quy tắc: chỉ một biểu thức, không gán biến, không lambda, không import, không đọc/ghi file, không merge/join/sample, truy cập cột bằng df['tên cột']. Hàm dạng chuỗi trong agg/apply/transform chỉ gồm sum, mean, min, max, count, median, std, nunique. Kết quả nên nhỏ (dùng groupby/agg/sort_values/head)."""
+
+    ANSWER_PROMPT = """Bạn là một data analyst chuyên nghiệp. Câu hỏi của người dùng đã được trả lời bằng cách chạy truy vấn trên TOÀN BỘ dữ liệu ({rows} dòng).
+
+Câu hỏi: {question}
+
+Truy vấn ({engine}):
+{query}
+
+Kết quả:
+{result}
+
+Hãy trả lời bằng tiếng Việt dựa trên kết quả trên, nêu con số cụ thể. Không bịa thêm số liệu ngoài kết quả."""
+
+    def __init__(self, client, model_name: str = "gemini-2.5-flash"):
+        """
+        Args:
+            client: google-genai client
+            model_name: Gemini model used for query generation and answers
+        """
+        self.client = client
+        self.model_name = model_name
+        self.validator = PandasExpressionValidator()
+
+    # ---------- Prompt helpers ----------
+
+    @staticmethod
+    def _schema(df: pd.DataFrame) -> str:
+        """Column names, dtypes and up to three example values"""
+        lines = []
+        for col in df.columns[:200]:
+            examples = df[col].dropna().head(50).unique()[:3]
+            sample = ", ".join(str(v)[:20] for v in examples)
+            lines.append(f"- {col}: {df[col].dtype} (vd: {sample})")
+        if len(df.columns) > 200:
+            lines.append(f"- ... {len(df.columns) - 200} cột khác")
+        return "\n".join(lines)
+
+    def _generate(self, prompt: str) -> str:
+        response = self.client.models.generate_content(model=self.model_name, contents=prompt)
+        return response.text.strip()
+
+    @staticmethod
+    def _parse_query(text: str) -> Dict[str, str]:
+        """Extract the {"engine", "query"} JSON (handles markdown code blocks)"""
+        if "```json" in text:
+            text = text.split("```json")[1].split("```")[0].strip()
+        elif "```" in text:
+            text = text.split("```")[1].split("```")[0].strip()
+        spec = json.loads(text)
+        if spec.get("engine") not in ("pandas", "sql") or not spec.get("query"):
+            raise QueryValidationError("response must contain engine (pandas|sql) and query")
+        return spec
+
+    # ---------- Execution ----------
+
+    def run_pandas(self, df: pd.DataFrame, expression: str) -> Any:
+        """
+        Validate and evaluate a pandas expression with no builtins
+
+        Raises:
+            QueryValidationError: Disallowed expression or result larger than
+                Config.DATA_QUERY_MAX_RESULT_CELLS
+            QueryTimeoutError: Ran longer than Config.DATA_QUERY_TIMEOUT
+        """
+        tree = self.validator.validate(expression, df.columns)
+        code = compile(tree, "<data-query>", "eval")
+
+        def evaluate():
+            self._check_reshape_size(tree, df)
+            result = eval(code, {"__builtins__": {}}, {"df": df, "pd": pd, "np": np})
+            if isinstance(result, (pd.DataFrame, pd.Series, np.ndarray)) \
+                    and result.size > Config.DATA_QUERY_MAX_RESULT_CELLS:
+                raise QueryValidationError(
+                    f"result has {result.size} cells (max {Config.DATA_QUERY_MAX_RESULT_CELLS}); "
+                    "aggregate it or use head()"
+                )
+            return result
+
+        return _call_with_timeout(evaluate, Config.DATA_QUERY_TIMEOUT)
+
+    def _check_reshape_size(self, tree: ast.Expression, df: pd.DataFrame):
+        """
+        Reject pivots/crosstabs whose output would exceed Config.DATA_QUERY_MAX_RESULT_CELLS
+
+        The size is estimated as the product of the distinct counts of the
+        key columns (keys that are not plain column references are skipped).
+        """
+        for node in ast.walk(tree):
+            if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                    and node.func.attr in self.validator.RESHAPE_METHODS):
+                continue
+            cells = 1
+            for part in ("index", "columns"):
+                for key in self.validator.reshape_keys(node, part):
+                    column = self._column_reference(key)
+                    if column in df.columns:
+                        cells *= max(1, df[column].nunique())
+            if cells > Config.DATA_QUERY_MAX_RESULT_CELLS:
+                raise QueryValidationError(
+                    f"{node.func.attr} would produce about {cells} cells "
+                    f"(max {Config.DATA_QUERY_MAX_RESULT_CELLS}); use fewer or coarser keys"
+                )
+
+    @staticmethod
+    def _column_reference(node: ast.AST) -> Optional[str]:
+        """Column named by 'col', df['col'] or df.col"""
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return node.value
+        if isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == "df" \
+                and isinstance(node.slice, ast.Constant) and isinstance(node.slice.value, str):
+            return node.slice.value
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "df":
+            return node.attr
+        return None
+
+    def run_sql(self, df: pd.DataFrame, sql: str) -> pd.DataFrame:
+        """
+        Run a single read-only SELECT over the DataFrame registered as table `data`
+
+        The connection has no file system or network access, a memory and
+        thread limit and a locked configuration; results are capped at
+        Config.DATA_QUERY_SQL_ROW_LIMIT rows and the query is interrupted
+        after Config.DATA_QUERY_TIMEOUT seconds.
+        """
+        if not DUCKDB_AVAILABLE:
+            raise QueryValidationError("SQL engine (duckdb) is not installed")
+
+        statement = sql.strip().rstrip(";").strip()
+        code = self.SQL_QUOTED.sub(" ", statement)
+        if ";" in code:
+            raise QueryValidationError("only one statement is allowed")
+        if not re.match(r"^\s*(select|with)\b", code, re.IGNORECASE):
+            raise QueryValidationError("only SELECT queries are allowed")
+        blocked = self.SQL_BLOCKED.search(code)
+        if blocked:
+            raise QueryValidationError(f"'{blocked.group(0)}' is not allowed")
+
+        con = duckdb.connect(database=":memory:")
+        timer = threading.Timer(Config.DATA_QUERY_TIMEOUT, con.interrupt)
+        try:
+            con.register("data", df)
+            con.execute("SET enable_external_access = false")
+            con.execute(f"SET memory_limit = '{Config.DATA_QUERY_SQL_MEMORY_LIMIT}'")
+            con.execute(f"SET threads = {int(Config.DATA_QUERY_SQL_THREADS)}")
+            con.execute("SET lock_configuration = true")
+            timer.start()
+            try:
+                return con.execute(
+                    f"SELECT * FROM ({statement}\n) AS result LIMIT {int(Config.DATA_QUERY_SQL_ROW_LIMIT)}"
+                ).df()
+            except Exception as e:
+                if not timer.is_alive():
+                    raise QueryTimeoutError(f"query ran longer than {Config.DATA_QUERY_TIMEOUT:g}s") from e
+                raise
+        finally:
+            timer.cancel()
+            con.close()
+
+    @staticmethod
+    def format_result(result: Any, max_rows: int) -> str:
+        """Render a query result compactly, truncated to max_rows"""
+        if isinstance(result, (pd.DataFrame, pd.Series)):
+            total = len(result)
+            text = result.head(max_rows).to_string()
+            if total > max_rows:
+                text += f"\n... ({total} dòng, chỉ hiển thị {max_rows})"
+            return text
+        if isinstance(result, np.ndarray):
+            return np.array2string(result[:max_rows], threshold=max_rows)
+        return str(result)[:4000]
+
+    # ---------- Public API ----------
+
+    def answer(self, df: pd.DataFrame, question: str) -> Dict[str, Any]:
+        """
+        Answer a question about df by generating and executing a query
+
+        A failed validation/execution is reported back to Gemini for another
+        attempt (up to Config.DATA_QUERY_MAX_ATTEMPTS).
+
+        Returns:
+            Dict with success, answer, engine, query and result (text)
+        """
+        engines = '{"engine": "sql", "query": "<một câu SELECT trên bảng data>"}' if DUCKDB_AVAILABLE else ""
+        schema = self._schema(df)
+        retry = ""
+        spec: Optional[Dict[str, str]] = None
+        error = None
+
+        for _ in range(Config.DATA_QUERY_MAX_ATTEMPTS):
+            try:
+                spec = self._parse_query(self._generate(self.QUERY_PROMPT.format(
+                    rows=len(df), schema=schema, question=question, retry=retry, engines=engines
+                )))
+                if spec["engine"] == "sql":
+                    result = self.run_sql(df, spec["query"])
+                else:
+                    result = self.run_pandas(df, spec["query"])
+                break
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                failed = spec["query"] if spec else ""
+                retry = f"\nLần trước truy vấn `{failed}` bị lỗi: {error}. Hãy sửa lại.\n"
+                spec = None
+        else:
+            return {
+                "success": False,
+                "answer": f"Không thể tạo truy vấn hợp lệ cho câu hỏi này ({error}).",
+                "engine": None,
+                "query": None,
+                "result": None
+            }
+
+        result_text = self.format_result(result, Config.DATA_QUERY_MAX_RESULT_ROWS)
+        answer = self._generate(self.ANSWER_PROMPT.format(
+            rows=len(df), question=question, engine=spec["engine"], query=spec["query"], result=result_text
+        ))
+        return {
+            "success": True,
+            "answer": answer,
+            "engine": spec["engine"],
+            "query": spec["query"],
+            "result": result_text
+        }
+
+
+# Global instance (created on first use)
+_data_query_engine = None
+
+
+def get_data_query_engine() -> DataQueryEngine:
+    """Get or create the data query engine"""
+    global _data_query_engine
+    if _data_query_engine is None:
+        from tools.gemini_client import get_gemini_client
+        _data_query_engine = DataQueryEngine(get_gemini_client(Config.GEMINI_API_KEY))
+    return _data_query_engine
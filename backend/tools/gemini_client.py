@@ -0,0 +1,90 @@
+"""Shared Gemini (google-genai) clients"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from google import genai
+from config import Config
+
+# Clients kept alive (one per API key)
+MAX_CLIENTS = 8
+
+
+class KeyedPool:
+    """
+    Bounded LRU pool of objects built on demand per key
+
+    Used for clients and client-backed tools, so a request with a known
+    key reuses an existing instance (and its HTTP connections) instead of
+    constructing a new one.
+    """
+
+    def __init__(self, max_size: int = MAX_CLIENTS):
+        """
+        Args:
+            max_size: Instances kept; the least recently used is dropped beyond this
+        """
+        self.max_size = max_size
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the instance for key, creating it with factory() on first use"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+                self.reused += 1
+                return item
+            item = self._items[key] = factory()
+            self.created += 1
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+            return item
+
+    def stats(self) -> dict:
+        """Get pool size and reuse counts"""
+        with self._lock:
+            return {"size": len(self._items), "max_size": self.max_size,
+                    "created": self.created, "reused": self.reused}
+
+
+_clients = KeyedPool(MAX_CLIENTS)
+
+
+def get_gemini_client(api_key: Optional[str] = None) -> genai.Client:
+    """
+    Get a reusable google-genai client for an API key
+
+    Clients are thread-safe and keep their HTTP connections alive, so tools
+    share them instead of constructing one per call. The least recently used
+    client is dropped when more than MAX_CLIENTS keys are in use.
+
+    Args:
+        api_key: Gemini API key (default: Config.GEMINI_API_KEY)
+
+    Returns:
+        genai.Client
+    """
+    api_key = api_key or Config.GEMINI_API_KEY
+    return _clients.get(api_key, lambda: genai.Client(api_key=api_key))
+
+
+def get_async_gemini_client(api_key: Optional[str] = None):
+    """
+    Async (asyncio) interface of the pooled client for an API key
+
+    Args:
+        api_key: Gemini API key (default: Config.GEMINI_API_KEY)
+
+    Returns:
+        genai AsyncClient (client.aio), sharing the pooled client's configuration
+    """
+    return get_gemini_client(api_key).aio
+
+
+def get_gemini_client_stats() -> dict:
+    """Get client pool metrics"""
+    return _clients.stats()
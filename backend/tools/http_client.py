@@ -0,0 +1,268 @@
+"""Shared HTTP client with keep-alive connection pools for all outbound API calls"""
+import bisect
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import Config
+from workers import run_io
+
+# Import httpx for the async client (optional)
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+    print("⚠️ httpx not installed. Async HTTP calls will run in worker threads.")
+
+# Errors raised by request() or arequest(), whichever client served the call
+CONNECTION_ERRORS = (requests.exceptions.ConnectionError,) + ((httpx.ConnectError,) if HTTPX_AVAILABLE else ())
+TIMEOUT_ERRORS = (requests.exceptions.Timeout,) + ((httpx.TimeoutException,) if HTTPX_AVAILABLE else ())
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (milliseconds)"""
+
+    BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self.errors = 0
+
+    def record(self, elapsed_ms: float, error: bool = False):
+        """Add one observation"""
+        self.counts[bisect.bisect_left(self.BUCKETS_MS, elapsed_ms)] += 1
+        self.total += 1
+        self.sum_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if error:
+            self.errors += 1
+
+    def _percentile(self, q: float) -> Optional[float]:
+        """Upper bucket bound containing the q-th percentile"""
+        if not self.total:
+            return None
+        target = q * self.total
+        seen = 0
+        for bound, count in zip(self.BUCKETS_MS + (None,), self.counts):
+            seen += count
+            if seen >= target:
+                return bound if bound is not None else round(self.max_ms, 1)
+        return round(self.max_ms, 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get histogram summary"""
+        labels = [f"<={b}ms" for b in self.BUCKETS_MS] + [f">{self.BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.total,
+            "errors": self.errors,
+            "avg_ms": round(self.sum_ms / self.total, 1) if self.total else 0.0,
+            "max_ms": round(self.max_ms, 1),
+            "p50_ms": self._percentile(0.5),
+            "p95_ms": self._percentile(0.95),
+            "buckets": dict(zip(labels, self.counts))
+        }
+
+
+class HTTPClient:
+    """
+    Pooled sync/async HTTP client
+
+    One requests.Session keeps a keep-alive connection pool per host, with
+    uniform default timeouts and retry/backoff on connection errors and
+    retryable status codes (idempotent methods only). Latency is recorded
+    per host.
+    """
+
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        timeout: Tuple[float, float] = (5, 30),
+        max_retries: int = 2,
+        backoff_factor: float = 0.5,
+        pool_maxsize: int = 20
+    ):
+        """
+        Initialize HTTP client
+
+        Args:
+            timeout: Default (connect, read) timeout in seconds
+            max_retries: Retries for connection errors and retryable statuses
+            backoff_factor: Exponential backoff factor between retries
+            pool_maxsize: Keep-alive connections kept per host
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.pool_maxsize = pool_maxsize
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUS_CODES,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._async_client = None
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, url: str, started: float, error: bool = False):
+        """Record request latency for the URL's host"""
+        host = urlsplit(url).netloc
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            histogram = self._histograms.get(host)
+            if histogram is None:
+                histogram = self._histograms[host] = LatencyHistogram()
+            histogram.record(elapsed_ms, error)
+
+    # ---------- Sync API ----------
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        timeout: Union[None, float, Tuple[float, float]] = None,
+        **kwargs
+    ) -> requests.Response:
+        """
+        Send a request through the pooled session
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            timeout: Read timeout or (connect, read) tuple (default: client timeout)
+            **kwargs: Passed to requests (params, data, files, headers, stream, ...)
+
+        Returns:
+            requests.Response (latency is measured until headers are received)
+        """
+        if timeout is None:
+            timeout = self.timeout
+        elif not isinstance(timeout, tuple):
+            timeout = (self.timeout[0], timeout)
+
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, timeout=timeout, **kwargs)
+        except requests.RequestException:
+            self._record(url, started, error=True)
+            raise
+        self._record(url, started, error=response.status_code >= 500)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET request"""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """Send a POST request"""
+        return self.request("POST", url, **kwargs)
+
+    # ---------- Async API ----------
+
+    def _get_async_client(self):
+        """Create the httpx.AsyncClient lazily (must be used from one event loop)"""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+                limits=httpx.Limits(
+                    max_keepalive_connections=self.pool_maxsize,
+                    max_connections=self.pool_maxsize * 4
+                ),
+                transport=httpx.AsyncHTTPTransport(retries=self.max_retries)
+            )
+        return self._async_client
+
+    async def arequest(
+        self,
+        method: str,
+        url: str,
+        timeout: Union[None, float, Tuple[float, float]] = None,
+        **kwargs
+    ):
+        """
+        Send a request without blocking the event loop
+
+        Uses httpx when installed (connection retries only); otherwise runs the
+        sync request on the I/O worker pool.
+
+        Returns:
+            httpx.Response or requests.Response
+        """
+        if not HTTPX_AVAILABLE:
+            return await run_io(self.request, method, url, timeout=timeout, **kwargs)
+
+        if isinstance(timeout, tuple):
+            kwargs["timeout"] = httpx.Timeout(timeout[1], connect=timeout[0])
+        elif timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(timeout, connect=self.timeout[0])
+
+        started = time.perf_counter()
+        try:
+            response = await self._get_async_client().request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self._record(url, started, error=True)
+            raise
+        self._record(url, started, error=response.status_code >= 500)
+        return response
+
+    async def aget(self, url: str, **kwargs):
+        """Send an async GET request"""
+        return await self.arequest("GET", url, **kwargs)
+
+    async def apost(self, url: str, **kwargs):
+        """Send an async POST request"""
+        return await self.arequest("POST", url, **kwargs)
+
+    # ---------- Metrics / lifecycle ----------
+
+    def stats(self) -> Dict[str, Any]:
+        """Get per-host latency histograms"""
+        with self._lock:
+            return {host: h.snapshot() for host, h in self._histograms.items()}
+
+    def close(self):
+        """Close the sync session"""
+        self.session.close()
+
+    async def aclose(self):
+        """Close the async client"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+
+# Global instance (created on first use)
+_http_client = None
+
+
+def peek_http_client() -> Optional[HTTPClient]:
+    """Get the shared HTTP client if it has been created (no side effects)"""
+    return _http_client
+
+
+def get_http_client() -> HTTPClient:
+    """Get or create the shared HTTP client"""
+    global _http_client
+    if _http_client is None:
+        _http_client = HTTPClient(
+            timeout=(Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT),
+            max_retries=Config.HTTP_MAX_RETRIES,
+            backoff_factor=Config.HTTP_BACKOFF_FACTOR,
+            pool_maxsize=Config.HTTP_POOL_MAXSIZE
+        )
+    return _http_client
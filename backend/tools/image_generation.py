@@ -1,8 +1,8 @@
 """Image Generation Tool: Text-to-Image using Clipdrop API"""
-import requests
-import os
-from pathlib import Path
+import shutil
 from typing import Optional, Dict, Any
+from tools.http_client import get_http_client
+from tools.image_store import get_image_store, image_key
 
 class ImageGenerationTools:
     """Tool for text-to-image generation using Clipdrop API"""
@@ -27,7 +27,7 @@ class ImageGenerationTools:
         
         Args:
             prompt: Text description of the image to generate
-            output_path: Path to save the generated image
+            output_path: Path to save a copy of the generated image (optional)
             width: Image width (default: 1024)
             height: Image height (default: 1024)
             
@@ -35,32 +35,46 @@ class ImageGenerationTools:
             Dictionary with status, message, and image_path
         """
         try:
+            # Identical requests are served from the image store
+            store = get_image_store()
+            key = image_key("clipdrop/text-to-image/v1", prompt, width=width, height=height)
+            image_path = store.get(key)
+            if image_path:
+                if output_path:
+                    shutil.copyfile(image_path, output_path)
+                    image_path = str(output_path)
+                return {
+                    "status": "success",
+                    "message": f"Image generated successfully from prompt: {prompt}",
+                    "image_path": image_path,
+                    "cached": True
+                }
+            
             url = f"{self.base_url}/text-to-image/v1"
             
             files = {
                 'prompt': (None, prompt, 'text/plain')
             }
             
-            response = requests.post(
+            response = get_http_client().post(
                 url,
                 headers=self.headers,
-                files=files
+                files=files,
+                timeout=60  # Generation usually takes several seconds
             )
             
             if response.status_code == 200:
-                # Save image
-                if not output_path:
-                    output_dir = Path("output")
-                    output_dir.mkdir(exist_ok=True)
-                    output_path = output_dir / f"text_to_image_{len(os.listdir(output_dir)) + 1}.png"
-                
-                with open(output_path, 'wb') as f:
-                    f.write(response.content)
+                # Save image (atomically, named by its content key)
+                image_path = store.put_bytes(key, response.content)
+                if output_path:
+                    shutil.copyfile(image_path, output_path)
+                    image_path = str(output_path)
                 
                 return {
                     "status": "success",
                     "message": f"Image generated successfully from prompt: {prompt}",
-                    "image_path": str(output_path)
+                    "image_path": image_path,
+                    "cached": False
                 }
             else:
                 return {
@@ -0,0 +1,188 @@
+"""Content-addressed store for generated images"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config import Config
+
+
+def image_key(model: str, prompt: str, seed: Optional[int] = None, width: Optional[int] = None,
+              height: Optional[int] = None, steps: Optional[int] = None, **params) -> str:
+    """
+    Cache key for a generated image
+
+    Args:
+        model: Model or API that produced the image
+        prompt: Text prompt
+        seed: Sampling seed (None for non-deterministic APIs)
+        width: Image width
+        height: Image height
+        steps: Inference steps
+        **params: Other settings that change the output (e.g. scheduler)
+
+    Returns:
+        Hex digest identifying the image
+    """
+    spec = {"model": model, "prompt": prompt, "seed": seed, "width": width, "height": height,
+            "steps": steps, **params}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def prompt_seed(prompt: str) -> int:
+    """Deterministic seed for a prompt, so repeated prompts produce (and hit) the same image"""
+    return int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:4], "big")
+
+
+class ImageStore:
+    """
+    Directory of generated images named by their content key
+
+    A hit is served from disk without generating anything. Files are
+    written to a temporary name and renamed into place, so readers never
+    see partial images, and hits refresh the file's mtime so that the
+    least recently used images are deleted first once the directory
+    exceeds its size budget. Images stored or looked up within the last
+    `grace_s` seconds are never deleted, because callers may still be
+    reading a path they were just given (the directory can run over
+    budget until they age out).
+    """
+
+    def __init__(self, directory: str, max_mb: float, grace_s: float = 0):
+        """
+        Initialize image store
+
+        Args:
+            directory: Where images are stored
+            max_mb: Size budget for the directory
+            grace_s: Minimum age (since last store or lookup) before an image can be deleted
+        """
+        self.directory = directory
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.grace_s = grace_s
+        self._bytes: Optional[int] = None  # Scanned on first write
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str, ext: str = "png") -> str:
+        """File path for a key"""
+        return os.path.join(self.directory, f"{key[:32]}.{ext}")
+
+    def get(self, key: str, ext: str = "png") -> Optional[str]:
+        """
+        Look up an image
+
+        Returns:
+            File path, or None if the image is not stored
+        """
+        path = self.path(key, ext)
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def put_bytes(self, key: str, data: bytes, ext: str = "png") -> str:
+        """Store encoded image bytes; returns the file path"""
+        def write(tmp_path):
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+        return self._put(key, ext, write)
+
+    def put_image(self, key: str, image, ext: str = "png") -> str:
+        """Store a PIL image; returns the file path"""
+        return self._put(key, ext, lambda tmp_path: image.save(tmp_path, format=ext.upper()))
+
+    def _put(self, key: str, ext: str, write) -> str:
+        path = self.path(key, ext)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            write(tmp_path)
+            size = os.path.getsize(tmp_path)
+            existed = os.path.exists(path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = self._scan_size()
+            elif not existed:
+                self._bytes += size
+            if self._bytes > self.max_bytes:
+                self._trim(keep=path)
+        return path
+
+    def _scan_size(self) -> int:
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                total += entry.stat().st_size
+        return total
+
+    def _trim(self, keep: str):
+        """Delete least recently used images until under budget (lock held)"""
+        cutoff = time.time() - self.grace_s
+        try:
+            files = [
+                (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                for entry in os.scandir(self.directory)
+                if entry.is_file() and not entry.name.endswith(".tmp")
+            ]
+            files.sort()
+            total = sum(size for _, size, _ in files)
+            for mtime, size, path in files:
+                if total <= self.max_bytes or mtime > cutoff:
+                    # Sorted by mtime: everything after this is in use too
+                    break
+                if os.path.abspath(path) == os.path.abspath(keep):
+                    continue
+                os.remove(path)
+                total -= size
+                self.evictions += 1
+            self._bytes = total
+        except OSError as e:
+            print(f"⚠️ Could not trim image store: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit ratio and size metrics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "size_mb": round(self._bytes / 1024 / 1024, 2) if self._bytes is not None else None,
+                "max_mb": round(self.max_bytes / 1024 / 1024, 2),
+                "evictions": self.evictions
+            }
+
+
+# Global instance (created on first use)
+_image_store = None
+_image_store_lock = threading.Lock()
+
+
+def peek_image_store() -> Optional[ImageStore]:
+    """Get the image store if it has been created (no side effects)"""
+    return _image_store
+
+
+def get_image_store() -> ImageStore:
+    """Get or create the shared generated-image store"""
+    global _image_store
+    with _image_store_lock:
+        if _image_store is None:
+            _image_store = ImageStore(Config.IMAGE_STORE_DIR, Config.IMAGE_STORE_MAX_MB,
+                                      grace_s=Config.IMAGE_STORE_TRIM_GRACE_S)
+        return _image_store
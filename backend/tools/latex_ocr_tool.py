@@ -1,10 +1,11 @@
 """LaTeX OCR Tool: Convert images to LaTeX code using pix2tex API"""
-import requests
 import os
 from typing import Optional, Dict, Any
 import subprocess
 import time
 import socket
+from tools.http_client import CONNECTION_ERRORS, TIMEOUT_ERRORS, get_http_client
+from workers import run_io
 
 
 class LatexOCRTool:
@@ -126,6 +127,62 @@ class LatexOCRTool:
                 "message": f"Error stopping container: {str(e)}"
             }
     
+    def _prepare(self, image_path: str) -> Optional[Dict[str, Any]]:
+        """Start the container if needed and check the image; returns an error dict or None"""
+        # Check if container is running
+        if not self._is_container_running():
+            # Try to start container
+            start_result = self.start_container()
+            if start_result["status"] != "success":
+                return start_result
+        
+        # Check if image file exists
+        if not os.path.exists(image_path):
+            return {
+                "status": "error",
+                "message": f"Image file not found: {image_path}"
+            }
+        return None
+    
+    @staticmethod
+    def _parse_response(response) -> Dict[str, Any]:
+        """Turn a pix2tex API response (requests or httpx) into a result dict"""
+        if response.status_code == 200:
+            try:
+                # Try to parse as JSON
+                latex_code = response.json()
+            except:
+                # If plain text, clean it up
+                latex_code = response.text.strip().strip('"')
+            
+            return {
+                "status": "success",
+                "latex_code": latex_code,
+                "message": "LaTeX code extracted successfully"
+            }
+        else:
+            return {
+                "status": "error",
+                "message": f"API returned status code {response.status_code}"
+            }
+    
+    @staticmethod
+    def _error(e: Exception) -> Dict[str, Any]:
+        if isinstance(e, CONNECTION_ERRORS):
+            return {
+                "status": "error",
+                "message": "Cannot connect to pix2tex API. Container may not be running."
+            }
+        if isinstance(e, TIMEOUT_ERRORS):
+            return {
+                "status": "error",
+                "message": "Request timeout. Image may be too large or complex."
+            }
+        return {
+            "status": "error",
+            "message": f"Error processing image: {str(e)}"
+        }
+    
     def get_latex_from_image(self, image_path: str) -> Dict[str, Any]:
         """
         Convert an image to LaTeX code
@@ -137,63 +194,50 @@ class LatexOCRTool:
             Dictionary with status and LaTeX code
         """
         try:
-            # Check if container is running
-            if not self._is_container_running():
-                # Try to start container
-                start_result = self.start_container()
-                if start_result["status"] != "success":
-                    return start_result
-            
-            # Check if image file exists
-            if not os.path.exists(image_path):
-                return {
-                    "status": "error",
-                    "message": f"Image file not found: {image_path}"
-                }
+            error = self._prepare(image_path)
+            if error is not None:
+                return error
             
             # Send request to API
             with open(image_path, 'rb') as f:
                 files = {'file': f}
-                response = requests.post(
+                response = get_http_client().post(
                     self.api_url,
                     files=files,
                     timeout=30
                 )
+            return self._parse_response(response)
+        except Exception as e:
+            return self._error(e)
+    
+    async def aget_latex_from_image(self, image_path: str) -> Dict[str, Any]:
+        """
+        Convert an image to LaTeX code without blocking the event loop
+        
+        Docker checks and file reading run on the I/O pool; the API call
+        uses the async HTTP client.
+        
+        Args:
+            image_path: Path to the image file
             
-            if response.status_code == 200:
-                try:
-                    # Try to parse as JSON
-                    latex_code = response.json()
-                except:
-                    # If plain text, clean it up
-                    latex_code = response.text.strip().strip('"')
-                
-                return {
-                    "status": "success",
-                    "latex_code": latex_code,
-                    "message": "LaTeX code extracted successfully"
-                }
-            else:
-                return {
-                    "status": "error",
-                    "message": f"API returned status code {response.status_code}"
-                }
-                
-        except requests.exceptions.ConnectionError:
-            return {
-                "status": "error",
-                "message": "Cannot connect to pix2tex API. Container may not be running."
-            }
-        except requests.exceptions.Timeout:
-            return {
-                "status": "error",
-                "message": "Request timeout. Image may be too large or complex."
-            }
+        Returns:
+            Dictionary with status and LaTeX code
+        """
+        try:
+            error = await run_io(self._prepare, image_path)
+            if error is not None:
+                return error
+            
+            with open(image_path, 'rb') as f:
+                content = await run_io(f.read)
+            response = await get_http_client().apost(
+                self.api_url,
+                files={'file': (os.path.basename(image_path), content)},
+                timeout=30
+            )
+            return self._parse_response(response)
         except Exception as e:
-            return {
-                "status": "error",
-                "message": f"Error processing image: {str(e)}"
-            }
+            return self._error(e)
     
     def health_check(self) -> Dict[str, Any]:
         """Check if the service is ready"""
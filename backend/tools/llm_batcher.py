@@ -0,0 +1,319 @@
+"""Dynamic request batching for local causal LM generation"""
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Tuple
+
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList
+
+
+class _PerRowBudget(StoppingCriteria):
+    """Finish each row at its own max_new_tokens (the batch stops when all rows are done)"""
+
+    def __init__(self, prompt_length: int, budgets: List[int]):
+        self.prompt_length = prompt_length
+        self.budgets = budgets
+        self._budgets_tensor = None
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        if self._budgets_tensor is None:
+            self._budgets_tensor = torch.tensor(self.budgets, device=input_ids.device)
+        generated = input_ids.shape[1] - self.prompt_length
+        return generated >= self._budgets_tensor
+
+
+class GenerationRequest:
+    """One queued generation request"""
+
+    def __init__(self, messages: List[Dict[str, str]], max_new_tokens: int, sampling: Tuple):
+        self.messages = messages
+        self.max_new_tokens = max_new_tokens
+        self.sampling = sampling  # (do_sample, temperature, top_p, top_k)
+        self.prompt_ids: Optional[List[int]] = None
+        self.future: Future = Future()
+        self.submitted_at = time.perf_counter()
+
+
+class GenerationBatcher:
+    """
+    Scheduler in front of a Hugging Face causal LM
+
+    Requests are queued and collected for up to `max_wait_ms` (or until a
+    batch is full). Requests with the same sampling parameters are sorted by
+    prompt length and run as left-padded batches through one
+    `model.generate` call; a batch is split when prompt lengths differ too
+    much, to limit wasted padding. Each row stops at its own max_new_tokens
+    and the batch ends when every row is done. Callers receive results
+    through futures.
+
+    Callables queued with `run_exclusive` (e.g. prefix-cached generation,
+    which cannot share a padded batch) run on the same scheduler thread
+    between batches, so the model is never used by two generate calls at
+    once.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[], ContextManager[Tuple[Any, Any]]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 20,
+        max_length_ratio: float = 2.0
+    ):
+        """
+        Initialize batcher
+
+        Args:
+            load: Returns a context manager yielding (model, tokenizer) and keeping the
+                model loaded while a round of batches runs (called on the scheduler thread)
+            max_batch_size: Maximum requests per generate call
+            max_wait_ms: How long to wait for more requests before running a batch
+            max_length_ratio: Longest/shortest prompt ratio allowed in one batch
+        """
+        self.load = load
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_length_ratio = max_length_ratio
+
+        self._queue: List[GenerationRequest] = []
+        self._exclusive: List[Tuple[Callable[[Any, Any], Any], Future]] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+        # Metrics
+        self.requests = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.failed = 0
+        self.exclusive_runs = 0
+        self.queue_ms_total = 0.0
+        self.queue_ms_max = 0.0
+        self.generation_seconds = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    # ---------- Submission ----------
+
+    def submit(
+        self,
+        messages: List[Dict[str, str]],
+        max_new_tokens: int = 512,
+        temperature: float = 0.7,
+        top_p: float = 1.0,
+        top_k: int = 50,
+        do_sample: bool = True
+    ) -> Future:
+        """
+        Queue a chat completion
+
+        Args:
+            messages: Chat messages ({"role", "content"})
+            max_new_tokens: Tokens to generate for this request
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+            top_k: Top-k sampling parameter
+            do_sample: Sample (True) or greedy decode (False)
+
+        Returns:
+            Future resolving to a dict with text, prompt_tokens,
+            completion_tokens, queue_ms and batch_size
+        """
+        sampling = (do_sample, round(temperature, 3), round(top_p, 3), int(top_k)) if do_sample \
+            else (False, None, None, None)
+        request = GenerationRequest(messages, max_new_tokens, sampling)
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("Generation batcher is stopped")
+            self._queue.append(request)
+            self.requests += 1
+            self._ensure_thread()
+            self._cond.notify()
+        return request.future
+
+    def run_exclusive(self, fn: Callable[[Any, Any], Any]) -> Future:
+        """
+        Queue a callable that needs the model to itself
+
+        Args:
+            fn: Called as fn(model, tokenizer) on the scheduler thread, between batches
+
+        Returns:
+            Future resolving to fn's return value
+        """
+        future: Future = Future()
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("Generation batcher is stopped")
+            self._exclusive.append((fn, future))
+            self._ensure_thread()
+            self._cond.notify()
+        return future
+
+    def _ensure_thread(self):
+        """Start the scheduler thread on first use (caller holds the condition)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="llm-batcher", daemon=True)
+            self._thread.start()
+
+    # ---------- Scheduling ----------
+
+    def _collect(self) -> Tuple[List[GenerationRequest], List[Tuple[Callable, Future]]]:
+        """Wait for work, then linger briefly so concurrent requests share a batch"""
+        with self._cond:
+            while not self._queue and not self._exclusive and not self._stopped:
+                self._cond.wait()
+            if self._stopped:
+                return [], []
+
+            if self._queue:
+                deadline = time.perf_counter() + self.max_wait
+                while len(self._queue) < self.max_batch_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+            pending, self._queue = self._queue, []
+            exclusive, self._exclusive = self._exclusive, []
+            return pending, exclusive
+
+    def _plan(self, pending: List[GenerationRequest], tokenizer) -> List[List[GenerationRequest]]:
+        """Group by sampling parameters, then cut length-sorted runs into batches"""
+        groups: Dict[Tuple, List[GenerationRequest]] = {}
+        for request in pending:
+            if request.prompt_ids is None:
+                text = tokenizer.apply_chat_template(request.messages, tokenize=False, add_generation_prompt=True)
+                request.prompt_ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+            groups.setdefault(request.sampling, []).append(request)
+
+        batches = []
+        for requests in groups.values():
+            requests.sort(key=lambda r: len(r.prompt_ids))
+            batch = []
+            for request in requests:
+                if batch and (
+                    len(batch) >= self.max_batch_size
+                    or len(request.prompt_ids) > self.max_length_ratio * max(1, len(batch[0].prompt_ids))
+                ):
+                    batches.append(batch)
+                    batch = []
+                batch.append(request)
+            if batch:
+                batches.append(batch)
+        return batches
+
+    def _generate(self, model, tokenizer, batch: List[GenerationRequest]):
+        """Run one left-padded batch and resolve its futures"""
+        started = time.perf_counter()
+        for request in batch:
+            queue_ms = (started - request.submitted_at) * 1000
+            self.queue_ms_total += queue_ms
+            self.queue_ms_max = max(self.queue_ms_max, queue_ms)
+
+        inputs = tokenizer.pad(
+            {"input_ids": [r.prompt_ids for r in batch]},
+            padding=True,
+            return_tensors="pt"
+        ).to(model.device)
+        prompt_length = inputs["input_ids"].shape[1]
+        budgets = [r.max_new_tokens for r in batch]
+
+        do_sample, temperature, top_p, top_k = batch[0].sampling
+        sampling_kwargs = {"do_sample": True, "temperature": temperature, "top_p": top_p, "top_k": top_k} \
+            if do_sample else {"do_sample": False}
+
+        with torch.inference_mode():
+            output = model.generate(
+                **inputs,
+                max_new_tokens=max(budgets),
+                stopping_criteria=StoppingCriteriaList([_PerRowBudget(prompt_length, budgets)]),
+                pad_token_id=tokenizer.pad_token_id,
+                **sampling_kwargs
+            )
+
+        elapsed = time.perf_counter() - started
+        self.batches += 1
+        self.batched_requests += len(batch)
+        self.generation_seconds += elapsed
+
+        for row, request in enumerate(batch):
+            tokens = output[row, prompt_length:prompt_length + request.max_new_tokens].tolist()
+            # Drop padding/EOS that follows the row's end
+            if tokenizer.eos_token_id in tokens:
+                tokens = tokens[:tokens.index(tokenizer.eos_token_id)]
+            tokens = [t for t in tokens if t != tokenizer.pad_token_id]
+            self.prompt_tokens += len(request.prompt_ids)
+            self.completion_tokens += len(tokens)
+            request.future.set_result({
+                "text": tokenizer.decode(tokens, skip_special_tokens=True),
+                "prompt_tokens": len(request.prompt_ids),
+                "completion_tokens": len(tokens),
+                "queue_ms": round((started - request.submitted_at) * 1000, 1),
+                "batch_size": len(batch)
+            })
+
+    def _run(self):
+        """Scheduler loop"""
+        while True:
+            pending, exclusive = self._collect()
+            if not pending and not exclusive:
+                return
+
+            futures = [r.future for r in pending] + [future for _, future in exclusive]
+            try:
+                with self.load() as (model, tokenizer):
+                    for batch in self._plan(pending, tokenizer):
+                        try:
+                            self._generate(model, tokenizer, batch)
+                        except Exception as e:
+                            print(f"⚠️ Batched generation failed ({len(batch)} requests): {e}")
+                            self.failed += len(batch)
+                            for request in batch:
+                                if not request.future.done():
+                                    request.future.set_exception(e)
+                    for fn, future in exclusive:
+                        try:
+                            future.set_result(fn(model, tokenizer))
+                        except Exception as e:
+                            self.failed += 1
+                            future.set_exception(e)
+                        self.exclusive_runs += 1
+            except Exception as e:
+                # Loading or planning failed
+                unresolved = [f for f in futures if not f.done()]
+                for future in unresolved:
+                    future.set_exception(e)
+                self.failed += len(unresolved)
+
+    # ---------- Metrics / lifecycle ----------
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue, batching and throughput metrics"""
+        with self._cond:
+            queue_depth = len(self._queue)
+        return {
+            "queue_depth": queue_depth,
+            "requests": self.requests,
+            "batches": self.batches,
+            "failed": self.failed,
+            "exclusive_runs": self.exclusive_runs,
+            "avg_batch_size": round(self.batched_requests / self.batches, 2) if self.batches else 0.0,
+            "avg_queue_ms": round(self.queue_ms_total / self.batched_requests, 1) if self.batched_requests else 0.0,
+            "max_queue_ms": round(self.queue_ms_max, 1),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_per_s": round(self.completion_tokens / self.generation_seconds, 1)
+            if self.generation_seconds else 0.0
+        }
+
+    def stop(self):
+        """Stop the scheduler; queued requests fail"""
+        with self._cond:
+            self._stopped = True
+            pending, self._queue = self._queue, []
+            exclusive, self._exclusive = self._exclusive, []
+            self._cond.notify_all()
+        futures = [r.future for r in pending] + [future for _, future in exclusive]
+        for future in futures:
+            future.set_exception(RuntimeError("Generation batcher is stopped"))
@@ -1,48 +1,156 @@
 """Local LLM Tool with Qwen 1.5B and Gemini API Support"""
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline, BitsAndBytesConfig
+from transformers import (
+    AutoTokenizer, AutoModelForCausalLM, pipeline, BitsAndBytesConfig,
+    StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+)
 import torch
-from typing import Optional, Dict, Any
-from google import genai
+import asyncio
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, List, Iterator, Tuple
 from google.genai import types
-from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.enum.text import PP_ALIGN
-from diffusers import StableDiffusionPipeline
+from diffusers import StableDiffusionPipeline, DPMSolverMultistepScheduler
 from PIL import Image
 import os
 import json
-import random
+import shutil
+import threading
+from config import Config
+from tools.llm_batcher import GenerationBatcher
+from tools.prefix_cache import PrefixKVCache
+from tools.model_manager import get_model_manager
+from tools.slide_deck import build_presentation
+from tools.image_store import get_image_store, image_key, prompt_seed
+from tools.gemini_client import KeyedPool, get_gemini_client
+from workers import get_model_pool
+
+# Import optimum for the ONNX Runtime CPU backend (optional)
+try:
+    from optimum.onnxruntime import ORTModelForCausalLM
+    OPTIMUM_AVAILABLE = True
+except ImportError:
+    OPTIMUM_AVAILABLE = False
+
+CPU_BACKENDS = ("fp32", "bf16", "int8", "onnx")
+
+
+def _cpu_supports_bf16() -> bool:
+    """Whether the CPU has native bf16 matmul support (AVX512-BF16 / AMX)"""
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except Exception:
+        return False
+
+
+class _CancelCriteria(StoppingCriteria):
+    """Stop generation as soon as the cancel event is set"""
+    
+    def __init__(self, cancel_event: threading.Event):
+        self.cancel_event = cancel_event
+    
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        return self.cancel_event.is_set()
 
 class LocalLLM:
     """Local Language Model using Qwen 1.5B with 4-bit quantization"""
     
-    def __init__(self, model_name: str = "Qwen/Qwen2.5-1.5B-Instruct"):
+    # Fixed instructions for slide generation; kept as a system message so
+    # its KV-cache prefix is shared by every topic
+    SLIDES_SYSTEM_PROMPT = """Bạn tạo nội dung bài thuyết trình.
+
+Yêu cầu:
+- Mỗi slide có tiêu đề và nội dung chi tiết
+- Nội dung phải logic, mạch lạc
+- Sử dụng bullet points
+- Thêm trường "image_prompt" cho một số slide để tạo hình minh họa (bằng tiếng Anh, mô tả chi tiết)
+- Format JSON như sau:
+{
+  "title": "Tiêu đề bài thuyết trình",
+  "slides": [
+    {
+      "title": "Tiêu đề slide",
+      "content": ["Điểm 1", "Điểm 2", "Điểm 3"],
+      "image_prompt": "detailed image description in English (optional)"
+    }
+  ]
+}
+
+Chỉ trả về JSON, không thêm text khác."""
+    
+    def __init__(self, model_name: str = "Qwen/Qwen2.5-1.5B-Instruct", cpu_backend: Optional[str] = None):
         """
         Initialize Local LLM with 4-bit quantization for low VRAM (4GB GPU)
         
         Args:
             model_name: Hugging Face model name (default: Qwen2.5-1.5B-Instruct for lighter weight)
+            cpu_backend: CPU inference backend: fp32, bf16, int8 or onnx (default: Config.LOCAL_LLM_CPU_BACKEND)
         """
         self.model_name = model_name
+        self.cpu_backend = (cpu_backend or Config.LOCAL_LLM_CPU_BACKEND).lower()
+        if self.cpu_backend not in CPU_BACKENDS:
+            raise ValueError(f"Unknown CPU backend '{self.cpu_backend}'. Use one of: {', '.join(CPU_BACKENDS)}")
         self.model = None
         self.tokenizer = None
         self.pipeline = None
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self._load_lock = threading.Lock()
+        self.batcher = GenerationBatcher(
+            load=self.resident,
+            max_batch_size=Config.LOCAL_LLM_MAX_BATCH_SIZE,
+            max_wait_ms=Config.LOCAL_LLM_BATCH_WAIT_MS
+        )
+        self.prefix_cache = PrefixKVCache(
+            max_bytes=Config.LOCAL_LLM_PREFIX_CACHE_MB * 1024 * 1024,
+            min_tokens=Config.LOCAL_LLM_PREFIX_MIN_TOKENS
+        )
+        self.resident_name = f"llm:{model_name}"
+        get_model_manager().register(
+            self.resident_name,
+            load=self._load_resident,
+            unload=self._unload_resident,
+            device=self.device,
+            size_mb=1200 if self.device == "cuda" else 6000
+        )
         print(f"🖥️ Local LLM will use device: {self.device}")
+        if self.device == "cpu":
+            print(f"⚙️ CPU backend: {self.cpu_backend}")
         if self.device == "cuda":
             print(f"💾 GPU VRAM optimization: 4-bit quantization enabled")
     
     def load_model(self):
-        """Lazy load the model with 4-bit quantization"""
+        """Lazy load the model with 4-bit quantization (kept resident by the model manager)"""
+        get_model_manager().load(self.resident_name)
+        return self.pipeline
+    
+    def resident(self):
+        """Context manager pinning the model while it is used; yields (model, tokenizer)"""
+        return get_model_manager().acquire(self.resident_name)
+    
+    def _load_resident(self):
+        with self._load_lock:
+            self._load_model()
+            return self.model, self.tokenizer
+    
+    def _unload_resident(self, _resident=None):
+        with self._load_lock:
+            self.model = None
+            self.tokenizer = None
+            self.pipeline = None
+        # Cached KV prefixes are useless without the model
+        self.prefix_cache.clear()
+    
+    def _load_model(self):
         if self.model is None:
             try:
                 print(f"🔄 Loading local LLM: {self.model_name}...")
                 
-                # Load tokenizer
+                # Load tokenizer (left padding for batched generation)
                 self.tokenizer = AutoTokenizer.from_pretrained(
                     self.model_name,
-                    trust_remote_code=True
+                    trust_remote_code=True,
+                    padding_side="left"
                 )
+                if self.tokenizer.pad_token is None:
+                    self.tokenizer.pad_token = self.tokenizer.eos_token
                 
                 # Configure 4-bit quantization for 4GB VRAM
                 if self.device == "cuda":
@@ -63,23 +171,25 @@ class LocalLLM:
                         trust_remote_code=True
                     )
                 else:
-                    # CPU mode - no quantization
-                    self.model = AutoModelForCausalLM.from_pretrained(
-                        self.model_name,
-                        torch_dtype=torch.float32,
-                        trust_remote_code=True
-                    )
-                    self.model = self.model.to(self.device)
+                    self.model = self._load_cpu_model()
                 
                 # Create pipeline without device parameter when using device_map="auto"
-                self.pipeline = pipeline(
-                    "text-generation",
-                    model=self.model,
-                    tokenizer=self.tokenizer
-                )
+                try:
+                    self.pipeline = pipeline(
+                        "text-generation",
+                        model=self.model,
+                        tokenizer=self.tokenizer
+                    )
+                except Exception as e:
+                    # Not every backend's model class is accepted by pipeline(); generation uses the model directly
+                    print(f"⚠️ text-generation pipeline unavailable for this backend: {e}")
+                    self.pipeline = None
                 
-                print("✓ Local LLM loaded successfully with 4-bit quantization!")
-                print("📊 Memory usage: ~1-1.5GB VRAM (model weights)")
+                if self.device == "cuda":
+                    print("✓ Local LLM loaded successfully with 4-bit quantization!")
+                    print("📊 Memory usage: ~1-1.5GB VRAM (model weights)")
+                else:
+                    print(f"✓ Local LLM loaded successfully on CPU ({self.cpu_backend})!")
                 
             except Exception as e:
                 print(f"✗ Error loading local LLM: {e}")
@@ -87,6 +197,272 @@ class LocalLLM:
         
         return self.pipeline
     
+    def _load_cpu_model(self):
+        """
+        Load the model for CPU inference with the configured backend
+        
+        - fp32: original weights (largest, slowest)
+        - bf16: half-size weights, used only if the CPU has native bf16 support
+        - int8: torch dynamic int8 quantization of all Linear layers
+        - onnx: ONNX Runtime graph exported with optimum
+        
+        Converted weights are saved under Config.LOCAL_LLM_CACHE_DIR, so the
+        conversion (and loading the fp32 weights) happens only once.
+        """
+        backend = self.cpu_backend
+        if backend == "bf16" and not _cpu_supports_bf16():
+            print("⚠️ CPU has no native bf16 support, falling back to fp32")
+            backend = "fp32"
+        if backend == "onnx" and not OPTIMUM_AVAILABLE:
+            print("⚠️ optimum[onnxruntime] not installed, falling back to int8")
+            backend = "int8"
+        self.cpu_backend = backend
+        
+        cache_dir = os.path.join(Config.LOCAL_LLM_CACHE_DIR, self.model_name.replace("/", "--"), backend)
+        
+        if backend == "fp32":
+            # CPU mode - no quantization
+            model = AutoModelForCausalLM.from_pretrained(
+                self.model_name,
+                torch_dtype=torch.float32,
+                trust_remote_code=True
+            )
+            return model.to(self.device)
+        
+        if backend == "onnx":
+            if os.path.exists(os.path.join(cache_dir, "config.json")):
+                return ORTModelForCausalLM.from_pretrained(cache_dir)
+            print("🔄 Exporting model to ONNX (first run only)...")
+            model = ORTModelForCausalLM.from_pretrained(self.model_name, export=True, trust_remote_code=True)
+            model.save_pretrained(cache_dir)
+            return model
+        
+        if backend == "bf16":
+            source = cache_dir if os.path.exists(os.path.join(cache_dir, "config.json")) else self.model_name
+            model = AutoModelForCausalLM.from_pretrained(
+                source,
+                torch_dtype=torch.bfloat16,
+                low_cpu_mem_usage=True,
+                trust_remote_code=True
+            )
+            if source == self.model_name:
+                model.save_pretrained(cache_dir)
+            return model.eval()
+        
+        # int8: the quantized module is pickled whole, so later loads never
+        # materialize the fp32 weights
+        path = os.path.join(cache_dir, "model.pt")
+        if os.path.exists(path):
+            return torch.load(path, weights_only=False).eval()
+        
+        print("🔄 Quantizing Linear layers to int8 (first run only)...")
+        model = AutoModelForCausalLM.from_pretrained(
+            self.model_name,
+            torch_dtype=torch.float32,
+            low_cpu_mem_usage=True,
+            trust_remote_code=True
+        )
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        torch.save(model, tmp_path)
+        os.replace(tmp_path, path)
+        return model.eval()
+    
+    def submit(
+        self,
+        messages: List[Dict[str, str]],
+        max_new_tokens: int = 512,
+        temperature: float = 0.7,
+        top_p: float = 1.0,
+        top_k: int = 50
+    ) -> Future:
+        """
+        Queue a chat completion in the batch scheduler
+        
+        Concurrent requests are batched into one generate call (see
+        GenerationBatcher).
+        
+        Returns:
+            Future resolving to a dict with text, token counts, queue_ms and batch_size
+        """
+        return self.batcher.submit(
+            messages,
+            max_new_tokens=max_new_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            top_k=top_k
+        )
+    
+    def _result(self, output: Dict[str, Any]) -> Dict[str, Any]:
+        """Response dict for a finished batch request"""
+        return {
+            "success": True,
+            "response": output["text"],
+            "model": self.model_name,
+            "device": self.device,
+            "usage": {
+                "prompt_tokens": output["prompt_tokens"],
+                "completion_tokens": output["completion_tokens"],
+                "queue_ms": output["queue_ms"],
+                "batch_size": output["batch_size"]
+            }
+        }
+    
+    async def agenerate(
+        self,
+        prompt: str,
+        max_length: int = 512,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        top_k: int = 50
+    ) -> Dict[str, Any]:
+        """
+        Generate text without blocking the event loop or a worker thread
+        
+        Same arguments and result as generate().
+        """
+        try:
+            future = self.submit(
+                [{"role": "user", "content": prompt}],
+                max_new_tokens=max_length,
+                temperature=temperature,
+                top_p=top_p,
+                top_k=top_k
+            )
+            return self._result(await asyncio.wrap_future(future))
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "model": self.model_name
+            }
+    
+    def _generate_cached(
+        self,
+        messages: List[Dict[str, str]],
+        max_new_tokens: int = 512,
+        temperature: float = 0.7,
+        top_p: float = 1.0,
+        top_k: int = 50
+    ) -> str:
+        """
+        Generate with prefix KV-cache reuse
+        
+        The longest cached prefix of the templated prompt is reused, so only
+        new tokens are prefilled. Afterwards the system-message prefix, the
+        prompt and the whole exchange are stored, which covers repeated
+        instructions and the next turn of a conversation.
+        
+        Runs on the batch scheduler thread (GenerationBatcher.run_exclusive)
+        so it never overlaps a batched generate call on the same model.
+        
+        Returns:
+            Generated text
+        """
+        def run(model, tokenizer):
+            text = tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+            prompt_ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+            prefix_length, past = self.prefix_cache.lookup(prompt_ids)
+        
+            input_ids = torch.tensor([prompt_ids], device=model.device)
+            extra = {"past_key_values": past} if past is not None else {}
+            with torch.inference_mode():
+                output = model.generate(
+                    input_ids=input_ids,
+                    attention_mask=torch.ones_like(input_ids),
+                    max_new_tokens=max_new_tokens,
+                    temperature=temperature,
+                    top_p=top_p,
+                    top_k=top_k,
+                    do_sample=True,
+                    return_dict_in_generate=True,
+                    pad_token_id=tokenizer.pad_token_id,
+                    **extra
+                )
+        
+            sequence = output.sequences[0].tolist()
+            cache = output.past_key_values
+            if cache is not None and hasattr(cache, "crop"):
+                # The cache covers every token fed to the model (all but the last)
+                self.prefix_cache.store(sequence, cache, length=cache.get_seq_length())
+                self.prefix_cache.store(prompt_ids, cache)
+                if messages and messages[0]["role"] == "system":
+                    system_text = tokenizer.apply_chat_template(messages[:1], tokenize=False)
+                    system_ids = tokenizer(system_text, add_special_tokens=False)["input_ids"]
+                    if prompt_ids[:len(system_ids)] == system_ids:
+                        self.prefix_cache.store(prompt_ids, cache, length=len(system_ids))
+        
+            return tokenizer.decode(sequence[len(prompt_ids):], skip_special_tokens=True)
+        
+        return self.batcher.run_exclusive(run).result()
+    
+    def generate_stream(
+        self,
+        messages: List[Dict[str, str]],
+        max_length: int = 512,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        top_k: int = 50,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Iterator[str]:
+        """
+        Generate text and yield it piece by piece as tokens are decoded
+        
+        Generation runs in the model worker pool (outside the batch
+        scheduler, which cannot stream individual rows). Closing the
+        generator, or setting cancel_event, stops generation at the next
+        token.
+        
+        Args:
+            messages: Chat messages ({"role", "content"})
+            max_length: Maximum new tokens
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+            top_k: Top-k sampling parameter
+            cancel_event: Optional event that aborts generation when set
+            
+        Yields:
+            Decoded text deltas
+        """
+        cancel_event = cancel_event or threading.Event()
+        with self.resident() as (model, tokenizer):
+            text = tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+            inputs = tokenizer(text, return_tensors="pt").to(model.device)
+            streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        
+            def run():
+                if cancel_event.is_set():
+                    # Cancelled while waiting for a model worker
+                    streamer.end()
+                    return
+                try:
+                    with torch.inference_mode():
+                        model.generate(
+                            **inputs,
+                            max_new_tokens=max_length,
+                            temperature=temperature,
+                            top_p=top_p,
+                            top_k=top_k,
+                            do_sample=True,
+                            streamer=streamer,
+                            stopping_criteria=StoppingCriteriaList([_CancelCriteria(cancel_event)]),
+                            pad_token_id=tokenizer.pad_token_id
+                        )
+                except Exception:
+                    # Unblock the consumer; the error is re-raised from the future below
+                    streamer.end()
+                    raise
+        
+            future = get_model_pool().submit(run)
+            try:
+                for piece in streamer:
+                    if piece:
+                        yield piece
+                future.result()
+            finally:
+                cancel_event.set()
+    
     def generate(
         self,
         prompt: str,
@@ -109,34 +485,21 @@ class LocalLLM:
             Dict with generated text and metadata
         """
         try:
-            # Load model if not loaded
-            pipe = self.load_model()
-            
             # Format prompt for Qwen chat model
             messages = [
                 {"role": "user", "content": prompt}
             ]
             
-            # Generate
-            outputs = pipe(
+            # Generate (batched with concurrent requests)
+            output = self.submit(
                 messages,
                 max_new_tokens=max_length,
                 temperature=temperature,
                 top_p=top_p,
-                top_k=top_k,
-                do_sample=True,
-                return_full_text=False
-            )
-            
-            # Extract generated text
-            generated_text = outputs[0]["generated_text"]
+                top_k=top_k
+            ).result()
             
-            return {
-                "success": True,
-                "response": generated_text,
-                "model": self.model_name,
-                "device": self.device
-            }
+            return self._result(output)
             
         except Exception as e:
             return {
@@ -165,25 +528,17 @@ class LocalLLM:
             Dict with response and updated history
         """
         try:
-            # Load model if not loaded
-            pipe = self.load_model()
-            
             # Build messages
             messages = history if history else []
             messages.append({"role": "user", "content": message})
             
-            # Generate
-            outputs = pipe(
+            # Generate, reusing the KV cache of the earlier turns
+            response = self._generate_cached(
                 messages,
                 max_new_tokens=max_length,
-                temperature=temperature,
-                do_sample=True,
-                return_full_text=False
+                temperature=temperature
             )
             
-            # Extract response
-            response = outputs[0]["generated_text"]
-            
             # Update history
             messages.append({"role": "assistant", "content": response})
             
@@ -201,56 +556,32 @@ class LocalLLM:
                 "model": self.model_name
             }
     
-    def create_presentation_slides(self, topic: str, num_slides: int = 5) -> Dict[str, Any]:
+    def create_presentation_slides(
+        self,
+        topic: str,
+        num_slides: int = 5,
+        image_preview: Optional[bool] = None
+    ) -> Dict[str, Any]:
         """
         Create presentation slides using Qwen local LLM with AI-generated images
         
         Args:
             topic: Topic for the presentation
             num_slides: Number of slides to create
+            image_preview: Fast low-step images (default: Config.SD_PREVIEW_MODE)
             
         Returns:
             Dict with slide content and file path
         """
         try:
-            # Generate slide content using Qwen
-            prompt = f"""Tạo một bài thuyết trình về chủ đề: {topic}
-
-Yêu cầu:
-- Tạo {num_slides} slide
-- Mỗi slide có tiêu đề và nội dung chi tiết
-- Nội dung phải logic, mạch lạc
-- Sử dụng bullet points
-- Thêm trường "image_prompt" cho một số slide để tạo hình minh họa (bằng tiếng Anh, mô tả chi tiết)
-- Format JSON như sau:
-{{
-  "title": "Tiêu đề bài thuyết trình",
-  "slides": [
-    {{
-      "title": "Tiêu đề slide",
-      "content": ["Điểm 1", "Điểm 2", "Điểm 3"],
-      "image_prompt": "detailed image description in English (optional)"
-    }}
-  ]
-}}
-
-Chỉ trả về JSON, không thêm text khác."""
-
-            # Load model if not loaded
-            pipe = self.load_model()
-            
-            # Generate
-            messages = [{"role": "user", "content": prompt}]
-            outputs = pipe(
-                messages,
-                max_new_tokens=1024,
-                temperature=0.7,
-                do_sample=True,
-                return_full_text=False
-            )
+            # Generate slide content using Qwen (instructions are a cached system prefix)
+            messages = [
+                {"role": "system", "content": self.SLIDES_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Tạo một bài thuyết trình về chủ đề: {topic}\n\nTạo {num_slides} slide."}
+            ]
+            text_response = self._generate_cached(messages, max_new_tokens=1024, temperature=0.7)
             
             # Parse JSON response
-            text_response = outputs[0]["generated_text"]
             # Clean up markdown code blocks if present
             if "```json" in text_response:
                 text_response = text_response.split("```json")[1].split("```")[0].strip()
@@ -259,82 +590,12 @@ Chỉ trả về JSON, không thêm text khác."""
             
             slides_data = json.loads(text_response)
             
-            # Initialize Text-to-Image model
-            text_to_image = TextToImage()
-            
-            # Determine which slides should have images (about 60% of content slides)
-            content_slides = slides_data.get("slides", [])
-            num_images = min(int(num_slides * 0.6), len(content_slides))
-            
-            # Create PowerPoint presentation
-            prs = Presentation()
-            prs.slide_width = Inches(10)
-            prs.slide_height = Inches(7.5)
-            
-            # Title slide
-            title_slide_layout = prs.slide_layouts[0]
-            slide = prs.slides.add_slide(title_slide_layout)
-            title = slide.shapes.title
-            title.text = slides_data.get("title", topic)
-            
-            # Content slides
-            images_generated = 0
-            for idx, slide_data in enumerate(content_slides):
-                bullet_slide_layout = prs.slide_layouts[1]
-                slide = prs.slides.add_slide(bullet_slide_layout)
-                
-                title_shape = slide.shapes.title
-                title_shape.text = slide_data.get("title", "")
-                
-                body_shape = slide.placeholders[1]
-                tf = body_shape.text_frame
-                
-                for point in slide_data.get("content", []):
-                    p = tf.add_paragraph()
-                    p.text = point
-                    p.level = 0
-                
-                # Generate and add image if needed
-                should_add_image = (
-                    images_generated < num_images and
-                    (slide_data.get("image_prompt") or idx % 2 == 0)  # Add image to even slides or if prompt exists
-                )
-                
-                if should_add_image:
-                    # Use provided prompt or generate one from slide title
-                    image_prompt = slide_data.get("image_prompt") or f"{slide_data.get('title', topic)}, professional illustration, high quality"
-                    
-                    # Generate image
-                    result = text_to_image.generate_image(image_prompt)
-                    
-                    if result["success"]:
-                        # Add image to slide (bottom right corner)
-                        left = Inches(7)  # Right side
-                        top = Inches(4.5)  # Bottom
-                        width = Inches(2.5)
-                        
-                        slide.shapes.add_picture(
-                            result["image_path"],
-                            left, top,
-                            width=width
-                        )
-                        images_generated += 1
-                        print(f"✓ Added image to slide {idx + 1}")
-            
-            # Cleanup Text-to-Image model
-            text_to_image.cleanup()
-            
-            # Save presentation
-            os.makedirs("slides", exist_ok=True)
-            filename = f"slides/presentation_{topic[:30].replace(' ', '_')}.pptx"
-            prs.save(filename)
+            # Images render in batches on the shared (resident) Text-to-Image model
+            deck = build_presentation(slides_data, topic, num_slides, get_text_to_image(), preview=image_preview)
             
             return {
                 "success": True,
-                "filename": filename,
-                "title": slides_data.get("title", topic),
-                "num_slides": len(content_slides) + 1,
-                "num_images": images_generated,
+                **deck,
                 "model": self.model_name
             }
             
@@ -346,24 +607,9 @@ Chỉ trả về JSON, không thêm text khác."""
             }
     
     def cleanup(self):
-        """Clean up model from memory"""
-        if self.model is not None:
-            del self.model
-            self.model = None
-        
-        if self.tokenizer is not None:
-            del self.tokenizer
-            self.tokenizer = None
-        
-        if self.pipeline is not None:
-            del self.pipeline
-            self.pipeline = None
-        
-        # Clear CUDA cache
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
-        
-        print("Local LLM cleaned up")
+        """Unload the model now (skipped while a request is using it)"""
+        if get_model_manager().unload(self.resident_name):
+            print("Local LLM cleaned up")
 
 
 class TextToImage:
@@ -377,71 +623,187 @@ class TextToImage:
             model_id: Hugging Face model ID (default: prompthero/openjourney)
         """
         self.model_id = model_id
-        self.pipe = None
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.resident_name = f"sd:{model_id}"
+        get_model_manager().register(
+            self.resident_name,
+            load=self._load_pipeline,
+            device=self.device,
+            size_mb=2100 if self.device == "cuda" else 4200
+        )
         print(f"🖼️ Text-to-Image will use device: {self.device}")
     
+    def _load_pipeline(self):
+        try:
+            print(f"🔄 Loading Text-to-Image model: {self.model_id}...")
+            
+            if self.device == "cuda":
+                pipe = StableDiffusionPipeline.from_pretrained(
+                    self.model_id,
+                    torch_dtype=torch.float16
+                )
+                pipe = pipe.to("cuda")
+                # Lower peak VRAM so batches fit on small GPUs
+                pipe.enable_attention_slicing()
+                print("✓ Text-to-Image model loaded successfully on GPU!")
+            else:
+                pipe = StableDiffusionPipeline.from_pretrained(
+                    self.model_id,
+                    torch_dtype=torch.float32
+                )
+                pipe = pipe.to("cpu")
+                print("✓ Text-to-Image model loaded successfully on CPU!")
+                print("⚠️ Warning: CPU inference will be slow. Consider using GPU for faster generation.")
+            
+            if Config.SD_FAST_SCHEDULER:
+                # DPM-Solver++ reaches good quality in ~20-25 steps (vs 50 for the default PNDM)
+                pipe.scheduler = DPMSolverMultistepScheduler.from_config(pipe.scheduler.config)
+            pipe.set_progress_bar_config(disable=True)
+            return pipe
+        
+        except Exception as e:
+            print(f"✗ Error loading Text-to-Image model: {e}")
+            raise
+    
     def load_model(self):
-        """Lazy load the Stable Diffusion model"""
-        if self.pipe is None:
-            try:
-                print(f"🔄 Loading Text-to-Image model: {self.model_id}...")
-                
-                if self.device == "cuda":
-                    self.pipe = StableDiffusionPipeline.from_pretrained(
-                        self.model_id,
-                        torch_dtype=torch.float16
-                    )
-                    self.pipe = self.pipe.to("cuda")
-                    print("✓ Text-to-Image model loaded successfully on GPU!")
-                else:
-                    self.pipe = StableDiffusionPipeline.from_pretrained(
-                        self.model_id,
-                        torch_dtype=torch.float32
-                    )
-                    self.pipe = self.pipe.to("cpu")
-                    print("✓ Text-to-Image model loaded successfully on CPU!")
-                    print("⚠️ Warning: CPU inference will be slow. Consider using GPU for faster generation.")
-                
-            except Exception as e:
-                print(f"✗ Error loading Text-to-Image model: {e}")
+        """Lazy load the Stable Diffusion model (kept resident by the model manager)"""
+        return get_model_manager().load(self.resident_name)
+    
+    def _pipe_kwargs(self, preview: Optional[bool] = None) -> Dict[str, Any]:
+        """Sampling arguments for normal or preview (reduced steps and size) generation"""
+        if preview is None:
+            preview = Config.SD_PREVIEW_MODE == "on" or (Config.SD_PREVIEW_MODE == "auto" and self.device == "cpu")
+        if preview:
+            size = Config.SD_PREVIEW_SIZE
+            return {"num_inference_steps": Config.SD_PREVIEW_STEPS, "height": size, "width": size}
+        size = Config.SD_IMAGE_SIZE
+        return {"num_inference_steps": Config.SD_STEPS, "height": size, "width": size}
+    
+    def _image_key(self, prompt: str, seed: int, kwargs: Dict[str, Any]) -> str:
+        """Image store key for a prompt under the given sampling arguments"""
+        return image_key(
+            self.model_id,
+            prompt,
+            seed=seed,
+            width=kwargs["width"],
+            height=kwargs["height"],
+            steps=kwargs["num_inference_steps"],
+            scheduler="dpmsolver++" if Config.SD_FAST_SCHEDULER else "default"
+        )
+    
+    def _run_batch(self, pipe, prompts: List[str], seeds: List[int], kwargs: Dict[str, Any]) -> List[Image.Image]:
+        """Render prompts in one call, halving the batch on CUDA out-of-memory"""
+        try:
+            # One seeded generator per image keeps each result independent of its batch
+            generators = [torch.Generator("cpu").manual_seed(seed) for seed in seeds]
+            return pipe(prompt=prompts, generator=generators, **kwargs).images
+        except torch.cuda.OutOfMemoryError:
+            if len(prompts) == 1:
                 raise
+            torch.cuda.empty_cache()
+            half = len(prompts) // 2
+            print(f"⚠️ Out of GPU memory with {len(prompts)} images, splitting batch")
+            return self._run_batch(pipe, prompts[:half], seeds[:half], kwargs) + \
+                self._run_batch(pipe, prompts[half:], seeds[half:], kwargs)
+    
+    def generate_images(
+        self,
+        prompts: List[str],
+        batch_size: Optional[int] = None,
+        preview: Optional[bool] = None
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Generate images for many prompts in batched pipeline calls
         
-        return self.pipe
+        Each prompt is seeded from its text, so a prompt seen before is
+        served from the image store without loading or running the model.
+        
+        Args:
+            prompts: Text descriptions
+            batch_size: Images per pipeline call (default: Config.SD_BATCH_SIZE)
+            preview: Fast low-step images (default: Config.SD_PREVIEW_MODE)
+            
+        Yields:
+            (prompt index, result dict as from generate_image); cached images first,
+            then the rest as each batch finishes
+        """
+        batch_size = max(1, batch_size or Config.SD_BATCH_SIZE)
+        kwargs = self._pipe_kwargs(preview)
+        store = get_image_store()
+        
+        pending = []  # (index, prompt, seed, key)
+        for index, prompt in enumerate(prompts):
+            seed = prompt_seed(prompt)
+            key = self._image_key(prompt, seed, kwargs)
+            path = store.get(key)
+            if path:
+                yield index, {"success": True, "image_path": path, "prompt": prompt, "model": self.model_id, "cached": True}
+            else:
+                pending.append((index, prompt, seed, key))
+        
+        if not pending:
+            return
+        
+        with get_model_manager().acquire(self.resident_name) as pipe:
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start:start + batch_size]
+                print(f"🎨 Generating {len(batch)} images ({kwargs['num_inference_steps']} steps)...")
+                try:
+                    images = self._run_batch(pipe, [b[1] for b in batch], [b[2] for b in batch], kwargs)
+                except Exception as e:
+                    print(f"✗ Error generating images: {e}")
+                    for index, _, _, _ in batch:
+                        yield index, {"success": False, "error": str(e), "model": self.model_id}
+                    continue
+                
+                for (index, prompt, _, key), image in zip(batch, images):
+                    yield index, {
+                        "success": True,
+                        "image_path": store.put_image(key, image),
+                        "prompt": prompt,
+                        "model": self.model_id,
+                        "cached": False
+                    }
     
-    def generate_image(self, prompt: str, output_path: str = None) -> Dict[str, Any]:
+    def generate_image(self, prompt: str, output_path: str = None, seed: Optional[int] = None) -> Dict[str, Any]:
         """
         Generate image from text prompt
         
         Args:
             prompt: Text description for image generation
-            output_path: Path to save the image (optional)
+            output_path: Path to save a copy of the image (optional)
+            seed: Sampling seed (default: derived from the prompt)
             
         Returns:
             Dict with image path and metadata
         """
         try:
-            # Load model if not loaded
-            pipe = self.load_model()
-            
-            print(f"🎨 Generating image: '{prompt[:50]}...'")
-            
-            # Generate image
-            image = pipe(prompt).images[0]
-            
-            # Save image
-            if output_path is None:
-                os.makedirs("slides/images", exist_ok=True)
-                output_path = f"slides/images/generated_{random.randint(1000, 9999)}.png"
+            kwargs = self._pipe_kwargs()
+            seed = prompt_seed(prompt) if seed is None else seed
+            key = self._image_key(prompt, seed, kwargs)
+            store = get_image_store()
+            
+            image_path = store.get(key)
+            cached = image_path is not None
+            if not cached:
+                print(f"🎨 Generating image: '{prompt[:50]}...'")
+                
+                # Generate image (loads the model on first use)
+                with get_model_manager().acquire(self.resident_name) as pipe:
+                    image = self._run_batch(pipe, [prompt], [seed], kwargs)[0]
+                image_path = store.put_image(key, image)
             
-            image.save(output_path)
-            print(f"✓ Image saved: {output_path}")
+            if output_path is not None:
+                shutil.copyfile(image_path, output_path)
+                image_path = output_path
+            print(f"✓ Image {'served from cache' if cached else 'saved'}: {image_path}")
             
             return {
                 "success": True,
-                "image_path": output_path,
+                "image_path": image_path,
                 "prompt": prompt,
-                "model": self.model_id
+                "model": self.model_id,
+                "cached": cached
             }
             
         except Exception as e:
@@ -453,16 +815,9 @@ class TextToImage:
             }
     
     def cleanup(self):
-        """Clean up model from memory"""
-        if self.pipe is not None:
-            del self.pipe
-            self.pipe = None
-        
-        # Clear CUDA cache
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
-        
-        print("Text-to-Image model cleaned up")
+        """Unload the model now (skipped while an image is being generated)"""
+        if get_model_manager().unload(self.resident_name):
+            print("Text-to-Image model cleaned up")
 
 
 class GeminiAPI:
@@ -478,7 +833,7 @@ class GeminiAPI:
         """
         self.api_key = api_key
         self.model_name = model_name
-        self.client = genai.Client(api_key=api_key)
+        self.client = get_gemini_client(api_key)
         print(f"✓ Gemini API initialized with model: {model_name}")
     
     def generate(self, prompt: str, max_length: int = 2048, temperature: float = 0.7) -> Dict[str, Any]:
@@ -519,13 +874,51 @@ class GeminiAPI:
                 "model": self.model_name
             }
     
-    def create_presentation_slides(self, topic: str, num_slides: int = 5) -> Dict[str, Any]:
+    async def agenerate(self, prompt: str, max_length: int = 2048, temperature: float = 0.7) -> Dict[str, Any]:
+        """
+        Generate text with the async Gemini client (no worker thread needed)
+        
+        Same arguments and result as generate().
+        """
+        try:
+            config = types.GenerateContentConfig(
+                temperature=temperature,
+                max_output_tokens=max_length
+            )
+            
+            response = await self.client.aio.models.generate_content(
+                model=self.model_name,
+                contents=prompt,
+                config=config
+            )
+            
+            return {
+                "success": True,
+                "response": response.text,
+                "model": self.model_name,
+                "device": "cloud"
+            }
+            
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "model": self.model_name
+            }
+    
+    def create_presentation_slides(
+        self,
+        topic: str,
+        num_slides: int = 5,
+        image_preview: Optional[bool] = None
+    ) -> Dict[str, Any]:
         """
         Create presentation slides using Gemini AI with AI-generated images
         
         Args:
             topic: Topic for the presentation
             num_slides: Number of slides to create
+            image_preview: Fast low-step images (default: Config.SD_PREVIEW_MODE)
             
         Returns:
             Dict with slide content and file path
@@ -574,82 +967,12 @@ Chỉ trả về JSON, không thêm text khác."""
             
             slides_data = json.loads(text_response)
             
-            # Initialize Text-to-Image model
-            text_to_image = TextToImage()
-            
-            # Determine which slides should have images (about 60% of content slides)
-            content_slides = slides_data.get("slides", [])
-            num_images = min(int(num_slides * 0.6), len(content_slides))
-            
-            # Create PowerPoint presentation
-            prs = Presentation()
-            prs.slide_width = Inches(10)
-            prs.slide_height = Inches(7.5)
-            
-            # Title slide
-            title_slide_layout = prs.slide_layouts[0]
-            slide = prs.slides.add_slide(title_slide_layout)
-            title = slide.shapes.title
-            title.text = slides_data.get("title", topic)
-            
-            # Content slides
-            images_generated = 0
-            for idx, slide_data in enumerate(content_slides):
-                bullet_slide_layout = prs.slide_layouts[1]
-                slide = prs.slides.add_slide(bullet_slide_layout)
-                
-                title_shape = slide.shapes.title
-                title_shape.text = slide_data.get("title", "")
-                
-                body_shape = slide.placeholders[1]
-                tf = body_shape.text_frame
-                
-                for point in slide_data.get("content", []):
-                    p = tf.add_paragraph()
-                    p.text = point
-                    p.level = 0
-                
-                # Generate and add image if needed
-                should_add_image = (
-                    images_generated < num_images and
-                    (slide_data.get("image_prompt") or idx % 2 == 0)  # Add image to even slides or if prompt exists
-                )
-                
-                if should_add_image:
-                    # Use provided prompt or generate one from slide title
-                    image_prompt = slide_data.get("image_prompt") or f"{slide_data.get('title', topic)}, professional illustration, high quality"
-                    
-                    # Generate image
-                    result = text_to_image.generate_image(image_prompt)
-                    
-                    if result["success"]:
-                        # Add image to slide (bottom right corner)
-                        left = Inches(7)  # Right side
-                        top = Inches(4.5)  # Bottom
-                        width = Inches(2.5)
-                        
-                        slide.shapes.add_picture(
-                            result["image_path"],
-                            left, top,
-                            width=width
-                        )
-                        images_generated += 1
-                        print(f"✓ Added image to slide {idx + 1}")
-            
-            # Cleanup Text-to-Image model
-            text_to_image.cleanup()
-            
-            # Save presentation
-            os.makedirs("slides", exist_ok=True)
-            filename = f"slides/presentation_{topic[:30].replace(' ', '_')}.pptx"
-            prs.save(filename)
+            # Images render in batches on the shared (resident) Text-to-Image model
+            deck = build_presentation(slides_data, topic, num_slides, get_text_to_image(), preview=image_preview)
             
             return {
                 "success": True,
-                "filename": filename,
-                "title": slides_data.get("title", topic),
-                "num_slides": len(content_slides) + 1,
-                "num_images": images_generated,
+                **deck,
                 "model": self.model_name
             }
             
@@ -663,7 +986,12 @@ Chỉ trả về JSON, không thêm text khác."""
 
 # Global instance (will be initialized on first use)
 local_llm = None
-gemini_api = None
+text_to_image = None
+_gemini_apis = KeyedPool()
+
+def peek_local_llm() -> Optional[LocalLLM]:
+    """Get the local LLM if it has been created (no side effects)"""
+    return local_llm
 
 def get_local_llm() -> LocalLLM:
     """Get or create local LLM instance"""
@@ -672,8 +1000,13 @@ def get_local_llm() -> LocalLLM:
         local_llm = LocalLLM()
     return local_llm
 
+def get_text_to_image() -> TextToImage:
+    """Get or create the shared Text-to-Image instance"""
+    global text_to_image
+    if text_to_image is None:
+        text_to_image = TextToImage()
+    return text_to_image
+
 def get_gemini_api(api_key: str, model_name: str = "gemini-2.5-flash") -> GeminiAPI:
-    """Get or create Gemini API instance"""
-    global gemini_api
-    gemini_api = GeminiAPI(api_key, model_name)
-    return gemini_api
+    """Get or create the pooled Gemini API instance for (api_key, model_name)"""
+    return _gemini_apis.get((api_key, model_name), lambda: GeminiAPI(api_key, model_name))
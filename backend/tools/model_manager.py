@@ -0,0 +1,303 @@
+"""Process-wide residency manager for local models"""
+import gc
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import torch
+from config import Config
+
+
+def estimate_nbytes(obj: Any) -> int:
+    """
+    Memory held by a model's tensors
+
+    Follows torch modules, transformers/diffusers pipelines (their model or
+    components) and tuples/lists of those; other objects count as 0.
+    """
+    seen = set()
+
+    def visit(value, depth: int = 0) -> int:
+        if value is None or depth > 3 or id(value) in seen:
+            return 0
+        seen.add(id(value))
+        if isinstance(value, torch.nn.Module):
+            total = 0
+            for tensor in list(value.parameters()) + list(value.buffers()):
+                if id(tensor) not in seen:
+                    seen.add(id(tensor))
+                    total += tensor.numel() * tensor.element_size()
+            return total
+        if isinstance(value, (tuple, list)):
+            return sum(visit(item, depth + 1) for item in value)
+        components = getattr(value, "components", None)
+        if isinstance(components, dict):
+            return sum(visit(item, depth + 1) for item in components.values())
+        return visit(getattr(value, "model", None), depth + 1)
+
+    return visit(obj)
+
+
+class _Resident:
+    """Bookkeeping for one registered model"""
+
+    def __init__(self, name: str, load: Callable[[], Any], unload: Optional[Callable[[Any], None]],
+                 device: str, size_mb: float):
+        self.name = name
+        self.load = load
+        self.unload = unload
+        self.device = device
+        self.estimate = int(size_mb * 1024 * 1024)
+        self.obj = None
+        self.nbytes = 0
+        self.refs = 0
+        self.last_used = 0.0
+        self.load_lock = threading.Lock()
+        self.loads = 0
+        self.load_seconds = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return self.obj is not None
+
+
+class ModelManager:
+    """
+    Keeps hot models resident and unloads cold ones predictably
+
+    Tools register a loader per model and wrap each use in `acquire()`,
+    which loads the model on first use and pins it (reference count) while
+    it runs. Unpinned models are unloaded after `idle_ttl` seconds without
+    use, and least-recently-used unpinned models are evicted when loading
+    another model would exceed the RAM or VRAM budget of its device. Pinned
+    models are never evicted; if they alone exceed the budget the new model
+    is loaded anyway and a warning is printed.
+    """
+
+    def __init__(self, ram_budget_mb: float, vram_budget_mb: float, idle_ttl: float):
+        """
+        Initialize model manager
+
+        Args:
+            ram_budget_mb: Budget for models on the CPU
+            vram_budget_mb: Budget for models on the GPU
+            idle_ttl: Seconds an unused model stays loaded (0 disables idle unloading)
+        """
+        self.budgets = {
+            "cpu": int(ram_budget_mb * 1024 * 1024),
+            "cuda": int(vram_budget_mb * 1024 * 1024)
+        }
+        self.idle_ttl = idle_ttl
+        self._models: Dict[str, _Resident] = {}
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+        self.evictions = 0
+        self.idle_unloads = 0
+
+    # ---------- Registration ----------
+
+    def register(
+        self,
+        name: str,
+        load: Callable[[], Any],
+        unload: Optional[Callable[[Any], None]] = None,
+        device: str = "cpu",
+        size_mb: float = 0
+    ):
+        """
+        Register a model (the first registration of a name wins)
+
+        Args:
+            name: Unique model name
+            load: Loads and returns the model object
+            unload: Releases the object (default: drop the reference)
+            device: "cpu" or "cuda" - which budget the model counts against
+            size_mb: Size estimate used before the first load is measured
+        """
+        with self._lock:
+            if name not in self._models:
+                device = "cuda" if str(device).startswith("cuda") else "cpu"
+                self._models[name] = _Resident(name, load, unload, device, size_mb)
+            if self._reaper is None and self.idle_ttl > 0:
+                self._reaper = threading.Thread(target=self._reap, name="model-reaper", daemon=True)
+                self._reaper.start()
+
+    def _get(self, name: str) -> _Resident:
+        with self._lock:
+            entry = self._models.get(name)
+        if entry is None:
+            raise KeyError(f"Model '{name}' is not registered")
+        return entry
+
+    # ---------- Use ----------
+
+    @contextmanager
+    def acquire(self, name: str) -> Iterator[Any]:
+        """
+        Pin a model for the duration of a block, loading it if needed
+
+        Yields:
+            The loaded model object
+        """
+        entry = self._get(name)
+        with self._lock:
+            entry.refs += 1
+        try:
+            yield self._ensure_loaded(entry)
+        finally:
+            with self._lock:
+                entry.refs -= 1
+                entry.last_used = time.monotonic()
+
+    def load(self, name: str) -> Any:
+        """Load a model without pinning it (warm-up)"""
+        with self.acquire(name) as obj:
+            return obj
+
+    def _ensure_loaded(self, entry: _Resident) -> Any:
+        with entry.load_lock:
+            if entry.obj is None:
+                self._make_room(entry, entry.nbytes or entry.estimate)
+                print(f"🔄 Loading resident model: {entry.name}...")
+                started = time.perf_counter()
+                obj = entry.load()
+                elapsed = time.perf_counter() - started
+                nbytes = estimate_nbytes(obj) or entry.estimate
+                with self._lock:
+                    entry.obj = obj
+                    entry.nbytes = nbytes
+                    entry.loads += 1
+                    entry.load_seconds += elapsed
+                    entry.last_used = time.monotonic()
+                print(f"✓ {entry.name} resident ({nbytes / 1024 / 1024:.0f} MB {entry.device}, {elapsed:.1f}s)")
+                # The measured size may exceed the estimate
+                self._make_room(entry, 0)
+            return entry.obj
+
+    # ---------- Eviction ----------
+
+    def _make_room(self, entry: _Resident, needed: int):
+        """Evict LRU unpinned models on entry's device until `needed` more bytes fit"""
+        with self._lock:
+            budget = self.budgets[entry.device]
+            same_device = [e for e in self._models.values() if e.device == entry.device and e.loaded]
+            used = sum(e.nbytes for e in same_device)
+            victims: List[_Resident] = []
+            for candidate in sorted(same_device, key=lambda e: e.last_used):
+                if used + needed <= budget:
+                    break
+                if candidate is entry or candidate.refs:
+                    continue
+                victims.append(candidate)
+                used -= candidate.nbytes
+
+        for victim in victims:
+            if self._unload(victim, only_if_unused=True):
+                self.evictions += 1
+                print(f"♻️ Evicted {victim.name} to fit {entry.name} ({entry.device} budget)")
+        if used + needed > budget:
+            print(f"⚠️ {entry.device} model budget exceeded: pinned models leave no room for {entry.name}")
+
+    def _unload(self, entry: _Resident, only_if_unused: bool) -> bool:
+        """Release a model; skipped if it is being loaded (or, optionally, in use)"""
+        if not entry.load_lock.acquire(blocking=False):
+            return False
+        try:
+            with self._lock:
+                if entry.obj is None or (only_if_unused and entry.refs):
+                    return False
+                obj, entry.obj, entry.nbytes = entry.obj, None, 0
+            if entry.unload is not None:
+                entry.unload(obj)
+            del obj
+        finally:
+            entry.load_lock.release()
+
+        gc.collect()
+        if entry.device == "cuda" and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        return True
+
+    def unload(self, name: str) -> bool:
+        """
+        Unload a model now if nobody is using it
+
+        Returns:
+            True if the model was unloaded
+        """
+        unloaded = self._unload(self._get(name), only_if_unused=True)
+        if unloaded:
+            print(f"🗑️ Unloaded {name}")
+        return unloaded
+
+    def _reap(self):
+        """Background loop unloading models idle for longer than idle_ttl"""
+        interval = max(1.0, min(60.0, self.idle_ttl / 4))
+        while True:
+            time.sleep(interval)
+            now = time.monotonic()
+            with self._lock:
+                idle = [e for e in self._models.values()
+                        if e.loaded and not e.refs and now - e.last_used > self.idle_ttl]
+            for entry in idle:
+                if self._unload(entry, only_if_unused=True):
+                    self.idle_unloads += 1
+                    print(f"💤 Unloaded idle model {entry.name}")
+
+    # ---------- Metrics ----------
+
+    def stats(self) -> Dict[str, Any]:
+        """Get residency and memory metrics"""
+        now = time.monotonic()
+        with self._lock:
+            models = {
+                e.name: {
+                    "loaded": e.loaded,
+                    "device": e.device,
+                    "size_mb": round(e.nbytes / 1024 / 1024, 1),
+                    "refs": e.refs,
+                    "loads": e.loads,
+                    "avg_load_s": round(e.load_seconds / e.loads, 1) if e.loads else 0.0,
+                    "idle_s": round(now - e.last_used, 1) if e.loaded else None
+                }
+                for e in self._models.values()
+            }
+            usage = {
+                device: {
+                    "used_mb": round(sum(e.nbytes for e in self._models.values() if e.device == device)
+                                     / 1024 / 1024, 1),
+                    "budget_mb": round(budget / 1024 / 1024, 1)
+                }
+                for device, budget in self.budgets.items()
+            }
+        return {
+            "models": models,
+            "memory": usage,
+            "evictions": self.evictions,
+            "idle_unloads": self.idle_unloads,
+            "idle_ttl": self.idle_ttl
+        }
+
+
+# Global instance (created on first use)
+_model_manager = None
+_model_manager_lock = threading.Lock()
+
+
+def peek_model_manager() -> Optional[ModelManager]:
+    """Get the model manager if it has been created (no side effects)"""
+    return _model_manager
+
+
+def get_model_manager() -> ModelManager:
+    """Get or create the process-wide model manager"""
+    global _model_manager
+    with _model_manager_lock:
+        if _model_manager is None:
+            _model_manager = ModelManager(
+                ram_budget_mb=Config.MODEL_RAM_BUDGET_MB,
+                vram_budget_mb=Config.MODEL_VRAM_BUDGET_MB,
+                idle_ttl=Config.MODEL_IDLE_TTL
+            )
+        return _model_manager
@@ -0,0 +1,146 @@
+"""Prefix KV-cache for reusing prefill work across LLM calls"""
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def cache_nbytes(cache) -> int:
+    """Memory used by a transformers KV cache"""
+    layers = getattr(cache, "layers", None)
+    if layers is not None:
+        tensors = [t for layer in layers for t in (layer.keys, layer.values) if t is not None]
+    else:
+        tensors = list(cache.key_cache) + list(cache.value_cache)
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def _prefix_key(token_ids: List[int]) -> str:
+    return hashlib.sha1(np.asarray(token_ids, dtype=np.int64).tobytes()).hexdigest()
+
+
+class PrefixKVCache:
+    """
+    LRU store of past-key-values keyed by a hash of the token prefix
+
+    A lookup finds the longest stored prefix of a prompt (always leaving at
+    least one token to prefill) and returns a private copy of its cache, so
+    generation only has to encode the new tokens. Entries are evicted least
+    recently used first once their total size exceeds the byte budget.
+    """
+
+    def __init__(self, max_bytes: int, min_tokens: int = 32):
+        """
+        Initialize prefix cache
+
+        Args:
+            max_bytes: Total size of stored key/value tensors
+            min_tokens: Shorter prefixes are not worth storing
+        """
+        self.max_bytes = max_bytes
+        self.min_tokens = min_tokens
+        self._entries: "OrderedDict[str, Tuple[int, Any, int]]" = OrderedDict()  # key -> (length, cache, nbytes)
+        self._lengths: Dict[int, int] = {}  # prefix length -> number of entries
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.tokens_reused = 0
+        self.tokens_prefilled = 0
+        self.evictions = 0
+
+    def lookup(self, token_ids: List[int]) -> Tuple[int, Optional[Any]]:
+        """
+        Find the longest cached prefix of a prompt
+
+        Args:
+            token_ids: Full prompt token ids
+
+        Returns:
+            (prefix length, copy of its cache) or (0, None) on a miss
+        """
+        with self._lock:
+            self.lookups += 1
+            candidates = sorted((n for n in self._lengths if n < len(token_ids)), reverse=True)
+            for length in candidates:
+                key = _prefix_key(token_ids[:length])
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.tokens_reused += length
+                self.tokens_prefilled += len(token_ids) - length
+                cache = entry[1]
+                break
+            else:
+                self.tokens_prefilled += len(token_ids)
+                return 0, None
+
+        # generate() extends the cache in place, so callers get their own copy
+        return length, copy.deepcopy(cache)
+
+    def store(self, token_ids: List[int], cache, length: Optional[int] = None):
+        """
+        Store the cache for a prefix
+
+        Args:
+            token_ids: Tokens covered by the cache (at least `length` of them)
+            cache: KV cache; cropped to `length` on a copy if it is longer
+            length: Prefix length to store (default: len(token_ids))
+        """
+        length = len(token_ids) if length is None else length
+        if length < self.min_tokens:
+            return
+
+        key = _prefix_key(token_ids[:length])
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+
+        if cache.get_seq_length() > length:
+            cache = copy.deepcopy(cache)
+            cache.crop(length)
+        nbytes = cache_nbytes(cache)
+        if nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (length, cache, nbytes)
+            self._lengths[length] = self._lengths.get(length, 0) + 1
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                _, (old_length, _, old_bytes) = self._entries.popitem(last=False)
+                self._bytes -= old_bytes
+                self._lengths[old_length] -= 1
+                if not self._lengths[old_length]:
+                    del self._lengths[old_length]
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._lengths.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit ratio and memory metrics"""
+        with self._lock:
+            prefill = self.tokens_reused + self.tokens_prefilled
+            return {
+                "entries": len(self._entries),
+                "size_mb": round(self._bytes / 1024 / 1024, 2),
+                "max_mb": round(self.max_bytes / 1024 / 1024, 2),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_ratio": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                "token_reuse_ratio": round(self.tokens_reused / prefill, 4) if prefill else 0.0,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,284 @@
+"""Search decision stage for smart chat: local fast-path classifier with remote fallback"""
+import json
+import re
+import time
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from tools.cache import TTLCache, normalize_query
+
+
+class RuleDecisionStage:
+    """Keyword and regex rules scored into a search decision with a confidence"""
+
+    name = "rules"
+
+    # (pattern, weight) — patterns suggesting fresh/external information is needed
+    SEARCH_RULES = [
+        (r"tin tức|tin mới|\bnews\b|headline", 3.0),
+        (r"hôm nay|hiện tại|hiện nay|bây giờ|mới nhất|gần đây|cập nhật|\btoday\b|\bnow\b|\blatest\b|\bcurrent\b", 2.0),
+        (r"thời tiết|nhiệt độ|\bweather\b|\bforecast\b", 3.0),
+        (r"giá (vàng|xăng|usd|đô|bitcoin|btc|cổ phiếu|nhà|đất)|tỷ giá|chứng khoán|\bstock\b|\bprice\b|\bbitcoin\b|\bcrypto\b", 3.0),
+        (r"\bgiá\b", 1.5),
+        (r"tỉ số|kết quả trận|lịch thi đấu|\bscore\b|\bfixture\b", 2.5),
+        (r"\b20[2-9]\d\b", 1.5),
+        (r"ở đâu|địa chỉ|giờ mở cửa|\bwhere is\b|\bopening hours\b", 1.5),
+        (r"ai là|là ai|\bwho is\b|\bceo\b|tổng thống|thủ tướng", 1.0),
+        (r"phát hành|ra mắt|\brelease\b|\blaunch\b|sự kiện|\bevent\b", 1.5),
+    ]
+
+    # (pattern, weight) — patterns suggesting the model can answer from its own knowledge
+    NO_SEARCH_RULES = [
+        (r"^[\d\s\.\,\+\-\*/\^\(\)=x%]+$", 4.0),
+        (r"tính|giải phương trình|đạo hàm|tích phân|chứng minh|\bcalculate\b|\bsolve\b|\bderivative\b|\bintegral\b", 2.5),
+        (r"là gì|định nghĩa|khái niệm|giải thích|nghĩa là|\bwhat is\b|\bdefine\b|\bexplain\b|\bmeaning\b", 2.0),
+        (r"viết (code|hàm|chương trình|bài|đoạn)|\bwrite\b|\bcode\b|python|javascript|thuật toán|\balgorithm\b", 2.5),
+        (r"dịch|\btranslate\b|tóm tắt|\bsummarize\b", 2.5),
+        (r"lời khuyên|nên làm gì|làm thế nào|cách|\bhow to\b|\badvice\b", 1.5),
+        (r"bạn nghĩ|ý kiến|triết lý|ý nghĩa cuộc sống|\bopinion\b|\bphilosoph", 2.0),
+        (r"^(xin chào|chào|hello|hi|hey|cảm ơn|thanks|thank you)\b", 3.0),
+    ]
+
+    def __init__(self):
+        self._search_rules = [(re.compile(p, re.IGNORECASE), w) for p, w in self.SEARCH_RULES]
+        self._no_search_rules = [(re.compile(p, re.IGNORECASE), w) for p, w in self.NO_SEARCH_RULES]
+
+    def classify(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Score the query against both rule sets
+
+        Returns:
+            Decision dict with need_search, confidence and reason
+        """
+        # Rules are written against composed (NFC) text
+        query = unicodedata.normalize("NFC", query).strip()
+        search_score = sum(w for p, w in self._search_rules if p.search(query))
+        no_search_score = sum(w for p, w in self._no_search_rules if p.search(query))
+
+        if search_score == no_search_score:
+            return {
+                "need_search": False,
+                "confidence": 0.5,
+                "reason": "no decisive rule matched"
+            }
+
+        margin = abs(search_score - no_search_score)
+        return {
+            "need_search": search_score > no_search_score,
+            "confidence": round(min(0.99, 0.5 + 0.12 * margin), 2),
+            "reason": f"rules: +{search_score} search / -{no_search_score} no-search"
+        }
+
+
+class LocalLLMDecisionStage:
+    """Yes/no search decision from the bundled local Qwen model"""
+
+    name = "local_llm"
+
+    PROMPT = """Does answering this question require searching the web for up-to-date or external information (news, prices, weather, recent events, specific people/places/products)?
+Answer with only "yes" or "no".
+
+Question: {query}"""
+
+    def __init__(self, confidence: float = 0.8):
+        """
+        Args:
+            confidence: Confidence assigned to a clean yes/no answer
+        """
+        self.confidence = confidence
+
+    def classify(self, query: str) -> Optional[Dict[str, Any]]:
+        """Ask the local model; returns None if the answer is not a clean yes/no"""
+        from tools.local_llm import get_local_llm
+
+        result = get_local_llm().generate(
+            prompt=self.PROMPT.format(query=query),
+            max_length=4,
+            temperature=0.1
+        )
+        if not result.get("success"):
+            return None
+
+        answer = result["response"].strip().lower()
+        if answer.startswith("yes") or answer.startswith("có"):
+            need_search = True
+        elif answer.startswith("no") or answer.startswith("không"):
+            need_search = False
+        else:
+            return None
+
+        return {
+            "need_search": need_search,
+            "confidence": self.confidence,
+            "reason": f"local model answered '{answer[:10]}'"
+        }
+
+
+class GeminiDecisionStage:
+    """Remote Gemini classifier (the original two-call decision)"""
+
+    name = "remote"
+
+    PROMPT = """Phân tích câu hỏi sau và quyết định xem có cần tìm kiếm thông tin trên web không.
+
+Câu hỏi: {query}
+
+Trả lời CHÍNH XÁC theo format JSON sau (không thêm text nào khác):
+{{"need_search": true/false, "reason": "lý do ngắn gọn"}}
+
+Cần tìm kiếm (need_search: true) khi:
+- Câu hỏi về tin tức, sự kiện hiện tại, giá cả thị trường
+- Thông tin cập nhật (thời tiết, giá vàng, giá bitcoin, chứng khoán)
+- Sự kiện, tin tức mới, xu hướng
+- Thông tin cụ thể về sản phẩm, địa điểm, người nổi tiếng
+
+KHÔNG cần tìm kiếm (need_search: false) khi:
+- Câu hỏi về kiến thức chung, định nghĩa
+- Tính toán toán học
+- Câu hỏi mang tính triết lý, ý kiến cá nhân
+- Lời khuyên chung không cần dữ liệu cụ thể"""
+
+    def __init__(self, client, model_name: str = "gemini-2.5-flash"):
+        """
+        Args:
+            client: google-genai client
+            model_name: Gemini model used for classification
+        """
+        self.client = client
+        self.model_name = model_name
+
+    def classify(self, query: str) -> Optional[Dict[str, Any]]:
+        """Ask Gemini for a JSON decision; returns None if it cannot be parsed"""
+        response = self.client.models.generate_content(
+            model=self.model_name,
+            contents=self.PROMPT.format(query=query)
+        )
+        decision_text = response.text.strip()
+
+        # Extract JSON from response (handle markdown code blocks)
+        if "```json" in decision_text:
+            decision_text = decision_text.split("```json")[1].split("```")[0].strip()
+        elif "```" in decision_text:
+            decision_text = decision_text.split("```")[1].split("```")[0].strip()
+
+        try:
+            decision = json.loads(decision_text)
+        except json.JSONDecodeError:
+            return None
+
+        return {
+            "need_search": bool(decision.get("need_search", False)),
+            "confidence": 0.95,
+            "reason": decision.get("reason", "")
+        }
+
+
+class SearchDecider:
+    """
+    Pluggable search decision pipeline
+
+    Stages run in order (cheapest first) until one returns a decision whose
+    confidence reaches the threshold. Decisions are memoized by normalized query.
+    """
+
+    def __init__(
+        self,
+        stages: List[Any],
+        confidence_threshold: float = 0.7,
+        cache_size: int = 2048,
+        cache_ttl: float = 86400
+    ):
+        """
+        Args:
+            stages: Objects with a `name` and `classify(query) -> Optional[dict]`
+            confidence_threshold: Stop at the first decision at least this confident
+            cache_size: Maximum memoized decisions
+            cache_ttl: Seconds to keep a memoized decision
+        """
+        self.stages = list(stages)
+        self.confidence_threshold = confidence_threshold
+        self.cache = TTLCache(max_size=cache_size, ttl=cache_ttl)
+
+    def add_stage(self, stage: Any, index: Optional[int] = None):
+        """Insert a decision stage (appended by default)"""
+        if index is None:
+            self.stages.append(stage)
+        else:
+            self.stages.insert(index, stage)
+
+    def decide(self, query: str) -> Dict[str, Any]:
+        """
+        Decide whether the query needs a web search
+
+        The normalized query is only the cache key; stages classify the
+        query as the user wrote it.
+
+        Returns:
+            Dict with need_search, confidence, source, reason and per-stage timings (ms)
+        """
+        key = normalize_query(query)
+        timings = {}
+
+        started = time.perf_counter()
+        cached = self.cache.get(key)
+        timings["cache"] = round((time.perf_counter() - started) * 1000, 3)
+        if cached is not None:
+            return {**cached, "source": "cache", "timings": timings}
+
+        best = None
+        for stage in self.stages:
+            started = time.perf_counter()
+            try:
+                decision = stage.classify(query)
+            except Exception as e:
+                print(f"⚠️ Search decision stage '{stage.name}' failed: {str(e)}")
+                decision = None
+            timings[stage.name] = round((time.perf_counter() - started) * 1000, 3)
+
+            if decision is None:
+                continue
+            decision["source"] = stage.name
+            if best is None or decision["confidence"] >= best["confidence"]:
+                best = decision
+            if decision["confidence"] >= self.confidence_threshold:
+                break
+
+        if best is None:
+            best = {"need_search": False, "confidence": 0.0, "source": "default", "reason": "no stage decided"}
+
+        # Only memoize decisions that are confident enough to be reused as-is
+        if best["confidence"] >= self.confidence_threshold:
+            self.cache.set(key, {k: v for k, v in best.items() if k != "source"})
+
+        return {**best, "timings": timings}
+
+
+# Global instance (created on first use)
+_search_decider = None
+
+
+def peek_search_decider() -> Optional[SearchDecider]:
+    """Get the search decider if it has been created (no side effects)"""
+    return _search_decider
+
+
+def get_search_decider(client=None) -> SearchDecider:
+    """
+    Get or create the search decider configured from Config
+
+    Args:
+        client: google-genai client for the remote stage (needed on first call)
+    """
+    global _search_decider
+    if _search_decider is None:
+        stages = [RuleDecisionStage()]
+        if Config.SEARCH_DECISION_USE_LOCAL_LLM:
+            stages.append(LocalLLMDecisionStage())
+        if Config.SEARCH_DECISION_USE_REMOTE and client is not None:
+            stages.append(GeminiDecisionStage(client))
+        _search_decider = SearchDecider(
+            stages,
+            confidence_threshold=Config.SEARCH_DECISION_CONFIDENCE
+        )
+    return _search_decider
@@ -0,0 +1,127 @@
+"""PowerPoint assembly shared by the local LLM and Gemini slide generators"""
+import os
+import queue
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from pptx import Presentation
+from pptx.util import Inches
+
+
+def plan_slide_images(content_slides: List[Dict[str, Any]], num_slides: int, topic: str) -> List[Tuple[int, str]]:
+    """
+    Choose which slides get an illustration (about 60% of content slides)
+
+    Slides with an image_prompt, or on even positions, are picked in order.
+
+    Returns:
+        List of (slide index, image prompt)
+    """
+    num_images = min(int(num_slides * 0.6), len(content_slides))
+    jobs = []
+    for idx, slide_data in enumerate(content_slides):
+        if len(jobs) >= num_images:
+            break
+        if slide_data.get("image_prompt") or idx % 2 == 0:
+            # Use provided prompt or generate one from slide title
+            prompt = slide_data.get("image_prompt") or \
+                f"{slide_data.get('title', topic)}, professional illustration, high quality"
+            jobs.append((idx, prompt))
+    return jobs
+
+
+def build_presentation(
+    slides_data: Dict[str, Any],
+    topic: str,
+    num_slides: int,
+    text_to_image,
+    preview: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    Build and save a .pptx deck with generated illustrations
+
+    Image prompts are collected up front and rendered in batches by a
+    producer thread while the text slides are assembled; each image is
+    placed on its slide as soon as its batch finishes.
+
+    Args:
+        slides_data: {"title", "slides": [{"title", "content", "image_prompt"}]}
+        topic: Presentation topic (fallback title and file name)
+        num_slides: Requested number of slides
+        text_to_image: TextToImage instance
+        preview: Fast low-step images (default: Config.SD_PREVIEW_MODE)
+
+    Returns:
+        Dict with filename, title, num_slides and num_images
+    """
+    content_slides = slides_data.get("slides", [])
+    jobs = plan_slide_images(content_slides, num_slides, topic)
+
+    # Producer: batched Stable Diffusion generation
+    results: "queue.Queue" = queue.Queue()
+
+    def produce():
+        try:
+            for job_index, result in text_to_image.generate_images([p for _, p in jobs], preview=preview):
+                results.put((job_index, result))
+        except Exception as e:
+            print(f"✗ Slide image generation failed: {e}")
+        finally:
+            results.put(None)
+
+    if jobs:
+        threading.Thread(target=produce, name="slide-images", daemon=True).start()
+
+    # Create PowerPoint presentation while the first batch renders
+    prs = Presentation()
+    prs.slide_width = Inches(10)
+    prs.slide_height = Inches(7.5)
+
+    # Title slide
+    title_slide_layout = prs.slide_layouts[0]
+    slide = prs.slides.add_slide(title_slide_layout)
+    slide.shapes.title.text = slides_data.get("title", topic)
+
+    # Content slides
+    slides = []
+    for slide_data in content_slides:
+        bullet_slide_layout = prs.slide_layouts[1]
+        slide = prs.slides.add_slide(bullet_slide_layout)
+        slide.shapes.title.text = slide_data.get("title", "")
+
+        tf = slide.placeholders[1].text_frame
+        for point in slide_data.get("content", []):
+            p = tf.add_paragraph()
+            p.text = point
+            p.level = 0
+        slides.append(slide)
+
+    # Consumer: place images as their batches finish
+    images_generated = 0
+    while jobs:
+        item = results.get()
+        if item is None:
+            break
+        job_index, result = item
+        if result["success"]:
+            idx = jobs[job_index][0]
+            # Add image to slide (bottom right corner)
+            slides[idx].shapes.add_picture(
+                result["image_path"],
+                Inches(7), Inches(4.5),
+                width=Inches(2.5)
+            )
+            images_generated += 1
+            print(f"✓ Added image to slide {idx + 1}")
+
+    # Save presentation
+    os.makedirs("slides", exist_ok=True)
+    filename = f"slides/presentation_{topic[:30].replace(' ', '_')}.pptx"
+    prs.save(filename)
+
+    return {
+        "filename": filename,
+        "title": slides_data.get("title", topic),
+        "num_slides": len(content_slides) + 1,
+        "num_images": images_generated
+    }
@@ -3,8 +3,6 @@ from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN
 from pptx.dml.color import RGBColor
-from google import genai
-from google.genai import types
 import os
 from pathlib import Path
 from typing import List, Dict, Any, Optional
@@ -14,6 +12,7 @@ from PIL import Image
 import io
 import PyPDF2
 import docx
+from tools.gemini_client import KeyedPool, get_gemini_client
 
 class SlideGenerationTool:
     """Tool for generating presentation slides from documents"""
@@ -24,7 +23,7 @@ class SlideGenerationTool:
         Args:
             api_key: Gemini API key
         """
-        self.client = genai.Client(api_key=api_key)
+        self.client = get_gemini_client(api_key)
         self.model_name = "gemini-3-flash-preview"
         
     def extract_text_from_pdf(self, file_path: str) -> str:
@@ -495,8 +494,11 @@ IMPORTANT: Return ONLY the JSON object, no additional text or markdown formattin
             }
 
 
+_slide_tools = KeyedPool()
+
+
 def get_slide_generation_tool(api_key: str) -> SlideGenerationTool:
-    """Factory function to create SlideGenerationTool instance
+    """Get or create the pooled SlideGenerationTool for an API key
     
     Args:
         api_key: Gemini API key
@@ -504,4 +506,4 @@ def get_slide_generation_tool(api_key: str) -> SlideGenerationTool:
     Returns:
         SlideGenerationTool instance
     """
-    return SlideGenerationTool(api_key=api_key)
+    return _slide_tools.get(api_key, lambda: SlideGenerationTool(api_key=api_key))
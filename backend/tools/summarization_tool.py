@@ -1,7 +1,36 @@
 """Text Summarization Tool using BART"""
 from transformers import pipeline
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+import math
+import time
 import torch
+from config import Config
+from tools.model_manager import get_model_manager
+
+
+def chunk_token_ids(token_ids: List[int], chunk_tokens: int, overlap: int) -> List[List[int]]:
+    """
+    Split token ids into overlapping windows of (nearly) equal size
+    
+    Sizes are balanced so the last chunk is not a tiny remainder.
+    
+    Args:
+        token_ids: Token ids of the whole document
+        chunk_tokens: Maximum tokens per chunk
+        overlap: Tokens shared by consecutive chunks
+        
+    Returns:
+        List of token id chunks
+    """
+    n = len(token_ids)
+    if n <= chunk_tokens:
+        return [token_ids]
+    overlap = min(overlap, chunk_tokens // 2)
+    count = math.ceil((n - overlap) / (chunk_tokens - overlap))
+    size = math.ceil((n + (count - 1) * overlap) / count)
+    step = size - overlap
+    return [token_ids[i * step:i * step + size] for i in range(count)]
+
 
 class SummarizationTool:
     """Text Summarization using facebook/bart-large-cnn"""
@@ -14,31 +43,166 @@ class SummarizationTool:
             model_name: Hugging Face model name (default: facebook/bart-large-cnn)
         """
         self.model_name = model_name
-        self.pipeline = None
         self.device = 0 if torch.cuda.is_available() else -1
+        self.resident_name = f"summarization:{model_name}"
+        get_model_manager().register(
+            self.resident_name,
+            load=self._load_pipeline,
+            device="cuda" if self.device == 0 else "cpu",
+            size_mb=1650
+        )
         print(f"🖥️ Summarization Tool will use device: {'GPU' if self.device == 0 else 'CPU'}")
     
+    def _load_pipeline(self):
+        try:
+            print(f"🔄 Loading summarization model: {self.model_name}...")
+            summarizer = pipeline(
+                "summarization",
+                model=self.model_name,
+                device=self.device
+            )
+            print(f"✅ Summarization model loaded successfully!")
+            return summarizer
+        except Exception as e:
+            print(f"❌ Error loading summarization model: {str(e)}")
+            raise
+    
     def load_model(self):
-        """Lazy load the summarization pipeline"""
-        if self.pipeline is None:
-            try:
-                print(f"🔄 Loading summarization model: {self.model_name}...")
-                self.pipeline = pipeline(
-                    "summarization",
-                    model=self.model_name,
-                    device=self.device
+        """Lazy load the summarization pipeline (kept resident by the model manager)"""
+        return get_model_manager().load(self.resident_name)
+    
+    def _summarize_texts(
+        self,
+        summarizer,
+        texts: List[str],
+        max_length: int,
+        min_length: int,
+        do_sample: bool
+    ) -> List[str]:
+        """Summarize several texts in length-bucketed batches (results in input order)"""
+        return self._generate_bucketed(summarizer, texts, max_length, min_length, do_sample)["summaries"]
+    
+    def _generate_bucketed(
+        self,
+        summarizer,
+        texts: List[str],
+        max_length: int,
+        min_length: int,
+        do_sample: bool
+    ) -> Dict[str, Any]:
+        """
+        Run generate over texts sorted by token length
+        
+        Texts are tokenized once (truncated to the model input size), sorted
+        by length and cut into buckets of Config.SUMMARIZATION_BATCH_SIZE,
+        and each bucket is padded only to its own longest text before one
+        generate call.
+        
+        Returns:
+            Dict with summaries and input_tokens (input order), buckets,
+            real_tokens and padded_tokens
+        """
+        tokenizer, model = summarizer.tokenizer, summarizer.model
+        encoded = tokenizer(texts, truncation=True, max_length=tokenizer.model_max_length)["input_ids"]
+        order = sorted(range(len(texts)), key=lambda i: len(encoded[i]))
+        batch_size = max(1, Config.SUMMARIZATION_BATCH_SIZE)
+        
+        summaries: List[Optional[str]] = [None] * len(texts)
+        buckets = 0
+        padded_tokens = 0
+        for start in range(0, len(order), batch_size):
+            bucket = order[start:start + batch_size]
+            inputs = tokenizer.pad(
+                {"input_ids": [encoded[i] for i in bucket]},
+                padding=True,
+                return_tensors="pt"
+            ).to(model.device)
+            with torch.inference_mode():
+                output = model.generate(
+                    **inputs,
+                    max_length=max_length,
+                    min_length=min_length,
+                    do_sample=do_sample
                 )
-                print(f"✅ Summarization model loaded successfully!")
-            except Exception as e:
-                print(f"❌ Error loading summarization model: {str(e)}")
-                raise
+            for i, text in zip(bucket, tokenizer.batch_decode(output, skip_special_tokens=True)):
+                summaries[i] = text.strip()
+            buckets += 1
+            padded_tokens += inputs["input_ids"].numel()
+        
+        return {
+            "summaries": summaries,
+            "input_tokens": [len(ids) for ids in encoded],
+            "buckets": buckets,
+            "real_tokens": sum(len(ids) for ids in encoded),
+            "padded_tokens": padded_tokens
+        }
+    
+    def _reduce(
+        self,
+        summarizer,
+        text: str,
+        max_length: int,
+        min_length: int,
+        do_sample: bool
+    ) -> Dict[str, Any]:
+        """
+        Map-reduce summarization of a text of any length
+        
+        The text is split into overlapping token chunks that fit the model,
+        all chunks are summarized in batched calls, and the joined chunk
+        summaries are summarized again (recursively) until they fit in one
+        model input, which gets the final summary.
+        
+        Returns:
+            Dict with summary, chunks (map-step inputs), levels, input_tokens
+            and truncated (the final input still exceeded the model input
+            size, because of SUMMARIZATION_MAX_LEVELS or a level that made
+            no progress)
+        """
+        tokenizer = summarizer.tokenizer
+        chunk_tokens = min(Config.SUMMARIZATION_CHUNK_TOKENS, tokenizer.model_max_length - 2)
+        token_ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+        input_tokens = len(token_ids)
+        
+        chunks_total = 0
+        levels = 0
+        while len(token_ids) > chunk_tokens and levels < Config.SUMMARIZATION_MAX_LEVELS:
+            chunks = chunk_token_ids(token_ids, chunk_tokens, Config.SUMMARIZATION_CHUNK_OVERLAP)
+            chunk_texts = [tokenizer.decode(ids, skip_special_tokens=True) for ids in chunks]
+            print(f"📚 Summarization level {levels + 1}: {len(chunks)} chunks of ~{len(chunks[0])} tokens")
+            
+            summaries = self._summarize_texts(
+                summarizer,
+                chunk_texts,
+                max_length=Config.SUMMARIZATION_CHUNK_SUMMARY_TOKENS,
+                min_length=min(min_length, Config.SUMMARIZATION_CHUNK_SUMMARY_TOKENS // 2),
+                do_sample=do_sample
+            )
+            reduced = tokenizer("\n".join(summaries), add_special_tokens=False)["input_ids"]
+            chunks_total += len(chunks)
+            levels += 1
+            if len(reduced) >= len(token_ids):
+                # No progress; the final call truncates
+                break
+            token_ids = reduced
+        
+        final_text = tokenizer.decode(token_ids, skip_special_tokens=True) if levels else text
+        summary = self._summarize_texts(summarizer, [final_text], max_length, min_length, do_sample)[0]
+        return {
+            "summary": summary,
+            "chunks": chunks_total or 1,
+            "levels": levels,
+            "input_tokens": input_tokens,
+            "truncated": len(token_ids) > tokenizer.model_max_length - 2
+        }
     
     def summarize(
         self,
         text: str,
         max_length: int = 130,
         min_length: int = 30,
-        do_sample: bool = False
+        do_sample: bool = False,
+        hierarchical: bool = True
     ) -> Dict[str, Any]:
         """
         Summarize the given text
@@ -48,12 +212,11 @@ class SummarizationTool:
             max_length: Maximum length of summary (default: 130)
             min_length: Minimum length of summary (default: 30)
             do_sample: Whether to use sampling (default: False for deterministic)
+            hierarchical: Map-reduce long texts (default); False truncates them to one model input
             
         Returns:
             Dict containing the summary and metadata
         """
-        self.load_model()
-        
         try:
             # Validate text length
             if len(text.strip()) < 50:
@@ -62,34 +225,34 @@ class SummarizationTool:
                     "original_length": len(text)
                 }
             
-            # Truncate if text is too long (BART max is 1024 tokens)
-            # Rough estimation: 1 token ≈ 4 characters
-            max_input_chars = 3000  # Conservative limit
-            if len(text) > max_input_chars:
-                text = text[:max_input_chars]
-                truncated = True
-            else:
-                truncated = False
-            
             print(f"📝 Summarizing text ({len(text)} characters)...")
             
-            # Generate summary
-            result = self.pipeline(
-                text,
-                max_length=max_length,
-                min_length=min_length,
-                do_sample=do_sample,
-                truncation=True
-            )
+            # Generate summary (loads the model on first use)
+            with get_model_manager().acquire(self.resident_name) as summarizer:
+                if hierarchical:
+                    result = self._reduce(summarizer, text, max_length, min_length, do_sample)
+                else:
+                    # Single pass; the tokenizer truncates to the model's 1024 input tokens
+                    input_tokens = len(summarizer.tokenizer(text, add_special_tokens=False)["input_ids"])
+                    result = {
+                        "summary": self._summarize_texts(summarizer, [text], max_length, min_length, do_sample)[0],
+                        "chunks": 1,
+                        "levels": 0,
+                        "input_tokens": input_tokens,
+                        "truncated": input_tokens > summarizer.tokenizer.model_max_length - 2
+                    }
             
-            summary_text = result[0]['summary_text']
+            summary_text = result["summary"]
             
             return {
                 "summary": summary_text,
                 "original_length": len(text),
                 "summary_length": len(summary_text),
                 "compression_ratio": round(len(summary_text) / len(text) * 100, 2),
-                "truncated": truncated,
+                "truncated": result["truncated"],
+                "input_tokens": result["input_tokens"],
+                "chunks": result["chunks"],
+                "levels": result["levels"],
                 "model": self.model_name
             }
             
@@ -101,6 +264,89 @@ class SummarizationTool:
             }
 
 
+    def summarize_batch(
+        self,
+        texts: List[str],
+        max_length: int = 130,
+        min_length: int = 30,
+        do_sample: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Summarize many texts at once
+        
+        Texts that fit one model input are length-bucketed and run through
+        batched generate with dynamic padding; longer texts are summarized
+        with map-reduce (see summarize). Invalid items get an error entry
+        instead of failing the batch.
+        
+        Args:
+            texts: Texts to summarize
+            max_length: Maximum length of each summary (default: 130)
+            min_length: Minimum length of each summary (default: 30)
+            do_sample: Whether to use sampling (default: False for deterministic)
+            
+        Returns:
+            Dict with results (input order, each with summary and stats) and batch stats
+        """
+        started = time.perf_counter()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        valid = []
+        for i, text in enumerate(texts):
+            if len(text.strip()) < 50:
+                results[i] = {
+                    "error": "Text is too short to summarize. Please provide at least 50 characters.",
+                    "original_length": len(text)
+                }
+            else:
+                valid.append(i)
+        
+        stats = {"buckets": 0, "padding_efficiency": 1.0, "long_texts": 0}
+        try:
+            with get_model_manager().acquire(self.resident_name) as summarizer:
+                tokenizer = summarizer.tokenizer
+                limit = tokenizer.model_max_length - 2
+                lengths = [len(ids) for ids in tokenizer([texts[i] for i in valid], add_special_tokens=False)["input_ids"]]
+                short = [i for i, n in zip(valid, lengths) if n <= limit]
+                long = [i for i, n in zip(valid, lengths) if n > limit]
+                
+                if short:
+                    print(f"📝 Summarizing {len(short)} texts in length-bucketed batches...")
+                    batch = self._generate_bucketed(summarizer, [texts[i] for i in short], max_length, min_length, do_sample)
+                    for i, summary, tokens in zip(short, batch["summaries"], batch["input_tokens"]):
+                        results[i] = {"summary": summary, "input_tokens": tokens, "chunks": 1, "levels": 0,
+                                      "truncated": False}
+                    stats["buckets"] = batch["buckets"]
+                    stats["padding_efficiency"] = round(batch["real_tokens"] / batch["padded_tokens"], 4)
+                
+                for i in long:
+                    results[i] = self._reduce(summarizer, texts[i], max_length, min_length, do_sample)
+                stats["long_texts"] = len(long)
+        except Exception as e:
+            print(f"❌ Error during batch summarization: {str(e)}")
+            for i in valid:
+                if results[i] is None:
+                    results[i] = {"error": f"Summarization failed: {str(e)}", "original_length": len(texts[i])}
+        
+        for i in valid:
+            result = results[i]
+            if "summary" in result:
+                text = texts[i]
+                result.update({
+                    "original_length": len(text),
+                    "summary_length": len(result["summary"]),
+                    "compression_ratio": round(len(result["summary"]) / len(text) * 100, 2)
+                })
+        
+        stats["elapsed_s"] = round(time.perf_counter() - started, 3)
+        stats["texts"] = len(texts)
+        stats["succeeded"] = sum(1 for r in results if "summary" in r)
+        return {
+            "results": results,
+            "stats": stats,
+            "model": self.model_name
+        }
+
+
 # Global instance (lazy-loaded)
 _summarization_tool = None
 
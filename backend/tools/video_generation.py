@@ -1,86 +1,294 @@
 """Video Generation Tool: Text-to-Video and Image-to-Video using Google Veo 3.1"""
 import time
 import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Any, List
-from google import genai
+from typing import Optional, Dict, Any, List, Callable
 from google.genai import types
+from config import Config
+from tools.gemini_client import get_gemini_client
+
+
+def _next_poll_interval(interval: float) -> float:
+    """Grow the polling interval with exponential backoff up to the configured cap"""
+    return min(interval * Config.VIDEO_POLL_BACKOFF, Config.VIDEO_POLL_MAX_INTERVAL)
 
 
 class VideoGenerationTools:
     """Tool for video generation using Google Veo 3.1 (Text-to-Video and Image-to-Video)"""
-    
+
     def __init__(self, api_key: str):
         """Initialize with Google API key"""
         self.api_key = api_key
-        self.client = genai.Client(api_key=self.api_key)
-        
+        self.client = get_gemini_client(self.api_key)
+
+    # ---------- Operation start ----------
+    # Each start_* method starts a Veo operation and returns a "start" dict
+    # with the operation, the output path and extra fields for the final
+    # result, or an error dict with status "error". The blocking methods below
+    # wait on it directly; VideoJobManager.submit takes one as its start_fn.
+
+    def start_text_to_video(self, prompt: str, output_path: Optional[str] = None) -> Dict[str, Any]:
+        """Start a text-to-video operation"""
+        print(f"Starting video generation with prompt: {prompt}")
+        operation = self.client.models.generate_videos(
+            model="veo-3.1-generate-preview",
+            prompt=prompt,
+        )
+
+        if not output_path:
+            output_dir = Path("output")
+            output_dir.mkdir(exist_ok=True)
+            # Create a safe filename from prompt
+            safe_prompt = "".join(c for c in prompt[:30] if c.isalnum() or c in (' ', '_')).rstrip()
+            safe_prompt = safe_prompt.replace(' ', '_')
+            output_path = output_dir / f"video_{safe_prompt}_{int(time.time())}.mp4"
+
+        return {
+            "status": "success",
+            "operation": operation,
+            "output_path": output_path,
+            "message": f"Video generated successfully from prompt: {prompt}",
+            "extra": {}
+        }
+
+    def start_image_to_video(
+        self,
+        image_path: str,
+        prompt: Optional[str] = None,
+        output_path: Optional[str] = None,
+        mode: str = "single"
+    ) -> Dict[str, Any]:
+        """Start a single image-to-video operation"""
+        # Check if image exists
+        if not os.path.exists(image_path):
+            return {
+                "status": "error",
+                "message": f"Image file not found: {image_path}"
+            }
+
+        if mode != "single":
+            return {
+                "status": "error",
+                "message": "Invalid mode. Use 'reference' mode for multiple images."
+            }
+
+        # Upload image to Google
+        print(f"Uploading image: {image_path}")
+        uploaded_image = self.client.files.upload(path=image_path)
+
+        # Single image as input
+        config = {
+            "model": "veo-3.1-generate-preview",
+            "prompt": prompt if prompt else "Create a video from this image",
+            "image": uploaded_image
+        }
+        print(f"Starting single image-to-video generation")
+        operation = self.client.models.generate_videos(**config)
+
+        if not output_path:
+            output_dir = Path("output")
+            output_dir.mkdir(exist_ok=True)
+            # Create a safe filename
+            image_name = Path(image_path).stem
+            output_path = output_dir / f"video_from_{image_name}_{int(time.time())}.mp4"
+
+        return {
+            "status": "success",
+            "operation": operation,
+            "output_path": output_path,
+            "message": f"Video generated successfully from image: {Path(image_path).name}",
+            "extra": {}
+        }
+
+    def start_reference_images_to_video(
+        self,
+        image_paths: List[str],
+        prompt: str,
+        output_path: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Start a reference-images-to-video operation"""
+        if not image_paths or len(image_paths) == 0:
+            return {
+                "status": "error",
+                "message": "No images provided"
+            }
+
+        if not prompt or not prompt.strip():
+            return {
+                "status": "error",
+                "message": "Prompt is required for reference images mode"
+            }
+
+        # Upload all images and create reference list
+        reference_images = []
+        for image_path in image_paths:
+            if not os.path.exists(image_path):
+                return {
+                    "status": "error",
+                    "message": f"Image file not found: {image_path}"
+                }
+
+            print(f"Uploading reference image: {image_path}")
+            uploaded_image = self.client.files.upload(path=image_path)
+
+            # Create reference image with asset type
+            reference = types.VideoGenerationReferenceImage(
+                image=uploaded_image,
+                reference_type="asset"
+            )
+            reference_images.append(reference)
+
+        print(f"Starting video generation with {len(reference_images)} reference images")
+
+        # Start video generation with reference images
+        operation = self.client.models.generate_videos(
+            model="veo-3.1-generate-preview",
+            prompt=prompt,
+            config=types.GenerateVideosConfig(
+                reference_images=reference_images,
+            ),
+        )
+
+        if not output_path:
+            output_dir = Path("output")
+            output_dir.mkdir(exist_ok=True)
+            output_path = output_dir / f"video_reference_{int(time.time())}.mp4"
+
+        return {
+            "status": "success",
+            "operation": operation,
+            "output_path": output_path,
+            "message": f"Video generated successfully from {len(image_paths)} reference images",
+            "extra": {}
+        }
+
+    def start_prompt_to_image_to_video(
+        self,
+        prompt: str,
+        output_path: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Generate an image from the prompt, then start an image-to-video operation"""
+        if not prompt or not prompt.strip():
+            return {
+                "status": "error",
+                "message": "Prompt is required"
+            }
+
+        print(f"Step 1: Generating image from prompt: {prompt}")
+
+        # Step 1: Generate image with Gemini 2.5 Flash Image (Nano Banana)
+        image_response = self.client.models.generate_content(
+            model="gemini-2.5-flash-image",
+            contents=prompt,
+            config={"response_modalities": ['IMAGE']}
+        )
+
+        # Save the generated image
+        output_dir = Path("output")
+        output_dir.mkdir(exist_ok=True)
+        safe_prompt = "".join(c for c in prompt[:30] if c.isalnum() or c in (' ', '_')).rstrip()
+        safe_prompt = safe_prompt.replace(' ', '_')
+        image_path = output_dir / f"generated_image_{safe_prompt}_{int(time.time())}.png"
+
+        # Save image to file
+        generated_image = image_response.parts[0].as_image()
+        generated_image.save(str(image_path))
+        print(f"Generated image saved to {image_path}")
+
+        print(f"Step 2: Generating video from the generated image")
+
+        # Step 2: Generate video with Veo 3.1 using the generated image
+        operation = self.client.models.generate_videos(
+            model="veo-3.1-generate-preview",
+            prompt=prompt,
+            image=image_response.parts[0].as_image(),
+        )
+
+        if not output_path:
+            output_path = output_dir / f"video_from_prompt_{safe_prompt}_{int(time.time())}.mp4"
+
+        return {
+            "status": "success",
+            "operation": operation,
+            "output_path": output_path,
+            "message": f"Video generated successfully from prompt-generated image",
+            "extra": {"generated_image_path": str(image_path)}
+        }
+
+    # ---------- Completion helpers ----------
+
+    def _finish(self, start: Dict[str, Any], operation, elapsed_time: float) -> Dict[str, Any]:
+        """Download the video of a finished operation and build the result dict"""
+        # Download the generated video
+        generated_video = operation.response.generated_videos[0]
+        output_path = start["output_path"]
+
+        # Download and save video
+        self.client.files.download(file=generated_video.video)
+        generated_video.video.save(str(output_path))
+
+        print(f"Generated video saved to {output_path}")
+
+        return {
+            "status": "success",
+            "message": start["message"],
+            "video_path": str(output_path),
+            **start["extra"],
+            "generation_time": elapsed_time
+        }
+
+    def _wait_and_finish(self, start: Dict[str, Any], max_wait_time: int) -> Dict[str, Any]:
+        """Poll a started operation until it is done, then save the video"""
+        operation = start["operation"]
+
+        # Poll the operation status with backoff until the video is ready
+        elapsed_time = 0
+        poll_interval = Config.VIDEO_POLL_INITIAL_INTERVAL
+
+        while not operation.done:
+            if elapsed_time >= max_wait_time:
+                return {
+                    "status": "error",
+                    "message": f"Video generation timeout after {max_wait_time} seconds",
+                    **start["extra"]
+                }
+
+            print(f"Waiting for video generation... ({elapsed_time}s elapsed)")
+            time.sleep(poll_interval)
+            elapsed_time += poll_interval
+            poll_interval = _next_poll_interval(poll_interval)
+            operation = self.client.operations.get(operation)
+
+        return self._finish(start, operation, elapsed_time)
+
+    # ---------- Blocking API ----------
+
     def text_to_video(
-        self, 
-        prompt: str, 
+        self,
+        prompt: str,
         output_path: Optional[str] = None,
         max_wait_time: int = 300  # 5 minutes max wait time
     ) -> Dict[str, Any]:
         """
         Generate video from text prompt using Google Veo 3.1
-        
+
         Args:
             prompt: Text description of the video to generate
             output_path: Path to save the generated video
             max_wait_time: Maximum time to wait for video generation (seconds)
-            
+
         Returns:
             Dictionary with status, message, and video_path
         """
         try:
-            # Start video generation
-            print(f"Starting video generation with prompt: {prompt}")
-            operation = self.client.models.generate_videos(
-                model="veo-3.1-generate-preview",
-                prompt=prompt,
-            )
-            
-            # Poll the operation status until the video is ready
-            elapsed_time = 0
-            poll_interval = 10  # Check every 10 seconds
-            
-            while not operation.done:
-                if elapsed_time >= max_wait_time:
-                    return {
-                        "status": "error",
-                        "message": f"Video generation timeout after {max_wait_time} seconds"
-                    }
-                
-                print(f"Waiting for video generation... ({elapsed_time}s elapsed)")
-                time.sleep(poll_interval)
-                elapsed_time += poll_interval
-                operation = self.client.operations.get(operation)
-            
-            # Download the generated video
-            generated_video = operation.response.generated_videos[0]
-            
-            # Determine output path
-            if not output_path:
-                output_dir = Path("output")
-                output_dir.mkdir(exist_ok=True)
-                # Create a safe filename from prompt
-                safe_prompt = "".join(c for c in prompt[:30] if c.isalnum() or c in (' ', '_')).rstrip()
-                safe_prompt = safe_prompt.replace(' ', '_')
-                output_path = output_dir / f"video_{safe_prompt}_{int(time.time())}.mp4"
-            
-            # Download and save video
-            self.client.files.download(file=generated_video.video)
-            generated_video.video.save(str(output_path))
-            
-            print(f"Generated video saved to {output_path}")
-            
-            return {
-                "status": "success",
-                "message": f"Video generated successfully from prompt: {prompt}",
-                "video_path": str(output_path),
-                "generation_time": elapsed_time
-            }
-            
+            start = self.start_text_to_video(prompt, output_path)
+            if start["status"] != "success":
+                return start
+            return self._wait_and_finish(start, max_wait_time)
+
         except Exception as e:
             error_message = str(e)
             print(f"Error generating video: {error_message}")
@@ -90,7 +298,7 @@ class VideoGenerationTools:
             }
 
     def image_to_video(
-        self, 
+        self,
         image_path: str,
         prompt: Optional[str] = None,
         output_path: Optional[str] = None,
@@ -99,87 +307,23 @@ class VideoGenerationTools:
     ) -> Dict[str, Any]:
         """
         Generate video from image using Google Veo 3.1
-        
+
         Args:
             image_path: Path to the input image (single mode only)
             prompt: Text prompt to guide video generation
             output_path: Path to save the generated video
             max_wait_time: Maximum time to wait for video generation (seconds)
             mode: "single" for single image input, "reference" for reference images
-            
+
         Returns:
             Dictionary with status, message, and video_path
         """
         try:
-            # Check if image exists
-            if not os.path.exists(image_path):
-                return {
-                    "status": "error",
-                    "message": f"Image file not found: {image_path}"
-                }
-            
-            # Upload image to Google
-            print(f"Uploading image: {image_path}")
-            uploaded_image = self.client.files.upload(path=image_path)
-            
-            # Prepare generation config based on mode
-            if mode == "single":
-                # Single image as input
-                config = {
-                    "model": "veo-3.1-generate-preview",
-                    "prompt": prompt if prompt else "Create a video from this image",
-                    "image": uploaded_image
-                }
-                print(f"Starting single image-to-video generation")
-            else:
-                return {
-                    "status": "error",
-                    "message": "Invalid mode. Use 'reference' mode for multiple images."
-                }
-            
-            # Start video generation
-            operation = self.client.models.generate_videos(**config)
-            
-            # Poll the operation status until the video is ready
-            elapsed_time = 0
-            poll_interval = 10  # Check every 10 seconds
-            
-            while not operation.done:
-                if elapsed_time >= max_wait_time:
-                    return {
-                        "status": "error",
-                        "message": f"Video generation timeout after {max_wait_time} seconds"
-                    }
-                
-                print(f"Waiting for video generation... ({elapsed_time}s elapsed)")
-                time.sleep(poll_interval)
-                elapsed_time += poll_interval
-                operation = self.client.operations.get(operation)
-            
-            # Download the generated video
-            generated_video = operation.response.generated_videos[0]
-            
-            # Determine output path
-            if not output_path:
-                output_dir = Path("output")
-                output_dir.mkdir(exist_ok=True)
-                # Create a safe filename
-                image_name = Path(image_path).stem
-                output_path = output_dir / f"video_from_{image_name}_{int(time.time())}.mp4"
-            
-            # Download and save video
-            self.client.files.download(file=generated_video.video)
-            generated_video.video.save(str(output_path))
-            
-            print(f"Generated video saved to {output_path}")
-            
-            return {
-                "status": "success",
-                "message": f"Video generated successfully from image: {Path(image_path).name}",
-                "video_path": str(output_path),
-                "generation_time": elapsed_time
-            }
-            
+            start = self.start_image_to_video(image_path, prompt, output_path, mode)
+            if start["status"] != "success":
+                return start
+            return self._wait_and_finish(start, max_wait_time)
+
         except Exception as e:
             error_message = str(e)
             print(f"Error generating video from image: {error_message}")
@@ -189,7 +333,7 @@ class VideoGenerationTools:
             }
 
     def reference_images_to_video(
-        self, 
+        self,
         image_paths: List[str],
         prompt: str,
         output_path: Optional[str] = None,
@@ -197,97 +341,22 @@ class VideoGenerationTools:
     ) -> Dict[str, Any]:
         """
         Generate video from multiple reference images using Google Veo 3.1
-        
+
         Args:
             image_paths: List of paths to reference images
             prompt: Text prompt to guide video generation
             output_path: Path to save the generated video
             max_wait_time: Maximum time to wait for video generation (seconds)
-            
+
         Returns:
             Dictionary with status, message, and video_path
         """
         try:
-            if not image_paths or len(image_paths) == 0:
-                return {
-                    "status": "error",
-                    "message": "No images provided"
-                }
-            
-            if not prompt or not prompt.strip():
-                return {
-                    "status": "error",
-                    "message": "Prompt is required for reference images mode"
-                }
-            
-            # Upload all images and create reference list
-            reference_images = []
-            for image_path in image_paths:
-                if not os.path.exists(image_path):
-                    return {
-                        "status": "error",
-                        "message": f"Image file not found: {image_path}"
-                    }
-                
-                print(f"Uploading reference image: {image_path}")
-                uploaded_image = self.client.files.upload(path=image_path)
-                
-                # Create reference image with asset type
-                reference = types.VideoGenerationReferenceImage(
-                    image=uploaded_image,
-                    reference_type="asset"
-                )
-                reference_images.append(reference)
-            
-            print(f"Starting video generation with {len(reference_images)} reference images")
-            
-            # Start video generation with reference images
-            operation = self.client.models.generate_videos(
-                model="veo-3.1-generate-preview",
-                prompt=prompt,
-                config=types.GenerateVideosConfig(
-                    reference_images=reference_images,
-                ),
-            )
-            
-            # Poll the operation status until the video is ready
-            elapsed_time = 0
-            poll_interval = 10  # Check every 10 seconds
-            
-            while not operation.done:
-                if elapsed_time >= max_wait_time:
-                    return {
-                        "status": "error",
-                        "message": f"Video generation timeout after {max_wait_time} seconds"
-                    }
-                
-                print(f"Waiting for video generation... ({elapsed_time}s elapsed)")
-                time.sleep(poll_interval)
-                elapsed_time += poll_interval
-                operation = self.client.operations.get(operation)
-            
-            # Download the generated video
-            generated_video = operation.response.generated_videos[0]
-            
-            # Determine output path
-            if not output_path:
-                output_dir = Path("output")
-                output_dir.mkdir(exist_ok=True)
-                output_path = output_dir / f"video_reference_{int(time.time())}.mp4"
-            
-            # Download and save video
-            self.client.files.download(file=generated_video.video)
-            generated_video.video.save(str(output_path))
-            
-            print(f"Generated video saved to {output_path}")
-            
-            return {
-                "status": "success",
-                "message": f"Video generated successfully from {len(image_paths)} reference images",
-                "video_path": str(output_path),
-                "generation_time": elapsed_time
-            }
-            
+            start = self.start_reference_images_to_video(image_paths, prompt, output_path)
+            if start["status"] != "success":
+                return start
+            return self._wait_and_finish(start, max_wait_time)
+
         except Exception as e:
             error_message = str(e)
             print(f"Error generating video from reference images: {error_message}")
@@ -297,98 +366,29 @@ class VideoGenerationTools:
             }
 
     def prompt_to_image_to_video(
-        self, 
+        self,
         prompt: str,
         output_path: Optional[str] = None,
         max_wait_time: int = 300  # 5 minutes max wait time
     ) -> Dict[str, Any]:
         """
-        Generate image from prompt using Gemini 2.5 Flash Image, 
+        Generate image from prompt using Gemini 2.5 Flash Image,
         then generate video from that image using Google Veo 3.1
-        
+
         Args:
             prompt: Text prompt to generate both image and video
             output_path: Path to save the generated video
             max_wait_time: Maximum time to wait for video generation (seconds)
-            
+
         Returns:
             Dictionary with status, message, video_path, and generated_image_path
         """
         try:
-            if not prompt or not prompt.strip():
-                return {
-                    "status": "error",
-                    "message": "Prompt is required"
-                }
-            
-            print(f"Step 1: Generating image from prompt: {prompt}")
-            
-            # Step 1: Generate image with Gemini 2.5 Flash Image (Nano Banana)
-            image_response = self.client.models.generate_content(
-                model="gemini-2.5-flash-image",
-                contents=prompt,
-                config={"response_modalities": ['IMAGE']}
-            )
-            
-            # Save the generated image
-            output_dir = Path("output")
-            output_dir.mkdir(exist_ok=True)
-            safe_prompt = "".join(c for c in prompt[:30] if c.isalnum() or c in (' ', '_')).rstrip()
-            safe_prompt = safe_prompt.replace(' ', '_')
-            image_path = output_dir / f"generated_image_{safe_prompt}_{int(time.time())}.png"
-            
-            # Save image to file
-            generated_image = image_response.parts[0].as_image()
-            generated_image.save(str(image_path))
-            print(f"Generated image saved to {image_path}")
-            
-            print(f"Step 2: Generating video from the generated image")
-            
-            # Step 2: Generate video with Veo 3.1 using the generated image
-            operation = self.client.models.generate_videos(
-                model="veo-3.1-generate-preview",
-                prompt=prompt,
-                image=image_response.parts[0].as_image(),
-            )
-            
-            # Poll the operation status until the video is ready
-            elapsed_time = 0
-            poll_interval = 10  # Check every 10 seconds
-            
-            while not operation.done:
-                if elapsed_time >= max_wait_time:
-                    return {
-                        "status": "error",
-                        "message": f"Video generation timeout after {max_wait_time} seconds",
-                        "generated_image_path": str(image_path)
-                    }
-                
-                print(f"Waiting for video generation... ({elapsed_time}s elapsed)")
-                time.sleep(poll_interval)
-                elapsed_time += poll_interval
-                operation = self.client.operations.get(operation)
-            
-            # Download the generated video
-            generated_video = operation.response.generated_videos[0]
-            
-            # Determine output path
-            if not output_path:
-                output_path = output_dir / f"video_from_prompt_{safe_prompt}_{int(time.time())}.mp4"
-            
-            # Download and save video
-            self.client.files.download(file=generated_video.video)
-            generated_video.video.save(str(output_path))
-            
-            print(f"Generated video saved to {output_path}")
-            
-            return {
-                "status": "success",
-                "message": f"Video generated successfully from prompt-generated image",
-                "video_path": str(output_path),
-                "generated_image_path": str(image_path),
-                "generation_time": elapsed_time
-            }
-            
+            start = self.start_prompt_to_image_to_video(prompt, output_path)
+            if start["status"] != "success":
+                return start
+            return self._wait_and_finish(start, max_wait_time)
+
         except Exception as e:
             error_message = str(e)
             print(f"Error generating video from prompt: {error_message}")
@@ -398,8 +398,267 @@ class VideoGenerationTools:
             }
 
 
+class VideoJobManager:
+    """
+    Asynchronous job subsystem for Veo video generation
+
+    Submitting a job returns a job id immediately. Operations are started on a
+    small thread pool, then a single background poller multiplexes all in-flight
+    Veo operations with per-job adaptive backoff, so waiting jobs do not hold
+    any request or worker thread.
+    """
+
+    # Job states
+    PENDING = "pending"          # Waiting to start the Veo operation
+    RUNNING = "running"          # Operation started, being polled
+    DOWNLOADING = "downloading"  # Operation done, saving the video
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    TIMEOUT = "timeout"
+    FINISHED_STATES = (SUCCEEDED, FAILED, TIMEOUT)
+
+    def __init__(self, tool: VideoGenerationTools):
+        """
+        Initialize job manager
+
+        Args:
+            tool: Video generation tool used to start and finish operations
+        """
+        self.tool = tool
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._executor = ThreadPoolExecutor(
+            max_workers=Config.VIDEO_JOB_WORKERS,
+            thread_name_prefix="video-job"
+        )
+        self._poller = threading.Thread(target=self._poll_loop, name="video-job-poller", daemon=True)
+        self._poller.start()
+
+    def submit(self, kind: str, start_fn: Callable[[], Dict[str, Any]], max_wait_time: int = 300) -> str:
+        """
+        Submit a video generation job
+
+        Args:
+            kind: Job type (e.g. "text_to_video"), reported in status
+            start_fn: Callable that starts the operation and returns a start dict
+            max_wait_time: Maximum time to wait for the operation (seconds)
+
+        Returns:
+            Job id
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._purge_expired(now)
+            self.jobs[job_id] = {
+                "job_id": job_id,
+                "kind": kind,
+                "status": self.PENDING,
+                "message": "Job queued",
+                "created_at": now,
+                "started_at": None,
+                "finished_at": None,
+                "max_wait_time": max_wait_time,
+                "polls": 0,
+                "poll_interval": Config.VIDEO_POLL_INITIAL_INTERVAL,
+                "next_poll_at": None,
+                "version": 0,
+                "start": None,
+                "result": None
+            }
+        self._executor.submit(self._start_job, job_id, start_fn)
+        print(f"🎬 Video job {job_id} submitted ({kind})")
+        return job_id
+
+    def _update(self, job_id: str, **fields):
+        """Update job fields and bump its version (caller must hold the lock)"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        job.update(fields)
+        job["version"] += 1
+
+    def _start_job(self, job_id: str, start_fn: Callable[[], Dict[str, Any]]):
+        """Start the Veo operation for a job (runs on the job thread pool)"""
+        try:
+            start = start_fn()
+        except Exception as e:
+            start = {"status": "error", "message": f"Error starting video generation: {str(e)}"}
+
+        now = time.time()
+        with self._wakeup:
+            if start.get("status") != "success":
+                self._update(
+                    job_id,
+                    status=self.FAILED,
+                    message=start.get("message", "Failed to start video generation"),
+                    finished_at=now,
+                    result={"status": "error", **{k: v for k, v in start.items() if k != "status"}}
+                )
+                return
+
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            self._update(
+                job_id,
+                status=self.RUNNING,
+                message="Video generation in progress",
+                started_at=now,
+                start=start,
+                next_poll_at=now + job["poll_interval"]
+            )
+            self._wakeup.notify()
+
+    def _poll_loop(self):
+        """Single background poller for all running operations"""
+        while True:
+            with self._wakeup:
+                now = time.time()
+                due = [
+                    job for job in self.jobs.values()
+                    if job["status"] == self.RUNNING and job["next_poll_at"] <= now
+                ]
+                if not due:
+                    next_times = [
+                        job["next_poll_at"] for job in self.jobs.values()
+                        if job["status"] == self.RUNNING
+                    ]
+                    timeout = max(0.0, min(next_times) - now) if next_times else None
+                    self._wakeup.wait(timeout)
+                    continue
+
+            for job in due:
+                self._poll_job(job)
+
+    def _poll_job(self, job: Dict[str, Any]):
+        """Refresh one operation and advance its job state"""
+        job_id = job["job_id"]
+        start = job["start"]
+        now = time.time()
+        elapsed = now - job["started_at"]
+
+        try:
+            operation = self.tool.client.operations.get(start["operation"])
+        except Exception as e:
+            # Transient API error: keep polling with backoff until the deadline
+            print(f"⚠️ Video job {job_id} poll error: {str(e)}")
+            operation = start["operation"]
+
+        with self._lock:
+            start["operation"] = operation
+            if operation.done:
+                self._update(job_id, status=self.DOWNLOADING, message="Saving generated video", polls=job["polls"] + 1)
+                self._executor.submit(self._finish_job, job_id, start, elapsed)
+            elif elapsed >= job["max_wait_time"]:
+                self._update(
+                    job_id,
+                    status=self.TIMEOUT,
+                    message=f"Video generation timeout after {job['max_wait_time']} seconds",
+                    finished_at=now,
+                    result={
+                        "status": "error",
+                        "message": f"Video generation timeout after {job['max_wait_time']} seconds",
+                        **start["extra"]
+                    }
+                )
+            else:
+                interval = _next_poll_interval(job["poll_interval"])
+                self._update(
+                    job_id,
+                    polls=job["polls"] + 1,
+                    poll_interval=interval,
+                    next_poll_at=now + interval
+                )
+
+    def _finish_job(self, job_id: str, start: Dict[str, Any], elapsed: float):
+        """Download the finished video (runs on the job thread pool)"""
+        try:
+            result = self.tool._finish(start, start["operation"], round(elapsed, 1))
+            status = self.SUCCEEDED
+        except Exception as e:
+            result = {"status": "error", "message": f"Error saving generated video: {str(e)}", **start["extra"]}
+            status = self.FAILED
+
+        with self._lock:
+            self._update(
+                job_id,
+                status=status,
+                message=result["message"],
+                finished_at=time.time(),
+                result=result
+            )
+        print(f"🎬 Video job {job_id} {status}")
+
+    def _purge_expired(self, now: float):
+        """Drop finished jobs older than the retention window (caller must hold the lock)"""
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job["status"] in self.FINISHED_STATES
+            and job["finished_at"] is not None
+            and now - job["finished_at"] > Config.VIDEO_JOB_TTL
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get public status of a job
+
+        Returns:
+            Status dict, or None if the job does not exist
+        """
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+
+            now = time.time()
+            if job["started_at"] is None:
+                elapsed = 0
+            else:
+                elapsed = (job["finished_at"] or now) - job["started_at"]
+
+            return {
+                "job_id": job_id,
+                "kind": job["kind"],
+                "status": job["status"],
+                "done": job["status"] in self.FINISHED_STATES,
+                "message": job["message"],
+                "elapsed_time": round(elapsed, 1),
+                "max_wait_time": job["max_wait_time"],
+                "polls": job["polls"],
+                "next_poll_in": round(max(0.0, job["next_poll_at"] - now), 1)
+                    if job["status"] == self.RUNNING else None,
+                "version": job["version"]
+            }
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the tool result of a finished job, or None if not finished"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] not in self.FINISHED_STATES:
+                return None
+            return dict(job["result"])
+
+    def stats(self) -> Dict[str, Any]:
+        """Count jobs per state"""
+        with self._lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return {"total": len(self.jobs), "by_status": counts}
+
+
 # Initialize global video generation tool
 video_gen_tool = None
+video_job_manager = None
+
+
+def peek_video_job_manager() -> Optional["VideoJobManager"]:
+    """Get the video job manager if it has been created (no side effects)"""
+    return video_job_manager
 
 
 def get_video_generation_tool(api_key: str) -> VideoGenerationTools:
@@ -408,3 +667,11 @@ def get_video_generation_tool(api_key: str) -> VideoGenerationTools:
     if video_gen_tool is None:
         video_gen_tool = VideoGenerationTools(api_key)
     return video_gen_tool
+
+
+def get_video_job_manager(api_key: str) -> VideoJobManager:
+    """Get or create the video job manager instance"""
+    global video_job_manager
+    if video_job_manager is None:
+        video_job_manager = VideoJobManager(get_video_generation_tool(api_key))
+    return video_job_manager
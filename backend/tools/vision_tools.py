@@ -3,6 +3,7 @@ from PIL import Image
 import os
 import numpy as np
 from typing import Optional, Dict, Any
+from tools.model_manager import get_model_manager
 
 # Import transformers for Hugging Face models
 try:
@@ -41,71 +42,79 @@ class VisionTools:
     """Tools for image analysis: VQA and OCR using BLIP-VQA, PaddleOCR and EasyOCR"""
     
     def __init__(self):
-        """Initialize vision models"""
-        self.vqa_processor = None
-        self.vqa_model = None
-        self.paddleocr = None
-        self.easyocr_reader = None
+        """Initialize vision models (loaded on first use and kept resident by the model manager)"""
         self.device = "cuda" if TRANSFORMERS_AVAILABLE and torch.cuda.is_available() else "cpu"
         
+        manager = get_model_manager()
+        manager.register("blip-vqa", load=self._load_vqa, device=self.device, size_mb=1550)
+        manager.register("easyocr", load=self._load_easyocr, device="cpu", size_mb=300)
+        manager.register("paddleocr", load=self._load_paddleocr, device="cpu", size_mb=500)
+        
         print(f"🖥️ Vision tools will use device: {self.device}")
         print("📦 Models: BLIP-VQA (VQA) + PaddleOCR/EasyOCR (OCR)")
         print("💡 Use extract_text_paddleocr() or extract_text_easyocr() for OCR")
         
+    def _load_vqa(self):
+        """Load Visual Question Answering model - BLIP-VQA"""
+        try:
+            print("🔄 Loading BLIP-VQA processor and model (Salesforce/blip-vqa-base)...")
+            
+            # Load processor
+            processor = BlipProcessor.from_pretrained("Salesforce/blip-vqa-base")
+            
+            # Load model and move to device
+            model = BlipForQuestionAnswering.from_pretrained("Salesforce/blip-vqa-base")
+            model = model.to(self.device)
+            
+            print(f"✓ BLIP-VQA loaded successfully on {self.device}!")
+            return processor, model
+        except Exception as e:
+            print(f"✗ Error loading BLIP-VQA: {e}")
+            raise Exception(f"Failed to load BLIP-VQA model: {e}")
+    
+    def _load_easyocr(self):
+        """Load EasyOCR - Simple and accurate OCR"""
+        if not EASYOCR_AVAILABLE:
+            raise Exception("EasyOCR not available. Please install: pip install easyocr")
+        try:
+            print("🔄 Loading EasyOCR reader (English + Vietnamese)...")
+            reader = easyocr.Reader(['en', 'vi'], gpu=False)  # Dùng CPU trước
+            print("✓ EasyOCR loaded successfully!")
+            return reader
+        except Exception as e:
+            print(f"✗ Error loading EasyOCR: {e}")
+            import traceback
+            print(traceback.format_exc())
+            raise Exception(f"Failed to load EasyOCR: {e}")
+    
+    def _load_paddleocr(self):
+        """Load PaddleOCR - Advanced OCR with structured output"""
+        if not PADDLEOCR_AVAILABLE:
+            raise Exception("PaddleOCR not available. Please install: pip install paddleocr")
+        try:
+            print("🔄 Loading PaddleOCR pipeline...")
+            ocr = PaddleOCR(
+                use_doc_orientation_classify=False,
+                use_doc_unwarping=False,
+                use_textline_orientation=False
+            )
+            print("✓ PaddleOCR loaded successfully!")
+            return ocr
+        except Exception as e:
+            print(f"✗ Error loading PaddleOCR: {e}")
+            raise Exception(f"Failed to load PaddleOCR: {e}")
+    
     def load_vqa_model(self):
-        """Lazy load Visual Question Answering model - BLIP-VQA"""
-        if self.vqa_processor is None or self.vqa_model is None:
-            try:
-                print("🔄 Loading BLIP-VQA processor and model (Salesforce/blip-vqa-base)...")
-                
-                # Load processor
-                self.vqa_processor = BlipProcessor.from_pretrained("Salesforce/blip-vqa-base")
-                
-                # Load model and move to device
-                self.vqa_model = BlipForQuestionAnswering.from_pretrained("Salesforce/blip-vqa-base")
-                self.vqa_model = self.vqa_model.to(self.device)
-                
-                print(f"✓ BLIP-VQA loaded successfully on {self.device}!")
-            except Exception as e:
-                print(f"✗ Error loading BLIP-VQA: {e}")
-                raise Exception(f"Failed to load BLIP-VQA model: {e}")
-        return self.vqa_processor, self.vqa_model
+        """Lazy load BLIP-VQA; returns (processor, model)"""
+        return get_model_manager().load("blip-vqa")
     
-
     def load_easyocr(self):
-        """Lazy load EasyOCR - Simple and accurate OCR"""
-        if self.easyocr_reader is None:
-            if not EASYOCR_AVAILABLE:
-                raise Exception("EasyOCR not available. Please install: pip install easyocr")
-            try:
-                print("🔄 Loading EasyOCR reader (English + Vietnamese)...")
-                import easyocr
-                self.easyocr_reader = easyocr.Reader(['en', 'vi'], gpu=False)  # Dùng CPU trước
-                print("✓ EasyOCR loaded successfully!")
-            except Exception as e:
-                print(f"✗ Error loading EasyOCR: {e}")
-                import traceback
-                print(traceback.format_exc())
-                raise Exception(f"Failed to load EasyOCR: {e}")
-        return self.easyocr_reader
+        """Lazy load the EasyOCR reader"""
+        return get_model_manager().load("easyocr")
     
     def load_paddleocr(self):
-        """Lazy load PaddleOCR - Advanced OCR with structured output"""
-        if self.paddleocr is None:
-            if not PADDLEOCR_AVAILABLE:
-                raise Exception("PaddleOCR not available. Please install: pip install paddleocr")
-            try:
-                print("🔄 Loading PaddleOCR pipeline...")
-                self.paddleocr = PaddleOCR(
-                    use_doc_orientation_classify=False,
-                    use_doc_unwarping=False,
-                    use_textline_orientation=False
-                )
-                print("✓ PaddleOCR loaded successfully!")
-            except Exception as e:
-                print(f"✗ Error loading PaddleOCR: {e}")
-                raise Exception(f"Failed to load PaddleOCR: {e}")
-        return self.paddleocr
+        """Lazy load the PaddleOCR pipeline"""
+        return get_model_manager().load("paddleocr")
     
     def visual_question_answering(self, image_path: str, question: str) -> Dict[str, Any]:
         """
@@ -132,16 +141,15 @@ class VisionTools:
             
             # Load BLIP processor and model
             print(f"🤔 Analyzing image with question: {question}")
-            processor, model = self.load_vqa_model()
-            
-            # Process inputs
-            inputs = processor(raw_image, question, return_tensors="pt").to(self.device)
-            
-            # Generate answer
-            out = model.generate(**inputs)
-            
-            # Decode answer
-            answer = processor.decode(out[0], skip_special_tokens=True)
+            with get_model_manager().acquire("blip-vqa") as (processor, model):
+                # Process inputs
+                inputs = processor(raw_image, question, return_tensors="pt").to(self.device)
+                
+                # Generate answer
+                out = model.generate(**inputs)
+                
+                # Decode answer
+                answer = processor.decode(out[0], skip_special_tokens=True)
             print(f"✓ VQA answer: {answer}")
             
             return {
@@ -179,13 +187,11 @@ class VisionTools:
                     "error": f"Image not found: {image_path}"
                 }
             
-            # Load EasyOCR reader
-            reader = self.load_easyocr()
-            
             print("📄 Extracting text from image with EasyOCR...")
             
-            # Run OCR
-            result = reader.readtext(image_path, detail=detail)
+            # Run OCR (loads the reader on first use)
+            with get_model_manager().acquire("easyocr") as reader:
+                result = reader.readtext(image_path, detail=detail)
             
             # Process results
             if detail == 0:
@@ -239,12 +245,11 @@ class VisionTools:
                     "error": f"Image not found: {image_path}"
                 }
             
-            # Load PaddleOCR
-            ocr = self.load_paddleocr()
             print(f"📄 Extracting text from image with PaddleOCR...")
             
-            # Run prediction
-            result = ocr.predict(input=image_path)
+            # Run prediction (loads the pipeline on first use)
+            with get_model_manager().acquire("paddleocr") as ocr:
+                result = ocr.predict(input=image_path)
             
             # Process results
             all_text = []
@@ -308,26 +313,10 @@ class VisionTools:
             }
     
     def cleanup(self):
-        """Clean up models from memory"""
-        if self.vqa_processor is not None:
-            del self.vqa_processor
-            self.vqa_processor = None
-            
-        if self.vqa_model is not None:
-            del self.vqa_model
-            self.vqa_model = None
-        
-        if self.paddleocr is not None:
-            del self.paddleocr
-            self.paddleocr = None
-        
-        if self.easyocr_reader is not None:
-            del self.easyocr_reader
-            self.easyocr_reader = None
-        
-        # Clear CUDA cache if available
-        if TRANSFORMERS_AVAILABLE and torch.cuda.is_available():
-            torch.cuda.empty_cache()
+        """Unload vision models now (models in use are skipped)"""
+        manager = get_model_manager()
+        for name in ("blip-vqa", "paddleocr", "easyocr"):
+            manager.unload(name)
 
 
 # Global instance
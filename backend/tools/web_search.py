@@ -1,8 +1,13 @@
 """Web search tools supporting DuckDuckGo and SerpAPI"""
-from typing import List, Dict
-import requests
+from typing import List, Dict, Any
 from duckduckgo_search import DDGS
 from config import Config
+from tools.cache import TTLCache, normalize_query
+from tools.http_client import get_http_client
+
+
+# Shared result cache for all WebSearchTool instances
+_search_cache = TTLCache(max_size=Config.SEARCH_CACHE_MAX_SIZE, ttl=Config.SEARCH_CACHE_TTL["duckduckgo"])
 
 
 class WebSearchTool:
@@ -17,23 +22,38 @@ class WebSearchTool:
         """
         self.search_engine = search_engine or Config.SEARCH_ENGINE
         
-    def search(self, query: str, max_results: int = 10) -> List[Dict]:
+    def search(self, query: str, max_results: int = 10, region: str = None) -> List[Dict]:
         """
         Search the web using configured search engine
         
+        Results are cached per (engine, normalized query, max_results, region)
+        with per-engine TTLs, and concurrent identical queries share one fetch.
+        
         Args:
             query: Search query
             max_results: Maximum number of results to return
+            region: Search region (default: Config.SEARCH_REGION)
             
         Returns:
             List of search results with title, link, and snippet
         """
-        if self.search_engine == "serpapi":
-            return self._search_serpapi(query, max_results)
-        else:
-            return self._search_duckduckgo(query, max_results)
+        engine = "serpapi" if self.search_engine == "serpapi" else "duckduckgo"
+        region = region or Config.SEARCH_REGION
+        key = (engine, normalize_query(query), max_results, region)
+        
+        def fetch():
+            if engine == "serpapi":
+                return self._search_serpapi(query, max_results)
+            return self._search_duckduckgo(query, max_results, region)
+        
+        def ttl(results):
+            # Empty results are usually rate limits or network errors: keep them briefly
+            return Config.SEARCH_CACHE_TTL[engine] if results else Config.SEARCH_CACHE_EMPTY_TTL
+        
+        # Return a copy so callers cannot mutate the cached list
+        return list(_search_cache.get_or_compute(key, fetch, ttl=ttl))
     
-    def _search_duckduckgo(self, query: str, max_results: int) -> List[Dict]:
+    def _search_duckduckgo(self, query: str, max_results: int, region: str = "vn-vi") -> List[Dict]:
         import time
         max_retries = 2
         
@@ -56,7 +76,7 @@ class WebSearchTool:
                     search_results = ddgs.text(
                         query,
                         max_results=max_results,
-                        region="vn-vi",  # Vietnam region for better Vietnamese results
+                        region=region,  # Vietnam region by default for better Vietnamese results
                         safesearch="moderate",
                         timelimit="y",  # Results from last year
                         backend="api"  # Use API backend for better reliability
@@ -124,7 +144,7 @@ class WebSearchTool:
                 "engine": "google"
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = get_http_client().get(url, params=params, timeout=10)
             
             if response.status_code == 200:
                 results_data = response.json()
@@ -167,6 +187,23 @@ class WebSearchTool:
         return formatted
 
 
+# Global instances per search engine (created on first use)
+_search_tools = {}
+
+
+def get_web_search_tool(search_engine: str = None) -> WebSearchTool:
+    """Get or create the web search tool for a search engine"""
+    engine = search_engine or Config.SEARCH_ENGINE
+    if engine not in _search_tools:
+        _search_tools[engine] = WebSearchTool(engine)
+    return _search_tools[engine]
+
+
+def get_search_cache_stats() -> Dict[str, Any]:
+    """Get hit/miss/eviction counters of the search result cache"""
+    return _search_cache.stats()
+
+
 def search_web(query: str, search_engine: str = None, max_results: int = 5) -> str:
     """
     Convenience function to search the web
@@ -179,6 +216,6 @@ def search_web(query: str, search_engine: str = None, max_results: int = 5) -> s
     Returns:
         Formatted search results as string
     """
-    tool = WebSearchTool(search_engine)
+    tool = get_web_search_tool(search_engine)
     results = tool.search(query, max_results)
     return tool.format_results(results)
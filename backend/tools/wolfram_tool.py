@@ -1,13 +1,73 @@
 """Wolfram Alpha computation tool with plotting support"""
-import requests
 import xml.etree.ElementTree as ET
 import base64
+import copy
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
 from config import Config
+from tools.cache import TTLCache, normalize_query
+from tools.http_client import get_http_client
+
+
+class WolframQueryError(Exception):
+    """Wolfram Alpha rejected the query or the request failed (message is user-facing)"""
+
+
+def _error_result(message: str) -> dict:
+    """Result dict for a failed computation"""
+    return {
+        'text_results': [message],
+        'images': [],
+        'plots': [],
+        'pods': [],
+        'success': False
+    }
+
+
+def pod_matches(title: str, pod_id: str, pod_filter: Optional[List[str]]) -> bool:
+    """
+    Check a pod against a filter
+    
+    Args:
+        title: Pod title (e.g. "Indefinite integral")
+        pod_id: Pod id (e.g. "IndefiniteIntegral")
+        pod_filter: Case-insensitive substrings of the title or exact ids; None keeps all
+    """
+    if not pod_filter:
+        return True
+    title = title.lower()
+    pod_id = pod_id.lower()
+    return any(f.lower() in title or f.lower() == pod_id for f in pod_filter)
+
+
+def merge_pods(pods: List[dict]) -> dict:
+    """Build a result dict (text_results, images, plots, pods) from parsed pods"""
+    result = {
+        'text_results': [],
+        'images': [],
+        'plots': [],
+        'pods': [],
+        'success': True
+    }
+    for pod in pods:
+        # The same image dicts are shared between the pod and the flat lists,
+        # so a local_url set during prefetch shows up in both
+        result['text_results'].extend(pod['text_results'])
+        result['images'].extend(pod['images'])
+        result['plots'].extend(pod['plots'])
+        result['pods'].append(pod)
+    return result
 
 
 class WolframTool:
     """Wolfram Alpha computation interface with plotting support"""
     
+    PLOT_KEYWORDS = ['plot', 'graph', 'chart', 'curve', 'function']
+    
     def __init__(self):
         """Initialize Wolfram Alpha client"""
         if not Config.WOLFRAM_APP_ID:
@@ -16,123 +76,417 @@ class WolframTool:
         self.app_id = Config.WOLFRAM_APP_ID
         self.base_url = "http://api.wolframalpha.com/v2/query"
     
-    def compute(self, query: str) -> dict:
+    def _parse_pod(self, pod) -> dict:
+        """Convert a complete <pod> element into a dict of text results and images"""
+        title = pod.attrib.get('title', '')
+        is_plot = any(keyword in title.lower() for keyword in self.PLOT_KEYWORDS)
+        parsed = {
+            'title': title,
+            'id': pod.attrib.get('id', ''),
+            'text_results': [],
+            'images': [],
+            'plots': []
+        }
+        
+        for subpod in pod.iter('subpod'):
+            # Get plaintext
+            plaintext = subpod.find('plaintext')
+            if plaintext is not None and plaintext.text:
+                parsed['text_results'].append(f"{title}: {plaintext.text}")
+            
+            # Get images/plots
+            img = subpod.find('img')
+            if img is not None:
+                img_src = img.attrib.get('src')
+                if img_src:
+                    img_data = {
+                        'url': img_src,
+                        'alt': img.attrib.get('alt', title),
+                        'title': title
+                    }
+                    if is_plot:
+                        parsed['plots'].append(img_data)
+                    else:
+                        parsed['images'].append(img_data)
+        
+        return parsed
+    
+    def iter_pods(self, query: str, pod_filter: Optional[List[str]] = None) -> Iterator[dict]:
+        """
+        Stream the query response and yield pods as soon as each one is parsed
+        
+        The XML body is parsed incrementally while it downloads; every pod
+        element is released after use, and pods rejected by the filter are
+        never converted to dicts. Closing the generator early closes the
+        connection.
+        
+        Args:
+            query: Mathematical or computational query
+            pod_filter: Pod titles/ids to keep (see pod_matches), None for all
+            
+        Yields:
+            Pod dicts with title, id, text_results, images and plots
+            
+        Raises:
+            WolframQueryError: Connection error or query not understood
+        """
+        params = {
+            'input': query,
+            'appid': self.app_id,
+            'format': 'plaintext,image',
+            'output': 'xml'
+        }
+        
+        response = get_http_client().get(self.base_url, params=params, timeout=20, stream=True)
+        try:
+            if response.status_code != 200:
+                raise WolframQueryError(f"Lỗi kết nối Wolfram Alpha: {response.status_code}")
+            
+            # Let urllib3 undo any gzip transfer encoding while we read
+            response.raw.decode_content = True
+            root = None
+            
+            for event, elem in ET.iterparse(response.raw, events=('start', 'end')):
+                if event == 'start':
+                    # Attributes are available on the opening tag, so a failed
+                    # query is detected before the rest of the body arrives
+                    if root is None:
+                        root = elem
+                        if elem.attrib.get('success') != 'true':
+                            raise WolframQueryError("Wolfram Alpha không thể hiểu câu hỏi này.")
+                    continue
+                
+                if elem.tag != 'pod':
+                    continue
+                
+                if pod_matches(elem.attrib.get('title', ''), elem.attrib.get('id', ''), pod_filter):
+                    yield self._parse_pod(elem)
+                
+                # Drop the finished pod from the tree to keep memory flat
+                elem.clear()
+                if root is not None and len(root) and root[-1] is elem:
+                    root.remove(elem)
+        finally:
+            response.close()
+    
+    def compute(
+        self,
+        query: str,
+        pod_filter: Optional[List[str]] = None,
+        max_pods: Optional[int] = None
+    ) -> dict:
         """
         Compute using Wolfram Alpha API with enhanced output
         
         Args:
             query: Mathematical or computational query
+            pod_filter: Only keep pods whose title/id matches (e.g. ["Result", "Plot"])
+            max_pods: Stop reading the response after this many matching pods
             
         Returns:
-            Dict containing text results, images, and plots
+            Dict containing text results, images, plots and the parsed pods
+        """
+        try:
+            pods = []
+            for pod in self.iter_pods(query, pod_filter):
+                pods.append(pod)
+                if max_pods and len(pods) >= max_pods:
+                    break
+            return merge_pods(pods)
+        except WolframQueryError as e:
+            return _error_result(str(e))
+        except Exception as e:
+            return _error_result(f"Lỗi khi tính toán với Wolfram Alpha: {str(e)}")
+
+
+class WolframCache:
+    """
+    Two-tier cache of parsed Wolfram Alpha results keyed by normalized input
+
+    The in-memory tier (LRU + TTL) also coalesces concurrent identical queries.
+    The on-disk tier stores results as JSON so they survive restarts. Pod images
+    can be prefetched into a content-addressed store served from /output, so
+    repeated computations need no outbound calls at all.
+    """
+    
+    IMAGE_EXTENSIONS = {
+        'image/gif': '.gif',
+        'image/png': '.png',
+        'image/jpeg': '.jpg',
+        'image/svg+xml': '.svg'
+    }
+    
+    def __init__(
+        self,
+        cache_dir: str,
+        image_dir: str,
+        ttl: float,
+        max_memory_entries: int = 512,
+        prefetch_images: bool = True
+    ):
+        """
+        Initialize Wolfram cache
+        
+        Args:
+            cache_dir: Directory for JSON result files
+            image_dir: Directory for prefetched pod images (under output/)
+            ttl: Seconds a result stays valid (memory and disk)
+            max_memory_entries: Maximum results kept in memory
+            prefetch_images: Download pod images into the local store
         """
+        self.cache_dir = cache_dir
+        self.image_dir = image_dir
+        self.ttl = ttl
+        self.prefetch = prefetch_images
+        self.memory = TTLCache(max_size=max_memory_entries, ttl=ttl)
+        self.disk_hits = 0
+        self.images_fetched = 0
+        self.images_reused = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        os.makedirs(image_dir, exist_ok=True)
+    
+    @staticmethod
+    def make_key(query: str) -> str:
+        """Hash of the normalized query"""
+        return hashlib.sha256(normalize_query(query).encode('utf-8')).hexdigest()
+    
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def _load_from_disk(self, key: str) -> Optional[dict]:
+        """Read a non-expired result from disk"""
+        path = self._disk_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _save_to_disk(self, key: str, result: dict):
+        """Write a result atomically"""
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Could not write Wolfram cache file: {e}")
+    
+    def _store_image(self, item: dict):
+        """Download one pod image into the content-addressed store and set its local_url"""
         try:
-            # Request both plaintext and image formats
-            params = {
-                'input': query,
-                'appid': self.app_id,
-                'format': 'plaintext,image',
-                'output': 'xml'
-            }
+            response = get_http_client().get(item['url'], timeout=10)
+            if response.status_code != 200:
+                return
             
-            response = requests.get(self.base_url, params=params, timeout=20)
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+            ext = self.IMAGE_EXTENSIONS.get(content_type, '.gif')
+            digest = hashlib.sha256(response.content).hexdigest()[:32]
+            filename = f"{digest}{ext}"
+            path = os.path.join(self.image_dir, filename)
             
-            if response.status_code == 200:
-                # Parse XML response
-                root = ET.fromstring(response.content)
-                
-                # Check if query was successful
-                if root.attrib.get('success') == 'true':
-                    result = {
-                        'text_results': [],
-                        'images': [],
-                        'plots': [],
-                        'success': True
-                    }
-                    
-                    # Extract all pods with results
-                    for pod in root.findall('.//pod'):
-                        title = pod.attrib.get('title', '')
-                        
-                        # Extract text results
-                        subpods = pod.findall('.//subpod')
-                        for subpod in subpods:
-                            # Get plaintext
-                            plaintext = subpod.find('plaintext')
-                            if plaintext is not None and plaintext.text:
-                                result['text_results'].append(f"{title}: {plaintext.text}")
-                            
-                            # Get images/plots
-                            img = subpod.find('img')
-                            if img is not None:
-                                img_src = img.attrib.get('src')
-                                img_alt = img.attrib.get('alt', title)
-                                
-                                if img_src:
-                                    # Check if it's a plot/graph
-                                    is_plot = any(keyword in title.lower() for keyword in 
-                                                ['plot', 'graph', 'chart', 'curve', 'function'])
-                                    
-                                    img_data = {
-                                        'url': img_src,
-                                        'alt': img_alt,
-                                        'title': title
-                                    }
-                                    
-                                    if is_plot:
-                                        result['plots'].append(img_data)
-                                    else:
-                                        result['images'].append(img_data)
-                    
-                    return result
-                else:
-                    return {
-                        'text_results': ["Wolfram Alpha không thể hiểu câu hỏi này."],
-                        'images': [],
-                        'plots': [],
-                        'success': False
-                    }
+            if os.path.exists(path):
+                self.images_reused += 1
             else:
-                return {
-                    'text_results': [f"Lỗi kết nối Wolfram Alpha: {response.status_code}"],
-                    'images': [],
-                    'plots': [],
-                    'success': False
-                }
-                
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(response.content)
+                os.replace(tmp_path, path)
+                self.images_fetched += 1
+            
+            # image_dir lives under output/, which is served at /output
+            relative = os.path.relpath(path, Config.WOLFRAM_OUTPUT_ROOT).replace(os.sep, '/')
+            item['local_url'] = f"/output/{relative}"
         except Exception as e:
-            return {
-                'text_results': [f"Lỗi khi tính toán với Wolfram Alpha: {str(e)}"],
-                'images': [],
-                'plots': [],
-                'success': False
-            }
+            print(f"⚠️ Could not prefetch Wolfram image: {e}")
+    
+    def _prefetch_images(self, result: dict):
+        """Prefetch all pod images of a result in parallel"""
+        items = result.get('plots', []) + result.get('images', [])
+        if not items:
+            return
+        with ThreadPoolExecutor(max_workers=min(8, len(items))) as executor:
+            list(executor.map(self._store_image, items))
+    
+    def peek(self, query: str) -> Optional[dict]:
+        """
+        Get a cached result without computing (memory → disk)
+        
+        Returns:
+            Copy of the result dict, or None on a miss
+        """
+        key = self.make_key(query)
+        result = self.memory.get(key)
+        if result is None:
+            result = self._load_from_disk(key)
+            if result is None:
+                return None
+            self.disk_hits += 1
+            self.memory.set(key, result)
+        return copy.deepcopy(result)
+    
+    def put(self, query: str, result: dict):
+        """Store a complete successful result (prefetching its images)"""
+        if not result.get('success'):
+            return
+        if self.prefetch:
+            self._prefetch_images(result)
+        key = self.make_key(query)
+        self._save_to_disk(key, result)
+        self.memory.set(key, copy.deepcopy(result))
+    
+    def get_or_compute(self, query: str, compute: Callable[[], dict]) -> dict:
+        """
+        Get a cached result or compute it once (memory → disk → Wolfram)
+        
+        Args:
+            query: Wolfram input
+            compute: Function calling Wolfram Alpha on a miss
+            
+        Returns:
+            Copy of the result dict
+        """
+        key = self.make_key(query)
+        
+        def load_or_compute():
+            result = self._load_from_disk(key)
+            if result is not None:
+                self.disk_hits += 1
+                return result
+            
+            result = compute()
+            if result.get('success'):
+                if self.prefetch:
+                    self._prefetch_images(result)
+                self._save_to_disk(key, result)
+            return result
+        
+        # Only successful results are cached; errors are retried next time
+        result = self.memory.get_or_compute(
+            key,
+            load_or_compute,
+            ttl=lambda r: self.ttl if r.get('success') else 0
+        )
+        return copy.deepcopy(result)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        return {
+            **self.memory.stats(),
+            "disk_hits": self.disk_hits,
+            "images_fetched": self.images_fetched,
+            "images_reused": self.images_reused
+        }
+
+
+# Global instances (created on first use)
+_wolfram_tool = None
+_wolfram_cache = None
 
 
-def wolfram_compute(query: str) -> dict:
+def get_wolfram_tool() -> WolframTool:
+    """Get or create the Wolfram tool instance"""
+    global _wolfram_tool
+    if _wolfram_tool is None:
+        _wolfram_tool = WolframTool()
+    return _wolfram_tool
+
+
+def peek_wolfram_cache() -> Optional[WolframCache]:
+    """Get the Wolfram result cache if it has been created (no side effects)"""
+    return _wolfram_cache
+
+
+def get_wolfram_cache() -> WolframCache:
+    """Get or create the Wolfram result cache"""
+    global _wolfram_cache
+    if _wolfram_cache is None:
+        _wolfram_cache = WolframCache(
+            cache_dir=Config.WOLFRAM_CACHE_DIR,
+            image_dir=os.path.join(Config.WOLFRAM_OUTPUT_ROOT, "wolfram"),
+            ttl=Config.WOLFRAM_CACHE_TTL,
+            max_memory_entries=Config.WOLFRAM_CACHE_MAX_ENTRIES,
+            prefetch_images=Config.WOLFRAM_PREFETCH_IMAGES
+        )
+    return _wolfram_cache
+
+
+def filter_result(result: dict, pod_filter: Optional[List[str]] = None, max_pods: Optional[int] = None) -> dict:
+    """Apply a pod filter / limit to a complete result (e.g. one served from cache)"""
+    # Entries cached before pods were recorded can only be served whole
+    if not result.get('success') or 'pods' not in result or (not pod_filter and not max_pods):
+        return result
+    pods = [p for p in result.get('pods', []) if pod_matches(p['title'], p['id'], pod_filter)]
+    return merge_pods(pods[:max_pods] if max_pods else pods)
+
+
+def wolfram_compute(
+    query: str,
+    pod_filter: Optional[List[str]] = None,
+    max_pods: Optional[int] = None
+) -> dict:
     """
     Convenience function for Wolfram Alpha computation
     
+    Full results are cached. Filtered/limited requests are served from a cached
+    full result when there is one; otherwise they stream only the requested
+    pods and are not cached (the result is partial).
+    
     Args:
         query: Computation query
+        pod_filter: Only keep pods whose title/id matches (e.g. ["Result", "Plot"])
+        max_pods: Return after this many matching pods
         
     Returns:
         Dict containing computation results, images, and plots
     """
     try:
-        tool = WolframTool()
-        return tool.compute(query)
+        tool = get_wolfram_tool()
+        cache = get_wolfram_cache()
+        if not pod_filter and not max_pods:
+            return cache.get_or_compute(query, lambda: tool.compute(query))
+        
+        cached = cache.peek(query)
+        if cached is not None:
+            return filter_result(cached, pod_filter, max_pods)
+        return tool.compute(query, pod_filter=pod_filter, max_pods=max_pods)
     except ValueError as e:
-        return {
-            'text_results': [f"Wolfram Alpha không khả dụng: {str(e)}"],
-            'images': [],
-            'plots': [],
-            'success': False
-        }
+        return _error_result(f"Wolfram Alpha không khả dụng: {str(e)}")
     except Exception as e:
-        return {
-            'text_results': [f"Lỗi: {str(e)}"],
-            'images': [],
-            'plots': [],
-            'success': False
-        }
+        return _error_result(f"Lỗi: {str(e)}")
+
+
+def wolfram_stream_pods(query: str, pod_filter: Optional[List[str]] = None) -> Iterator[dict]:
+    """
+    Yield pods for a query as they become available
+    
+    Replays from the cache on a hit. On a miss the response is parsed
+    incrementally; an unfiltered stream that completes is stored in the cache.
+    
+    Args:
+        query: Computation query
+        pod_filter: Only yield pods whose title/id matches
+        
+    Yields:
+        Pod dicts with title, id, text_results, images and plots
+        
+    Raises:
+        WolframQueryError, ValueError: Query failed or Wolfram is not configured
+    """
+    cache = get_wolfram_cache()
+    cached = cache.peek(query)
+    if cached is not None and 'pods' in cached:
+        yield from filter_result(cached, pod_filter).get('pods', [])
+        return
+    
+    pods = []
+    for pod in get_wolfram_tool().iter_pods(query, pod_filter):
+        pods.append(pod)
+        yield copy.deepcopy(pod)
+    
+    if not pod_filter:
+        cache.put(query, merge_pods(pods))
@@ -0,0 +1,187 @@
+"""Bounded worker pools for running blocking tool calls off the event loop"""
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator
+
+from config import Config
+
+
+class WorkerPool:
+    """Thread pool with a fixed size limit and queue-depth metrics"""
+
+    def __init__(self, name: str, max_workers: int):
+        """
+        Initialize worker pool
+
+        Args:
+            name: Pool name used in metrics and thread names
+            max_workers: Maximum number of jobs running at the same time
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=f"{name}-worker"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+        self._max_queue_depth = 0
+        self._total_wait_time = 0.0
+        self._total_run_time = 0.0
+
+    def _wrap(self, func: Callable, submitted_at: float) -> Callable:
+        """Wrap a job so queue wait and run time are recorded"""
+        def job():
+            started_at = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._total_wait_time += started_at - submitted_at
+            try:
+                result = func()
+                with self._lock:
+                    self._completed += 1
+                return result
+            except Exception:
+                with self._lock:
+                    self._failed += 1
+                raise
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._total_run_time += time.perf_counter() - started_at
+        return job
+
+    def _on_done(self, future: Future):
+        """A job cancelled before it started never ran _wrap, so it leaves the queue here"""
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def _submit(self, func: Callable, *args, **kwargs) -> Future:
+        """Queue a call and return its concurrent future"""
+        with self._lock:
+            self._queued += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queued)
+        call = functools.partial(func, *args, **kwargs)
+        future = self._executor.submit(self._wrap(call, time.perf_counter()))
+        future.add_done_callback(self._on_done)
+        return future
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking callable in this pool and await its result
+
+        Args:
+            func: Blocking function to execute
+            *args, **kwargs: Arguments passed to the function
+
+        Returns:
+            Return value of the function
+        """
+        # Cancelling the await (e.g. client disconnect) cancels the job if it has not started
+        return await asyncio.wrap_future(self._submit(func, *args, **kwargs))
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        Submit a blocking callable from synchronous code
+
+        Returns:
+            concurrent.futures.Future of the function's return value
+        """
+        return self._submit(func, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get current pool metrics"""
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "queue_depth": self._queued,
+                "max_queue_depth": self._max_queue_depth,
+                "completed": self._completed,
+                "failed": self._failed,
+                "avg_wait_ms": round(self._total_wait_time / finished * 1000, 2) if finished else 0.0,
+                "avg_run_ms": round(self._total_run_time / finished * 1000, 2) if finished else 0.0
+            }
+
+    def shutdown(self):
+        """Stop accepting jobs and release worker threads"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global pools (created on first use)
+_model_pool = None
+_io_pool = None
+
+
+def get_model_pool() -> WorkerPool:
+    """Get or create the pool for CPU/GPU-bound model inference"""
+    global _model_pool
+    if _model_pool is None:
+        _model_pool = WorkerPool("model", Config.MODEL_POOL_SIZE)
+    return _model_pool
+
+
+def get_io_pool() -> WorkerPool:
+    """Get or create the pool for blocking network and disk I/O"""
+    global _io_pool
+    if _io_pool is None:
+        _io_pool = WorkerPool("io", Config.IO_POOL_SIZE)
+    return _io_pool
+
+
+async def run_model(func: Callable, *args, **kwargs) -> Any:
+    """Run model inference (torch, diffusers, whisper, OCR) in the model pool"""
+    return await get_model_pool().run(func, *args, **kwargs)
+
+
+async def run_io(func: Callable, *args, **kwargs) -> Any:
+    """Run blocking I/O (Gemini, search, Wolfram, file work) in the I/O pool"""
+    return await get_io_pool().run(func, *args, **kwargs)
+
+
+async def iterate_io(iterator: Iterator) -> AsyncIterator:
+    """
+    Consume a blocking iterator (e.g. a streamed HTTP parse) from the I/O pool
+
+    Each next() runs in the pool, so items reach the event loop as soon as
+    they are produced.
+    """
+    iterator = iter(iterator)
+    done = object()
+    try:
+        while True:
+            item = await run_io(next, iterator, done)
+            if item is done:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await run_io(close)
+
+
+def get_worker_stats() -> Dict[str, Any]:
+    """Get metrics for all worker pools"""
+    return {
+        "model": get_model_pool().stats(),
+        "io": get_io_pool().stats()
+    }
+
+
+def shutdown_workers():
+    """Shut down all worker pools"""
+    global _model_pool, _io_pool
+    for pool in (_model_pool, _io_pool):
+        if pool is not None:
+            pool.shutdown()
+    _model_pool = None
+    _io_pool = None
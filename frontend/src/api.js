@@ -30,6 +30,16 @@ export const chatAPI = {
   },
 };
 
+// Dataset session id, one per browser tab, so concurrent users keep separate data
+const getDataSessionId = () => {
+  let sessionId = sessionStorage.getItem('dataSessionId');
+  if (!sessionId) {
+    sessionId = `s${Date.now().toString(36)}${Math.random().toString(36).slice(2, 10)}`;
+    sessionStorage.setItem('dataSessionId', sessionId);
+  }
+  return sessionId;
+};
+
 // Data Analysis API
 export const dataAPI = {
   /**
@@ -40,6 +50,7 @@ export const dataAPI = {
   uploadCSV: async (file) => {
     const formData = new FormData();
     formData.append('file', file);
+    formData.append('session_id', getDataSessionId());
 
     const response = await apiClient.post('/upload-csv', formData, {
       headers: {
@@ -59,6 +70,7 @@ export const dataAPI = {
     const response = await apiClient.post('/analyze-data', {
       action,
       ...data,
+      session_id: getDataSessionId(),
     });
     return response.data;
   },
@@ -67,9 +79,10 @@ export const dataAPI = {
    * Clear the current data
    */
   clearData: () => {
-    // This is a local operation, no API call needed
-    // The backend will handle new uploads by overwriting
-    console.log('Data cleared on client side');
+    // Free this tab's dataset on the backend; the UI state is cleared locally
+    apiClient
+      .delete('/clear-data', { params: { session_id: getDataSessionId() } })
+      .catch((error) => console.error('Error clearing data:', error));
   },
 };
 
@@ -103,13 +103,12 @@ function DataAnalysisFeature() {
       const response = await dataAPI.analyzeData('create_chart', requestData);
       setChartResult(response.result);
       
-      // Extract chart filename from result and add timestamp to prevent caching
-      const match = response.result.match(/charts[\\\/](.+\.png)/);
+      // Extract chart filename from result (names are content-addressed, so the browser may cache them)
+      const match = response.result.match(/charts[\\\/](.+\.(?:png|webp|svg))/);
       if (match) {
-        const timestamp = new Date().getTime();
         setChartResult({
           message: response.result,
-          imageUrl: `http://localhost:8000/charts/${match[1]}?t=${timestamp}`
+          imageUrl: `http://localhost:8000/charts/${match[1]}`
         });
       }
     } catch (error) {
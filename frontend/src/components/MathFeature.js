@@ -70,7 +70,7 @@ function MathFeature() {
                     background: 'white'
                   }}>
                     <img 
-                      src={plot.url} 
+                      src={plot.local_url ? `http://localhost:8000${plot.local_url}` : plot.url} 
                       alt={plot.alt} 
                       style={{ 
                         maxWidth: '100%', 
@@ -120,7 +120,7 @@ function MathFeature() {
                     background: 'white'
                   }}>
                     <img 
-                      src={img.url} 
+                      src={img.local_url ? `http://localhost:8000${img.local_url}` : img.url} 
                       alt={img.alt} 
                       style={{ 
                         maxWidth: '100%', 